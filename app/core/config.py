@@ -1,6 +1,7 @@
 # app/core/config.py
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -20,6 +21,10 @@ class Settings(BaseSettings):
 
     RESET_LINK_BASE: str| None = None
     RESET_TOKEN_LIFETIME_MINUTES: int =60  # default to 60
+    RESET_TOKEN_PURGE_BATCH_SIZE: int = 1000  # rows deleted per short transaction
+    RESET_TOKEN_PURGE_TIME_BUDGET_SECONDS: float = 5.0  # stop a purge run after this long
+    RESET_TOKEN_PARTITIONED: bool = False  # table converted with `python -m app.tasks.maintenance partition-reset-tokens`
+    RESET_TOKEN_PARTITION_DAYS_AHEAD: int = 3
 
     IMAGE_UPLOAD_DIR: str| None = None
     MAX_FILE_SIZE_MB: int =8
@@ -28,6 +33,44 @@ class Settings(BaseSettings):
     ALGORITHM: str | None = None
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60000  # default to 60 if not set
 
+    DB_ECHO: bool = True  # log every statement, as before it was configurable; set false in production
+    DB_POOL_SIZE: int = 5
+    DB_POOL_WARM_CONNECTIONS: int = 2  # opened at startup so the first requests skip the connect
+
+    # Quick boot for autoscaled pods: check the schema is at the Alembic head instead of create_all,
+    # do not wait for the branch cache to load, and start the scheduler in the background
+    FAST_STARTUP: bool = False
+
+    SCHEDULER_LEASE_RENEW_SECONDS: int = 5  # leader lease check / follower retry interval
+
+    JOB_WORKER_CONCURRENCY: int = 4  # claim loops per `python -m app.tasks.worker` process
+    JOB_CLAIM_BATCH_SIZE: int = 10
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0  # idle wait when the queue is empty
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = 300  # a claimed job is handed out again after this long
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0  # doubled per attempt
+    JOB_RETRY_BACKOFF_MAX_SECONDS: float = 3600.0
+
+    AUDIT_QUEUE_SIZE: int = 10000  # committed events waiting for the writer, per worker
+    AUDIT_BATCH_SIZE: int = 500  # rows per INSERT
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0  # longest an event waits for a batch to fill
+    AUDIT_OVERFLOW_POLICY: Literal["drop_newest", "drop_oldest"] = "drop_oldest"  # when the queue is full
+    AUDIT_DRAIN_TIMEOUT_SECONDS: float = 10.0  # shutdown budget for writing what is queued
+    AUDIT_WRITE_MAX_ATTEMPTS: int = 5  # connection failures before a batch is dropped
+
+    LAST_LOGIN_FLUSH_SECONDS: float = 5.0  # how often buffered last_login times are written
+
+    BRANCH_CACHE_ENABLED: bool = True
+    BRANCH_CACHE_TTL_SECONDS: int = 60  # full reload interval (and max staleness) while LISTEN is down
+    BRANCH_CACHE_KEEPALIVE_SECONDS: int = 15  # listener connection health check
+
+    LIST_RENDER_MODE: Literal["orm", "fast", "db"] = "orm"  # see app/services/list_render.py
+
+
+    PASSWORD_HASH_WORKERS: int | None = None  # process pool size for bulk hashing, defaults to CPU count
+    USER_IMPORT_MAX_ROWS: int = 100000
+    USER_BATCH_MAX_IDS: int = 100  # ids per /user/batch request
+
     @property
     def database_url(self) -> str:
         return (
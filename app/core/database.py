@@ -1,14 +1,19 @@
 # app/core/database.py
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlmodel import SQLModel
 
 from app.core.config import get_settings
 
 settings = get_settings()
 DATABASE_URL = settings.database_url
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
 
-engine = create_async_engine(DATABASE_URL, pool_pre_ping=True,echo=True)
+engine = create_async_engine(DATABASE_URL, pool_pre_ping=True, echo=settings.DB_ECHO, pool_size=settings.DB_POOL_SIZE)
 Base = declarative_base()
 
 async_session = async_sessionmaker(
@@ -21,5 +26,41 @@ async_session = async_sessionmaker(
 
 
 async def init_db():
+    from sqlmodel import SQLModel  # only this legacy path needs it
+
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+
+
+def _alembic_heads() -> set:
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_heads())
+
+
+async def check_schema_head() -> None:
+    """Fails startup unless the database is at the migration head this code was written against"""
+    async def database_revisions() -> set:
+        async with engine.connect() as conn:
+            return set((await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars())
+
+    try:
+        expected, current = await asyncio.gather(asyncio.to_thread(_alembic_heads), database_revisions())
+    except SQLAlchemyError as e:
+        raise RuntimeError("Cannot read the schema revision; run `alembic upgrade head`") from e
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, this code expects {sorted(expected)}; "
+            "run `alembic upgrade head`"
+        )
+
+
+async def warm_pool(connections: int) -> None:
+    """Opens pool connections up front so the first requests do not pay for connecting"""
+    async def open_one():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # All at once, so each is a separate connection rather than one reused sequentially
+    await asyncio.gather(*(open_one() for _ in range(min(connections, settings.DB_POOL_SIZE))))
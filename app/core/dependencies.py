@@ -1,22 +1,24 @@
+from uuid import UUID
+
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import AsyncGenerator, Optional
 
-from sqlalchemy.orm import selectinload
-
+from app.crud.statements import USER_BY_ID
 from app.models.user import User
 from app.core.security import decode_access_token
 from app.core.database import async_session
-from app.models.user_branch_link import UserBranchLink
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    # Unit of work: one transaction per request, committed once after the endpoint
+    # returns and rolled back if it raises. CRUD helpers only flush.
     async with async_session() as session:
-        yield session
+        async with session.begin():
+            yield session
 
 async def get_current_user(token: str = Depends(oauth2_scheme),session: AsyncSession = Depends(get_session)) -> User:
     payload = decode_access_token(token)
@@ -26,14 +28,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme),session: AsyncSes
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
+    try:
+        user_id = UUID(str(user_id))
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    statement = (
-        select(User)
-        .where(User.id == user_id)
-        # Load the branch links and their related branch in one go
-        .options(selectinload(User.user_branch_links).selectinload(UserBranchLink.branch))
-    )
-    result = await session.execute(statement)
+    # Prebuilt statement; loads the branch links and their related branch in one go
+    result = await session.execute(USER_BY_ID, {"user_id": user_id})
     user: Optional[User] = result.scalars().first()
 
     if not user:
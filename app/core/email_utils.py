@@ -2,13 +2,14 @@
 from email.message import EmailMessage
 from smtplib import SMTPException
 
-from aiosmtplib import send
 from app.core.config import get_settings
 
 settings = get_settings()
 
 
 async def send_email(subject: str, to_email: str, body: str) -> None:
+    from aiosmtplib import send  # only job workers send mail
+
     message = EmailMessage()
     message["From"] = settings.SMTP_FROM
     message["To"] = to_email
@@ -1,18 +1,26 @@
 # app/core/security.py
 
+import asyncio
 import re
+from concurrent.futures import ProcessPoolExecutor
 from fastapi import HTTPException
-from passlib.context import CryptContext
-from jose import JWTError, jwt, ExpiredSignatureError
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, List
 from starlette.status import HTTP_400_BAD_REQUEST
 from app.core.config import get_settings
 
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+# passlib/argon2 and jose are imported on first use, keeping them off the startup path
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["argon2"], deprecated="auto")
+
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = getattr(settings, "ACCESS_TOKEN_EXPIRE_MINUTES", 60000)
@@ -20,6 +28,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = getattr(settings, "ACCESS_TOKEN_EXPIRE_MINUTES", 6
 
 __all__ = [
     "hash_password",
+    "hash_passwords",
     "verify_password",
     "create_access_token",
     "decode_access_token",
@@ -28,18 +37,48 @@ __all__ = [
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def _hash_password_batch(passwords: List[str]) -> List[str]:
+    pwd_context = get_pwd_context()
+    return [pwd_context.hash(password) for password in passwords]
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _hash_pool
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+async def hash_passwords(passwords: List[str], chunk_size: int = 64) -> List[str]:
+    """Hashes many passwords in parallel across the process pool, preserving order"""
+    loop = asyncio.get_running_loop()
+    pool = get_hash_pool()
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+    results = await asyncio.gather(*(loop.run_in_executor(pool, _hash_password_batch, chunk) for chunk in chunks))
+    return [hashed for chunk in results for hashed in chunk]
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + expires_delta  # Use timezone.utc
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 def decode_access_token(token: str) -> Optional[dict]:
+    from jose import JWTError, jwt, ExpiredSignatureError
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
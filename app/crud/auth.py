@@ -2,13 +2,12 @@
 import secrets
 from uuid import UUID
 from pydantic import EmailStr
-from sqlmodel import select
 from app.core.config import get_settings
-from app.core.email_utils import send_email
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone, timedelta
 from fastapi import HTTPException, status
+from app.crud.statements import USER_BY_EMAIL
 from app.crud.user import get_user_by_email, get_user_by_id
 from app.models.password_reset_token import PasswordResetToken
 from app.models.user import User
@@ -19,17 +18,18 @@ from app.core.security import (
     validate_password_strength,
 )
 from app.services.auth.rate_limiter import can_request_reset, mark_reset_requested
+from app.services.job_queue import enqueue, JOB_SEND_RESET_EMAIL, JOB_SEND_ADMIN_RESET_EMAIL, PRIORITY_HIGH
+from app.services.last_login import last_login_buffer
 from app.services.permissions import user_has_permission
 
 settings = get_settings()
-RESET_LINK_BASE = settings.RESET_LINK_BASE
 RESET_TOKEN_LIFETIME_MINUTES = settings.RESET_TOKEN_LIFETIME_MINUTES
 ONE_TIME_PASSWORD = settings.ONE_TIME_PASSWORD
 
 
 async def authenticate_user(email: EmailStr, password: str, session: AsyncSession):
     normalized_email = str(email).lower().strip()
-    result = await session.execute(select(User).where(User.email == normalized_email))
+    result = await session.execute(USER_BY_EMAIL, {"email": normalized_email})
     user = result.scalars().first()
 
     if not user or not verify_password(password, str(user.hashed_password)):
@@ -45,10 +45,8 @@ async def authenticate_user(email: EmailStr, password: str, session: AsyncSessio
     if user.must_change_password:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Password reset required. Please change your password.")
 
-    user.last_login = datetime.now(timezone.utc)
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    # Written behind in batches (app/services/last_login.py); the login itself writes nothing
+    last_login_buffer.note(user.id, datetime.now(timezone.utc))
 
     token = create_access_token(data={"sub": str(user.id), "role": user.role})
     return {"access_token": token, "token_type": "bearer"}
@@ -71,19 +69,11 @@ async def send_reset_password_token(email: EmailStr, session: AsyncSession):
         expires_at=expires_at,
     )
     session.add(reset_token)
-    await session.commit()
-
-    reset_url = f"{RESET_LINK_BASE}{token}"
-    subject = "Password Reset Request"
-    body = (
-        f"Hello {user.full_name},\n\n"
-        f"To reset your password, Click the link below to reset your password: (valid for {RESET_TOKEN_LIFETIME_MINUTES} minutes):\n\n"
-        f"{reset_url}\n\n"
-        "If you didn’t request this, you can ignore this email.\n\n"
-        "Best regards,\nYour Support Team"
-    )
+    await session.flush()
 
-    await send_email(subject=subject, to_email=user.email, body=body)
+    # Sent by the job worker, and only if this transaction commits. The payload only names the
+    # token: the link is built by the handler, so it never sits in the job table
+    await enqueue(session, JOB_SEND_RESET_EMAIL, {"token_id": str(reset_token.id)}, priority=PRIORITY_HIGH)
     # Mark reset as requested
     await mark_reset_requested(normalized_email)
     return {"message": "Reset token sent to your email"}
@@ -97,7 +87,7 @@ async def reset_user_password(token: str, new_password: str, session: AsyncSessi
     # Delete all reset tokens for this user
     await session.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == user.id))# type: ignore
 
-    await session.commit()
+    await session.flush()
     return {"message": "Password reset successful"}
 
 async def change_password_after_reset(new_password: str,current_user: User, session: AsyncSession):
@@ -107,7 +97,7 @@ async def change_password_after_reset(new_password: str,current_user: User, sess
     current_user.must_change_password = False
     # Delete all reset tokens for this user
     await session.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == user.id))# type: ignore
-    await session.commit()
+    await session.flush()
     return {"message": "Password reset successful"}
 
 async def get_user_by_reset_token(token: str, session: AsyncSession) -> User | None:
@@ -141,20 +131,9 @@ async def perform_admin_password_reset(user_id: UUID, current_user: User,session
     user.hashed_password = hash_password(one_time_password)
     user.must_change_password = True
 
-    await session.commit()
-
-    # Send email notification
-    await send_email(
-        subject="Your password was reset by an admin",
-        to_email=str(user.email),
-        body=(
-            f"Hello {user.full_name},\n\n"
-            "Your account password has been reset by an administrator.\n"
-            f"Your new one-time password is: {one_time_password}\n\n"
-            "You must change your password after logging in.\n\n"
-            "Best regards,\n"
-            "Your CMS Team"
-        )
-    )
+    await session.flush()
+
+    # Queue email notification; the handler adds the one-time password to the body
+    await enqueue(session, JOB_SEND_ADMIN_RESET_EMAIL, {"user_id": str(user.id)}, priority=PRIORITY_HIGH)
 
     return {"message": f"Password for user {user.email} reset successfully."}
\ No newline at end of file
@@ -1,38 +1,56 @@
 #app/crud/branch.py
-from typing import List
-from uuid import UUID
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple, Any
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import select, Select, update, delete, values, column, case, exists, any_, bindparam, func, String, Boolean
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import HTTPException, status
 
+from app.crud.statements import BRANCH_BY_ID
 from app.models.branch import Branch
 from app.models.user import User
 from app.models.user_branch_link import UserBranchLink
-from app.schemas.branch import BranchCreate, BranchUpdate
+from app.schemas.branch import BranchCreate, BranchUpdate, BranchSort, BranchBulkUpdate, BulkMode, \
+    BranchBulkCreateResult, BranchBulkUpdateResult, BranchBulkDeleteResult
+from app.services.list_render import json_page
+from app.services.pagination import decode_cursor, encode_cursor, keyset_condition, escape_like
+from app.services.search import normalize_query, search_page_query, split_page
 
 
 # CRUD operations for Branch model
 
+# Every write announces the changed ids on this channel; each worker's branch cache re-reads them.
+# NOTIFY is transactional, so listeners hear about a change only once it is committed.
+BRANCH_CHANNEL = "branch_changes"
+BRANCH_RELOAD_ALL = "*"
+MAX_NOTIFY_IDS = 100  # NOTIFY payloads are capped at 8000 bytes; bigger changes ask for a full reload
+
+async def publish_branch_changes(session: AsyncSession, branch_ids: List[UUID]) -> None:
+    if not branch_ids:
+        return
+    payload = BRANCH_RELOAD_ALL if len(branch_ids) > MAX_NOTIFY_IDS else ",".join(map(str, branch_ids))
+    await session.execute(select(func.pg_notify(BRANCH_CHANNEL, payload)))
+
 # Create a new branch
 async def create_branch(session: AsyncSession, branch_in: BranchCreate, current_user: User) -> Branch:
     try:
         branch = Branch(**branch_in.model_dump())
         branch.created_by_id = current_user.id
         session.add(branch)
-        await session.commit()
+        await session.flush()
         await session.refresh(branch)
+        await publish_branch_changes(session, [branch.id])
         return branch
     except IntegrityError as e:
-        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Branch creation failed due to integrity error"
         ) from e
     except SQLAlchemyError as e:
-        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error during branch creation"
@@ -40,9 +58,7 @@ async def create_branch(session: AsyncSession, branch_in: BranchCreate, current_
 # Get a branch by its ID
 async def get_branch_by_id(session: AsyncSession, branch_id: UUID) -> Branch:
     try:
-        result = await session.execute(
-            select(Branch).where(Branch.id == branch_id)
-        )
+        result = await session.execute(BRANCH_BY_ID, {"branch_id": branch_id})
         branch = result.scalar_one_or_none()
         if not branch:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Branch not found")
@@ -62,6 +78,149 @@ async def get_all_branches(session: AsyncSession) -> List[Branch]:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error during retrieving branches"
         ) from e
+# Columns the branch list can be ordered by; each one is backed by an index
+BRANCH_SORT_COLUMNS = {
+    "name": (Branch.name, str),
+    "created_at": (Branch.created_at, datetime.fromisoformat),
+}
+BRANCH_READ_COLUMNS = (Branch.id, Branch.name, Branch.description, Branch.created_at, Branch.updated_at, Branch.created_by_id)
+BRANCH_SUMMARY_COLUMNS = (Branch.id, Branch.name)
+
+def branch_list_filters(name_prefix: Optional[str] = None, created_by_id: Optional[UUID] = None) -> list:
+    """WHERE conditions shared by the branch list and its version probe"""
+    conditions = []
+    if name_prefix:
+        conditions.append(Branch.name.like(escape_like(name_prefix) + "%", escape="\\"))
+    if created_by_id is not None:
+        conditions.append(Branch.created_by_id == created_by_id)
+    return conditions
+
+# Cheap version of a branch list for ETags: (row count, latest updated_at) over the filtered set
+async def get_branches_version(
+    session: AsyncSession,
+    name_prefix: Optional[str] = None,
+    created_by_id: Optional[UUID] = None,
+) -> Tuple[int, Optional[datetime]]:
+    stmt = select(func.count(), func.max(Branch.updated_at)).where(*branch_list_filters(name_prefix, created_by_id))
+    try:
+        count, last_updated = (await session.execute(stmt)).one()
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during retrieving branches"
+        ) from e
+    return count, last_updated
+
+def _branches_page_query(
+    limit: int,
+    cursor: Optional[str],
+    name_prefix: Optional[str],
+    created_by_id: Optional[UUID],
+    sort: BranchSort,
+    summary: bool,
+) -> Tuple[Select, str, tuple]:
+    """Page statement fetching limit + 1 rows, the sort key name and the response columns"""
+    descending = sort.value.startswith("-")
+    sort_key = sort.value.lstrip("-")
+    sort_column, parse_value = BRANCH_SORT_COLUMNS[sort_key]
+
+    columns = BRANCH_SUMMARY_COLUMNS if summary else BRANCH_READ_COLUMNS
+    selected = columns if sort_column in columns else (*columns, sort_column)
+    stmt = select(*selected).where(*branch_list_filters(name_prefix, created_by_id))
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, 2)
+        try:
+            position = (parse_value(last_value), UUID(last_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        stmt = stmt.where(keyset_condition((sort_column, Branch.id), position, descending))
+
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), Branch.id.desc())
+    else:
+        stmt = stmt.order_by(sort_column, Branch.id)
+    # Fetch one extra row to know whether another page exists
+    return stmt.limit(limit + 1), sort_key, columns
+
+# Get one page of branches using keyset (cursor) pagination
+async def get_branches_page(
+    session: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    created_by_id: Optional[UUID] = None,
+    sort: BranchSort = BranchSort.name,
+    summary: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """Returns (rows, next_cursor). Rows are column projections, so no relationships are loaded"""
+    stmt, sort_key, _ = _branches_page_query(limit, cursor, name_prefix, created_by_id, sort, summary)
+    try:
+        rows = list((await session.execute(stmt)).all())
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during retrieving branches"
+        ) from e
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_key), last.id)
+    return rows, next_cursor
+
+# Same page as get_branches_page, rendered to a JSON array by Postgres: returns (body, next_cursor)
+async def get_branches_page_json(
+    session: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    created_by_id: Optional[UUID] = None,
+    sort: BranchSort = BranchSort.name,
+    summary: bool = False,
+) -> Tuple[str, Optional[str]]:
+    stmt, sort_key, columns = _branches_page_query(limit, cursor, name_prefix, created_by_id, sort, summary)
+    page = stmt.subquery("page")
+    sort_value = page.c[sort_key]
+    order = (sort_value.desc(), page.c.id.desc()) if sort.value.startswith("-") else (sort_value, page.c.id)
+    numbered = select(page, func.row_number().over(order_by=order).label("position")).subquery("numbered")
+    last_row = numbered.c.position == limit
+    stmt = select(
+        json_page([numbered.c[column.key] for column in columns], numbered.c.position, where=numbered.c.position <= limit),
+        func.count(),
+        # Cursor key of the last row on this page; only needed when the extra row exists
+        func.array_agg(numbered.c[sort_key]).filter(last_row),
+        func.array_agg(numbered.c.id).filter(last_row),
+    )
+    try:
+        body, fetched, last_values, last_ids = (await session.execute(stmt)).one()
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during retrieving branches"
+        ) from e
+    next_cursor = encode_cursor(last_values[0], last_ids[0]) if fetched > limit else None
+    return body, next_cursor
+
+# Autocomplete over branch names: returns (rows, next_cursor)
+async def search_branches(
+    session: AsyncSession,
+    q: str,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    summary: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    columns = BRANCH_SUMMARY_COLUMNS if summary else BRANCH_READ_COLUMNS
+    stmt = search_page_query(select(*columns), normalize_query(q), (func.lower(Branch.name),), Branch.id, limit, cursor)
+    try:
+        rows = list((await session.execute(stmt)).all())
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during branch search"
+        ) from e
+    return split_page(rows, limit)
+
 # Update an existing branch
 async def update_branch(session: AsyncSession, branch_id: UUID, branch_in: BranchUpdate) -> Branch:
     try:
@@ -70,17 +229,16 @@ async def update_branch(session: AsyncSession, branch_id: UUID, branch_in: Branc
         for key, value in branch_data.items():
             setattr(branch, key, value)
         session.add(branch)
-        await session.commit()
+        await session.flush()
         await session.refresh(branch)
+        await publish_branch_changes(session, [branch.id])
         return branch
     except IntegrityError as e:
-        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Branch update failed due to integrity error"
         ) from e
     except SQLAlchemyError as e:
-        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error during branch update"
@@ -88,28 +246,157 @@ async def update_branch(session: AsyncSession, branch_id: UUID, branch_in: Branc
 # Delete a branch
 async def delete_branch(session: AsyncSession, branch_id: UUID) -> None:
     try:
-        branch = await get_branch_by_id(session, branch_id)
-
-        # Check for linked users
-        result = await session.execute(
-            select(UserBranchLink).where(UserBranchLink.branch_id == branch_id)
-        )
-        if result.first():
+        # Neither the branch nor its links are loaded: their eager relationships would pull in every member
+        linked = await session.execute(select(exists().where(UserBranchLink.branch_id == branch_id)))
+        if linked.scalar():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot delete branch with linked users"
             )
 
-        await session.delete(branch)
-        await session.commit()
+        deleted = await session.execute(delete(Branch).where(Branch.id == branch_id).returning(Branch.id))
+        if deleted.first() is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Branch not found")
+        await publish_branch_changes(session, [branch_id])
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Branch deletion failed due to integrity error"
+        ) from e
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during branch deletion"
+        ) from e
+
+# Bulk operations: one statement per batch instead of one round trip and commit per branch
+
+# Create many branches with a single multi-row INSERT; existing names are reported, not raised
+async def create_branches(session: AsyncSession, branches_in: List[BranchCreate], current_user: User) -> BranchBulkCreateResult:
+    if not branches_in:
+        return BranchBulkCreateResult(created=[], conflicts=[])
+    now = datetime.now(timezone.utc)
+    rows = [
+        {**branch_in.model_dump(), "id": uuid4(), "created_at": now, "updated_at": now, "created_by_id": current_user.id}
+        for branch_in in branches_in
+    ]
+    stmt = (
+        pg_insert(Branch)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[Branch.name])
+        .returning(*BRANCH_READ_COLUMNS)
+    )
+    try:
+        created = list((await session.execute(stmt)).all())
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Branch creation failed due to integrity error"
+        ) from e
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during branch creation"
+        ) from e
+
+    await publish_branch_changes(session, [row.id for row in created])
+    created_ids = {row.id for row in created}
+    conflicts = [row["name"] for row in rows if row["id"] not in created_ids]
+    return BranchBulkCreateResult(created=created, conflicts=conflicts)
+
+# Apply many partial updates with one UPDATE ... FROM (VALUES ...)
+async def update_branches(session: AsyncSession, updates: List[BranchBulkUpdate]) -> BranchBulkUpdateResult:
+    if not updates:
+        return BranchBulkUpdateResult(updated=[], not_found=[])
+    data = []
+    for branch_update in updates:
+        fields = branch_update.model_dump(exclude_unset=True, exclude={"id"})
+        data.append((
+            branch_update.id,
+            fields.get("name"), "name" in fields and fields["name"] is not None,
+            fields.get("description"), "description" in fields,
+        ))
+    changes = values(
+        column("id", PG_UUID(as_uuid=True)),
+        column("name", String),
+        column("set_name", Boolean),
+        column("description", String),
+        column("set_description", Boolean),
+        name="changes",
+    ).data(data)
+    stmt = (
+        update(Branch)
+        .where(Branch.id == changes.c.id)
+        .values(
+            name=case((changes.c.set_name, changes.c.name), else_=Branch.name),
+            description=case((changes.c.set_description, changes.c.description), else_=Branch.description),
+            updated_at=func.now(),
+        )
+        .returning(*BRANCH_READ_COLUMNS)
+    )
+    try:
+        updated = list((await session.execute(stmt)).all())
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Branch update failed due to integrity error"
+        ) from e
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during branch update"
+        ) from e
+
+    await publish_branch_changes(session, [row.id for row in updated])
+    updated_ids = {row.id for row in updated}
+    not_found = list(dict.fromkeys(u.id for u in updates if u.id not in updated_ids))
+    return BranchBulkUpdateResult(updated=updated, not_found=not_found)
+
+# Delete many branches; the linked-user check for the whole set is one anti-join
+async def delete_branches(session: AsyncSession, branch_ids: List[UUID], mode: BulkMode = BulkMode.atomic) -> BranchBulkDeleteResult:
+    requested = list(dict.fromkeys(branch_ids))
+    if not requested:
+        return BranchBulkDeleteResult(deleted=[], not_found=[], linked=[])
+    ids = bindparam("branch_ids", value=requested, type_=ARRAY(PG_UUID(as_uuid=True)))
+    stmt = (
+        delete(Branch)
+        .where(
+            Branch.id == any_(ids),
+            ~exists().where(UserBranchLink.branch_id == Branch.id),
+        )
+        .returning(Branch.id)
+    )
+    try:
+        deleted = set((await session.execute(stmt)).scalars())
+        await publish_branch_changes(session, list(deleted))
+        remaining = [branch_id for branch_id in requested if branch_id not in deleted]
+        # Only when something was skipped: tell linked branches apart from missing ones
+        linked = set()
+        if remaining:
+            linked = set((await session.execute(
+                select(Branch.id).where(Branch.id == any_(bindparam("remaining", value=remaining, type_=ARRAY(PG_UUID(as_uuid=True)))))
+            )).scalars())
+        result = BranchBulkDeleteResult(
+            deleted=[branch_id for branch_id in requested if branch_id in deleted],
+            not_found=[branch_id for branch_id in remaining if branch_id not in linked],
+            linked=[branch_id for branch_id in remaining if branch_id in linked],
+        )
+        if remaining and mode == BulkMode.atomic:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "No branches were deleted",
+                    "not_found": [str(branch_id) for branch_id in result.not_found],
+                    "linked": [str(branch_id) for branch_id in result.linked],
+                },
+            )
+        return result
     except IntegrityError as e:
-        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Branch deletion failed due to integrity error"
         ) from e
     except SQLAlchemyError as e:
-        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error during branch deletion"
@@ -0,0 +1,34 @@
+# app/crud/statements.py
+# Prebuilt statements for the hottest point lookups. They are built once at import, so a call
+# skips select()/options() construction and reuses the memoized SQLAlchemy cache key; the SQL
+# text is identical on every call, so asyncpg's per-connection prepared statement cache hits too.
+# Execute with the bind values: session.execute(USER_BY_ID, {"user_id": user_id})
+from sqlalchemy import bindparam, select, true
+from sqlalchemy.orm import selectinload
+
+from app.models.branch import Branch
+from app.models.user import User
+from app.models.user_branch_link import UserBranchLink
+
+# User with branch links and their branches, as get_current_user and get_user_by_id return it
+USER_BY_ID = (
+    select(User)
+    .where(User.id == bindparam("user_id"))
+    .options(selectinload(User.user_branch_links).selectinload(UserBranchLink.branch))
+)
+
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+# Just what the ETag check needs: identity, permission inputs and version columns
+USER_VERSION_BY_ID = select(
+    User.id, User.role, User.created_by_id, User.updated_at, User.last_login
+).where(User.id == bindparam("user_id"))
+
+USER_EXISTS = select(true()).where(User.id == bindparam("user_id"))
+
+BRANCH_BY_ID = select(Branch).where(Branch.id == bindparam("branch_id"))
+
+USER_IN_BRANCH = select(true()).where(
+    UserBranchLink.user_id == bindparam("user_id"),
+    UserBranchLink.branch_id == bindparam("branch_id"),
+)
@@ -1,40 +1,53 @@
 # App/crud/user.py
 from datetime import datetime, timezone
-from typing import Optional, List
+from typing import Optional, List, Tuple, Any
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import select, Select, func, literal, any_, bindparam, update
 from fastapi import HTTPException, UploadFile
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, noload
 
-from app.crud.user_branch_link import add_user_to_branch, remove_all_branches_for_user, get_branches_for_user, \
-    remove_user_from_branch
+from app.crud.branch import publish_branch_changes
+from app.crud.statements import USER_BY_ID, USER_BY_EMAIL, USER_VERSION_BY_ID, USER_EXISTS
+from app.crud.user_branch_link import remove_all_branches_for_user, sync_user_branches, UUID_ARRAY
+from app.models.branch import Branch
 from app.models.user import User
 from app.models.user_branch_link import UserBranchLink
 from app.models.user_role import UserRole
-from app.schemas.user import UserCreate, UserUpdate, UserUpdateBase
+from app.schemas.common import CountMode
+from app.schemas.user import UserCreate, UserUpdate, UserUpdateBase, UserRead
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
 from app.core.security import hash_password
 from app.services.image_service import process_user_profile_image_upload
 from fastapi import status
-from app.services.permissions import get_user_visibility_condition, get_role_order, user_has_permission
+from app.services import policy
+from app.services.permissions import get_user_visibility_condition, get_role_order
+from app.services.list_render import json_page
+from app.services.row_count import count_rows
+from app.services.search import normalize_query, search_page_query, split_page
 
+settings = get_settings()
 
 
 
+
+def build_users_query(current_user: User, role: Optional[UserRole] = None, is_active: Optional[bool] = None) -> Select:
+    """Base user list query: visibility rules plus optional filters, without ordering or paging"""
+    stmt = select(User).where(get_user_visibility_condition(current_user))
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    return stmt
+
 async def get_users(session: AsyncSession,current_user: User,offset: int = 0,limit: int = 20,role: Optional[UserRole] = None,is_active: Optional[bool] = None,) -> List[User]:
     try:
-        stmt = select(User).where(
-            get_user_visibility_condition(current_user)
-        ).options(selectinload(User.user_branch_links).selectinload(UserBranchLink.branch))
-        # Apply optional filters
-        if role is not None:
-            stmt = stmt.where(User.role == role)
-        if is_active is not None:
-            stmt = stmt.where(User.is_active == is_active)
-
-            # Order and paginate
-        stmt = stmt.order_by(get_role_order()).offset(offset).limit(limit)
+        stmt = build_users_query(current_user, role, is_active).options(
+            selectinload(User.user_branch_links).selectinload(UserBranchLink.branch)
+        )
+        # Order and paginate; id breaks ties so pages do not overlap
+        stmt = stmt.order_by(get_role_order(), User.id).offset(offset).limit(limit)
 
         result = await session.execute(stmt)
         users = result.scalars().all()
@@ -48,36 +61,182 @@ async def get_users(session: AsyncSession,current_user: User,offset: int = 0,lim
             detail="Database error during user retrieval"
         ) from e
 
-async def get_user_by_id(session: AsyncSession,current_user: User, user_id: UUID) -> Optional[User]:
-     try:
-        # Fetch the requested user
-        stmt = (
-            select(User)
-            .where(User.id == user_id)
-            .options(selectinload(User.user_branch_links).selectinload(UserBranchLink.branch))
+async def count_users(session: AsyncSession,current_user: User,mode: CountMode,role: Optional[UserRole] = None,is_active: Optional[bool] = None,) -> Optional[int]:
+    try:
+        stmt = build_users_query(current_user, role, is_active)
+        unfiltered = current_user.role == UserRole.admin and role is None and is_active is None
+        return await count_rows(
+            session,
+            stmt,
+            mode,
+            unfiltered_table=User.__tablename__ if unfiltered else None,
         )
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during user count"
+        ) from e
 
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with ID {user_id} not found"
-            )
-
-        # Apply visibility rules
-        if not user_has_permission(current_user, user):
-            raise HTTPException(
-                status_code=403,
-                detail="Unauthorized access"
-            )
-        return user
-     except SQLAlchemyError as e:
+# Cheap version of a user list for ETags: (row count, latest updated_at, latest last_login) over the visible, filtered set
+async def get_users_version(session: AsyncSession,current_user: User,role: Optional[UserRole] = None,is_active: Optional[bool] = None,) -> tuple:
+    stmt = build_users_query(current_user, role, is_active).with_only_columns(
+        func.count(), func.max(User.updated_at), func.max(User.last_login)
+    )
+    try:
+        return tuple((await session.execute(stmt)).one())
+    except SQLAlchemyError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error during user retrieval"
         ) from e
 
+# Version columns of one user, with the same 404/403 outcomes as get_user_by_id but no relationship loads
+async def get_user_version(session: AsyncSession,current_user: User, user_id: UUID):
+    return await _get_visible_user(session, current_user, user_id, USER_VERSION_BY_ID, lambda result: result.one_or_none())
+
+async def _get_visible_user(session: AsyncSession, current_user: User, user_id: UUID, stmt: Select, fetch):
+    """Runs a prebuilt by-id statement with the viewer's visibility in its WHERE clause; only a miss costs a second query"""
+    stmt, params = policy.restrict(stmt, current_user, policy.VIEW)
+    try:
+        found = fetch(await session.execute(stmt, {"user_id": user_id, **params}))
+        if found is not None:
+            return found
+        # Hidden or absent: tell them apart, as before, with an index-only probe
+        exists = (await session.execute(USER_EXISTS, {"user_id": user_id})).first() is not None
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during user retrieval"
+        ) from e
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_id} not found"
+        )
+    raise HTTPException(
+        status_code=403,
+        detail="Unauthorized access"
+    )
+
+def branch_ids_column():
+    """Correlated array of the user's branch ids ('{}' when none), the SQL twin of User.branch_ids"""
+    return (
+        select(func.coalesce(func.array_agg(UserBranchLink.branch_id), literal([], UUID_ARRAY)))
+        .where(UserBranchLink.user_id == User.id)
+        # Correlate on user only, so it keeps its own FROM when the outer query also joins user_branch_link
+        .correlate(User)
+        .scalar_subquery()
+        .label("branch_ids")
+    )
+
+def user_read_columns() -> tuple:
+    """The UserRead fields as columns"""
+    return (
+        User.id, User.email, User.full_name, User.role, User.is_active, branch_ids_column(),
+        User.created_at, User.updated_at, User.last_login, User.user_pic,
+    )
+
+# Many users by id in one statement; visibility is evaluated in SQL per row
+async def get_users_by_ids(session: AsyncSession, current_user: User, user_ids: List[UUID]) -> Tuple[List[UserRead], List[UUID], List[UUID]]:
+    """(visible users in request order, ids that exist but are hidden, ids that do not exist)"""
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > settings.USER_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.USER_BATCH_MAX_IDS} ids per request"
+        )
+    stmt = select(
+        *user_read_columns(), get_user_visibility_condition(current_user).label("visible")
+    ).where(User.id == any_(bindparam("user_ids", value=user_ids, type_=UUID_ARRAY)))
+    try:
+        rows = {row.id: row for row in (await session.execute(stmt)).all()}
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during user retrieval"
+        ) from e
+    users, forbidden, missing = [], [], []
+    for user_id in user_ids:
+        row = rows.get(user_id)
+        if row is None:
+            missing.append(user_id)
+        elif row.visible:
+            users.append(UserRead.model_validate(row))
+        else:
+            forbidden.append(user_id)
+    return users, forbidden, missing
+
+# Autocomplete over email and full name among the users the viewer can see
+async def search_users(session: AsyncSession, current_user: User, q: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    """Returns (rows, next_cursor); rows carry the UserRead columns"""
+    stmt = search_page_query(
+        select(*user_read_columns()).where(get_user_visibility_condition(current_user)),
+        normalize_query(q),
+        (User.email, func.lower(User.full_name)),
+        User.id,
+        limit,
+        cursor,
+    )
+    try:
+        rows = list((await session.execute(stmt)).all())
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during user search"
+        ) from e
+    return split_page(rows, limit)
+
+def build_users_export_query(current_user: User) -> Select:
+    """Visible users with their branch ids as plain columns, in table order (no sort) for streaming"""
+    return select(
+        User.id, User.email, User.full_name, User.role, User.is_active, User.must_change_password,
+        User.last_login, User.created_at, User.updated_at, User.user_pic, User.created_by_id,
+        branch_ids_column(),
+    ).where(get_user_visibility_condition(current_user))
+
+# Same page as get_users, rendered to a UserRead JSON array by Postgres in one statement
+async def get_users_page_json(session: AsyncSession,current_user: User,offset: int = 0,limit: int = 20,role: Optional[UserRole] = None,is_active: Optional[bool] = None,) -> str:
+    page = (
+        build_users_query(current_user, role, is_active)
+        .with_only_columns(*user_read_columns(), get_role_order().label("role_order"))
+        .order_by(get_role_order(), User.id)
+        .offset(offset)
+        .limit(limit)
+        .subquery("page")
+    )
+    fields = [page.c[column.key] for column in user_read_columns()]
+    stmt = select(json_page(fields, page.c.role_order, page.c.id))
+    try:
+        body = (await session.execute(stmt)).scalar_one()
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during user retrieval"
+        ) from e
+    if body == "[]":
+        raise HTTPException(status_code=404, detail="No users found")
+    return body
+
+# Members of a branch as a UserRead JSON array rendered by Postgres
+async def get_users_in_branch_json(session: AsyncSession, branch_id: UUID) -> str:
+    members = (
+        select(*user_read_columns())
+        .join(UserBranchLink, UserBranchLink.user_id == User.id)
+        .where(UserBranchLink.branch_id == branch_id)
+        .subquery("members")
+    )
+    fields = [members.c[column.key] for column in user_read_columns()]
+    try:
+        return (await session.execute(select(json_page(fields, members.c.id)))).scalar_one()
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during user retrieval"
+        ) from e
+
+async def get_user_by_id(session: AsyncSession,current_user: User, user_id: UUID) -> Optional[User]:
+    return await _get_visible_user(session, current_user, user_id, USER_BY_ID, lambda result: result.scalar_one_or_none())
+
 async def create_user(session: AsyncSession, user_create: UserCreate ,created_by_id: Optional[UUID] = None ) -> User:
     try:
         normalized_email = str(user_create.email).lower().strip()  # normalize email
@@ -93,18 +252,15 @@ async def create_user(session: AsyncSession, user_create: UserCreate ,created_by
             created_by_id=created_by_id,  # 🟢 new line
         )
         session.add(db_user)
-        await session.commit()
-        await session.refresh(db_user, ["user_branch_links"])
+        await session.flush()
         # Handle branch links if provided
         if user_create.branch_ids:
-            for branch_id in user_create.branch_ids:
-                await add_user_to_branch(session, db_user.id, branch_id)
+            await sync_user_branches(session, db_user.id, user_create.branch_ids)
+        await session.refresh(db_user, ["user_branch_links"])
         return db_user
     except IntegrityError as e:
-        await session.rollback()
         raise HTTPException(status_code=400, detail="Create failed due to a constraint violation.") from e
     except SQLAlchemyError as e:
-        await session.rollback()
         raise HTTPException(status_code=500, detail="Database error during user creation") from e
 
 
@@ -136,38 +292,28 @@ async def update_user(session: AsyncSession,db_user: User,user_update: UserUpdat
             elif key != "password":
                 setattr(db_user, key, value)
 
-        # Process image if uploaded
+        # Stage the image if uploaded; user_pic is switched by the resize job
         if file:
-            filename = await process_user_profile_image_upload(file, db_user, session)
-            db_user.user_pic = filename
+            await process_user_profile_image_upload(file, db_user, session)
         db_user.updated_at = datetime.now(timezone.utc)
         # Sync branch links if branch_ids provided
         if branch_ids is not None:
-            current_branches = await get_branches_for_user(session, db_user.id)
-            current_branch_ids = {branch.id for branch in current_branches}
-            new_branch_ids = set(branch_ids)
-
-            for branch_id in new_branch_ids - current_branch_ids:
-                await add_user_to_branch(session, db_user.id, branch_id)
-            for branch_id in current_branch_ids - new_branch_ids:
-                await remove_user_from_branch(session, db_user.id, branch_id)
+            await sync_user_branches(session, db_user.id, branch_ids)
         session.add(db_user)
-        await session.commit()
+        await session.flush()
         await session.refresh(db_user, ["user_branch_links"])
 
 
         return db_user
     except IntegrityError as e:
-        await session.rollback()
         raise HTTPException(status_code=400, detail="Update failed due to a constraint violation.") from e
     except SQLAlchemyError as e:
-        await session.rollback()
         raise HTTPException(status_code=500, detail="Database error during user update") from e
 
 async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]:
     try:
         normalized_email = email.lower().strip()
-        result = await session.execute(select(User).where(User.email == normalized_email))
+        result = await session.execute(USER_BY_EMAIL, {"email": normalized_email})
         return result.scalar_one_or_none()
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail="Database error during email lookup") from e
@@ -181,6 +327,10 @@ async def delete_user_by_id(session: AsyncSession, current_user: User, user_id:
             select(User)
             .where(User.id == user_id)
             .where(visibility_condition)
+            # The links are deleted in bulk below; loaded ones would make the delete try to null their keys,
+            # so leave them unloaded, also on an instance the session already holds
+            .options(noload(User.user_branch_links), noload(User.branches))
+            .execution_options(populate_existing=True)
         )
 
         # Execute query
@@ -193,12 +343,21 @@ async def delete_user_by_id(session: AsyncSession, current_user: User, user_id:
 
         # After fetching user and before deleting user:
         await remove_all_branches_for_user(session, user_id)  # delete all links
+        # ON DELETE SET NULL would clear created_by_id silently; doing it here bumps updated_at
+        # (the branch ETags) and tells the branch caches
+        orphaned = (await session.execute(
+            update(Branch)
+            .where(Branch.created_by_id == user_id)
+            .values(created_by_id=None, updated_at=func.now())
+            .returning(Branch.id)
+            .execution_options(synchronize_session=False)
+        )).scalars().all()
+        await publish_branch_changes(session, list(orphaned))
         await session.delete(user)
-        await session.commit()
+        await session.flush()
 
     except IntegrityError as e:
         # Handle constraint violations specifically
-        await session.rollback()
         raise HTTPException(
             status_code=409,
             detail="Cannot delete user due to related resources"
@@ -206,7 +365,6 @@ async def delete_user_by_id(session: AsyncSession, current_user: User, user_id:
 
     except SQLAlchemyError as e:
         # General database failures
-        await session.rollback()
         raise HTTPException(
             status_code=500,
             detail="Database error while deleting user"
@@ -219,15 +377,14 @@ async def set_user_active_status(session: AsyncSession,user_id: UUID,is_active:
             raise HTTPException(status_code=404, detail="User not found")
 
         user.is_active = is_active
+        user.updated_at = datetime.now(timezone.utc)
         session.add(user)
-        await session.commit()
+        await session.flush()
         await session.refresh(user)
         return user
     except IntegrityError as e:
-        await session.rollback()
         raise HTTPException(status_code=400, detail="Operation failed due to a constraint violation.") from e
     except SQLAlchemyError as e:
-        await session.rollback()
         raise HTTPException(status_code=500, detail="Database error during user update") from e
 
 async def deactivate_user_by_id(session: AsyncSession, user_id: UUID) -> User:
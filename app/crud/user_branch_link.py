@@ -1,61 +1,157 @@
 # app/crud/user_branch_link.py
-from typing import List
+from typing import List, Dict
 from uuid import UUID
 
-from sqlalchemy import delete
+from fastapi import HTTPException
+from sqlalchemy import delete, update, bindparam, all_, any_, exists, func, literal, column
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlalchemy import Select, select
+from sqlalchemy.orm import noload, selectinload
+from app.crud.statements import USER_IN_BRANCH
 from app.models.branch import Branch
 from app.models.user import User
 from app.models.user_branch_link import UserBranchLink
 
-# Add link between user and branch
-async def add_user_to_branch(session: AsyncSession, user_id: UUID, branch_id: UUID) -> UserBranchLink:
-    # Ensure link doesn't already exist
-    stmt = select(UserBranchLink).where(
-        UserBranchLink.user_id == user_id,
-        UserBranchLink.branch_id == branch_id
+UUID_ARRAY = ARRAY(PG_UUID(as_uuid=True))
+
+# branch_ids is part of the user representation, so membership changes bump the user's updated_at (its ETag version)
+async def touch_users(session: AsyncSession, user_ids) -> None:
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return
+    await session.execute(
+        update(User)
+        .where(User.id == any_(bindparam("touched_ids", value=user_ids, type_=UUID_ARRAY)))
+        .values(updated_at=func.now())
+        .execution_options(synchronize_session=False)
     )
-    existing = (await session.execute(stmt)).scalar_one_or_none()
-    if existing:
-        return existing  # Or raise an HTTPException if you want to prevent duplicates
 
-    link = UserBranchLink(user_id=user_id, branch_id=branch_id)
-    session.add(link)
-    await session.commit()
-    await session.refresh(link)
-    return link
-# Remove link between user and branch
-async def remove_user_from_branch(session: AsyncSession,user_id: UUID,branch_id: UUID) -> None:
-    stmt = select(UserBranchLink).where(
-        UserBranchLink.user_id == user_id,
-        UserBranchLink.branch_id == branch_id
+# Add link between user and branch; returns False if it already existed
+async def add_user_to_branch(session: AsyncSession, user_id: UUID, branch_id: UUID) -> bool:
+    # Single round trip: the RETURNING row is absent when the link was already there,
+    # which also makes concurrent adds of the same pair race-free
+    stmt = (
+        pg_insert(UserBranchLink)
+        .values(user_id=user_id, branch_id=branch_id)
+        .on_conflict_do_nothing()
+        .returning(UserBranchLink.user_id)
     )
-    result = await session.execute(stmt)
-    link = result.scalar_one_or_none()
-    if link:
-        await session.delete(link)
-        await session.commit()
+    try:
+        created = (await session.execute(stmt)).first() is not None
+    except IntegrityError as e:
+        raise HTTPException(status_code=404, detail="User or branch not found") from e
+    if created:
+        await touch_users(session, [user_id])
+    return created
+# Remove link between user and branch; returns False if there was nothing to remove
+async def remove_user_from_branch(session: AsyncSession,user_id: UUID,branch_id: UUID) -> bool:
+    stmt = (
+        delete(UserBranchLink)
+        .where(
+            UserBranchLink.user_id == user_id,
+            UserBranchLink.branch_id == branch_id
+        )
+        .returning(UserBranchLink.user_id)
+    )
+    removed = (await session.execute(stmt)).first() is not None
+    if removed:
+        await touch_users(session, [user_id])
+    return removed
 # Get all branches for a user
 async def get_branches_for_user(session: AsyncSession,user_id: UUID):
-    stmt = select(Branch).join(UserBranchLink).where(UserBranchLink.user_id == user_id)
+    # Plain branches: the default eager loads would fetch every member of each one
+    stmt = select(Branch).join(UserBranchLink).where(UserBranchLink.user_id == user_id).options(noload("*"))
     result = await session.execute(stmt)
     return result.scalars().all()
+# Ids of a user's branches, for callers that resolve branches from the branch cache
+async def get_branch_ids_for_user(session: AsyncSession, user_id: UUID) -> List[UUID]:
+    stmt = select(UserBranchLink.branch_id).where(UserBranchLink.user_id == user_id)
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
 # Get all users in a branch
 async def get_users_in_branch(session: AsyncSession, branch_id: UUID) -> List[User]:
-    stmt = select(User).join(UserBranchLink).where(UserBranchLink.branch_id == branch_id)
+    stmt = (
+        select(User)
+        .join(UserBranchLink)
+        .where(UserBranchLink.branch_id == branch_id)
+        # Only the links UserRead needs; the default eager loads would fetch every member's branches and their members
+        .options(selectinload(User.user_branch_links).noload("*"), noload("*"))
+    )
     result = await session.execute(stmt)
     return list(result.scalars().all())
 # Check if a user is in a specific branch
 async def is_user_in_branch(session: AsyncSession, user_id: UUID, branch_id: UUID) -> bool:
-    stmt = select(UserBranchLink).where(
-        UserBranchLink.user_id == user_id,
-        UserBranchLink.branch_id == branch_id
-    )
-    result = await session.execute(stmt)
-    return result.scalar_one_or_none() is not None
+    result = await session.execute(USER_IN_BRANCH, {"user_id": user_id, "branch_id": branch_id})
+    return result.first() is not None
 # Remove all branches for a user
 async def remove_all_branches_for_user(session: AsyncSession, user_id: UUID) -> None:
-    stmt = delete(UserBranchLink).where(UserBranchLink.user_id == user_id)
-    await session.execute(stmt)
-    await session.commit()
\ No newline at end of file
+    stmt = delete(UserBranchLink).where(UserBranchLink.user_id == user_id).returning(UserBranchLink.user_id)
+    removed = (await session.execute(stmt)).first() is not None
+    if removed:
+        await touch_users(session, [user_id])
+# Links whose user is visible to the viewer, for streaming export
+def build_links_export_query(visibility_condition) -> Select:
+    return (
+        select(UserBranchLink.user_id, UserBranchLink.branch_id)
+        .join(User, User.id == UserBranchLink.user_id)
+        .where(visibility_condition)
+    )
+# Make a user's memberships exactly branch_ids with one DELETE and one INSERT
+async def sync_user_branches(session: AsyncSession, user_id: UUID, branch_ids: List[UUID]) -> None:
+    ids = bindparam("branch_ids", value=list(dict.fromkeys(branch_ids)), type_=UUID_ARRAY)
+    removed = await session.execute(
+        delete(UserBranchLink).where(
+            UserBranchLink.user_id == user_id,
+            UserBranchLink.branch_id != all_(ids),
+        )
+    )
+    changed = removed.rowcount > 0
+    if branch_ids:
+        added = await session.execute(
+            pg_insert(UserBranchLink)
+            .from_select(
+                ["user_id", "branch_id"],
+                select(literal(user_id, PG_UUID(as_uuid=True)), func.unnest(ids)),
+            )
+            .on_conflict_do_nothing()
+        )
+        changed = changed or added.rowcount > 0
+    if changed:
+        await touch_users(session, [user_id])
+# Sync memberships for many users at once: {user_id: branch_ids}
+async def sync_branches_for_users(session: AsyncSession, memberships: Dict[UUID, List[UUID]]) -> None:
+    pair_users = [user_id for user_id, branch_ids in memberships.items() for _ in dict.fromkeys(branch_ids)]
+    pair_branches = [branch_id for branch_ids in memberships.values() for branch_id in dict.fromkeys(branch_ids)]
+    user_ids = bindparam("user_ids", value=list(memberships), type_=UUID_ARRAY)
+    pairs = func.unnest(
+        bindparam("pair_users", value=pair_users, type_=UUID_ARRAY),
+        bindparam("pair_branches", value=pair_branches, type_=UUID_ARRAY),
+    ).table_valued(
+        column("user_id", PG_UUID(as_uuid=True)),
+        column("branch_id", PG_UUID(as_uuid=True)),
+    ).render_derived(name="pairs", with_types=False)
+    try:
+        # Drop links of the listed users that are not in their new set
+        changed = set((await session.execute(
+            delete(UserBranchLink).where(
+                UserBranchLink.user_id == any_(user_ids),
+                ~exists().where(
+                    pairs.c.user_id == UserBranchLink.user_id,
+                    pairs.c.branch_id == UserBranchLink.branch_id,
+                ),
+            ).returning(UserBranchLink.user_id)
+        )).scalars())
+        if pair_users:
+            changed.update((await session.execute(
+                pg_insert(UserBranchLink)
+                .from_select(["user_id", "branch_id"], select(pairs.c.user_id, pairs.c.branch_id))
+                .on_conflict_do_nothing()
+                .returning(UserBranchLink.user_id)
+            )).scalars())
+        await touch_users(session, changed)
+    except IntegrityError as e:
+        raise HTTPException(status_code=400, detail="Sync failed: unknown user or branch id.") from e
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail="Database error during branch membership sync") from e
@@ -0,0 +1,283 @@
+# app/crud/user_import.py
+import codecs
+import csv
+import json
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Deque, List, Optional, Dict, Any
+from uuid import UUID, uuid4
+
+from asyncpg.exceptions import IntegrityConstraintViolationError, PostgresError
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import select, String, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.security import hash_passwords
+from app.models.branch import Branch
+from app.models.user import User
+from app.models.user_branch_link import UserBranchLink
+from app.schemas.user import UserCreate, UserImportError, UserImportReport
+from app.services.permissions import validate_user_creation_permissions
+
+settings = get_settings()
+
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_BRANCH_SEPARATOR = ";"  # same separator the CSV export writes
+
+USER_COPY_COLUMNS = [
+    "id", "email", "hashed_password", "full_name", "role", "is_active",
+    "must_change_password", "created_at", "updated_at", "created_by_id",
+]
+
+
+@dataclass
+class _ImportRow:
+    row: int
+    user: UserCreate
+    id: UUID
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Splits a streamed request body into decoded lines, endings kept, without buffering it whole"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+# Where the csv module's default dialect is after a character
+_FIELD_START, _UNQUOTED, _QUOTED, _QUOTE_IN_QUOTED = range(4)
+
+
+def _ends_in_quoted_field(line: str, in_quoted: bool) -> bool:
+    """Whether a quoted CSV field is still open after line, i.e. the record goes on past it"""
+    if not in_quoted and '"' not in line:
+        return False
+    state = _QUOTED if in_quoted else _FIELD_START
+    for char in line:
+        if state == _QUOTED:
+            if char == '"':
+                state = _QUOTE_IN_QUOTED
+        elif state == _QUOTE_IN_QUOTED:
+            # A doubled quote is a literal one; anything else closed the field
+            state = _QUOTED if char == '"' else _FIELD_START if char in ",\r\n" else _UNQUOTED
+        elif char in ",\r\n":
+            state = _FIELD_START
+        else:
+            # Quotes only open a field at its start; elsewhere they are plain characters
+            state = _QUOTED if state == _FIELD_START and char == '"' else _UNQUOTED
+    return state == _QUOTED
+
+
+class _LineFeed:
+    """Lines waiting for the csv reader; only ever holds whole records, so the reader never runs dry mid-record"""
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """One csv.reader over the whole body, so quoted fields may span lines; yields value lists or error strings"""
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    record_lines: List[str] = []
+    in_quoted = False
+    async for line in _iter_lines(chunks):
+        record_lines.append(line)
+        in_quoted = _ends_in_quoted_field(line, in_quoted)
+        if in_quoted:
+            continue
+        feed.lines.extend(record_lines)
+        record_lines.clear()
+        while feed.lines:
+            try:
+                yield next(reader)
+            except csv.Error as e:
+                yield f"Invalid CSV: {e}"
+    # An unterminated quoted field runs to the end of the body
+    feed.lines.extend(record_lines)
+    while feed.lines:
+        try:
+            yield next(reader)
+        except csv.Error as e:
+            yield f"Invalid CSV: {e}"
+
+
+async def _iter_records(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[Any]:
+    """Yields one dict per data row, or an error message string for unparsable rows"""
+    if content_type in NDJSON_CONTENT_TYPES:
+        async for line in _iter_lines(chunks):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield "Invalid JSON"
+                continue
+            yield record if isinstance(record, dict) else "Expected a JSON object"
+        return
+
+    header: Optional[List[str]] = None
+    async for values in _iter_csv_rows(chunks):
+        if isinstance(values, str):
+            yield values
+            continue
+        if not values or (len(values) == 1 and not values[0].strip()):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        record: Dict[str, Any] = {key: value for key, value in zip(header, values) if value != ""}
+        if "branch_ids" in record:
+            record["branch_ids"] = [v for v in record["branch_ids"].split(CSV_BRANCH_SEPARATOR) if v]
+        yield record
+
+
+def _validation_detail(error: ValidationError) -> str:
+    # Without the inputs: str(error) would echo the row's values, plaintext password included
+    return "; ".join(
+        f"{'.'.join(map(str, item['loc'])) or 'row'}: {item['msg']}"
+        for item in error.errors(include_input=False, include_url=False)
+    )
+
+
+async def import_users(
+    session: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    current_user: User,
+) -> UserImportReport:
+    """
+    Validates streamed CSV/NDJSON rows against UserCreate, then writes every valid
+    user and branch link with COPY in the request transaction. Invalid rows are
+    reported and skipped; they never abort the rest of the import.
+    """
+    if content_type not in CSV_CONTENT_TYPES | NDJSON_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload users as text/csv or application/x-ndjson",
+        )
+
+    errors: List[UserImportError] = []
+    rows: List[_ImportRow] = []
+    seen_emails: Dict[str, int] = {}
+    row_number = 0
+
+    async for record in _iter_records(chunks, content_type):
+        row_number += 1
+        if row_number > settings.USER_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Imports are limited to {settings.USER_IMPORT_MAX_ROWS} rows",
+            )
+        if isinstance(record, str):
+            errors.append(UserImportError(row=row_number, detail=record))
+            continue
+        # NDJSON rows can hold anything; only a string is worth echoing as the row's email
+        email = record.get("email") if isinstance(record.get("email"), str) else None
+        try:
+            user = UserCreate.model_validate(record)
+            validate_user_creation_permissions(current_user, user)
+        except ValidationError as e:
+            errors.append(UserImportError(row=row_number, email=email, detail=_validation_detail(e)))
+            continue
+        except HTTPException as e:
+            errors.append(UserImportError(row=row_number, email=email, detail=e.detail))
+            continue
+        if not isinstance(user.password, str):
+            errors.append(UserImportError(row=row_number, email=user.email, detail="Password is required"))
+            continue
+        if user.email in seen_emails:
+            errors.append(UserImportError(
+                row=row_number, email=user.email,
+                detail=f"Duplicate of row {seen_emails[user.email]}",
+            ))
+            continue
+        seen_emails[user.email] = row_number
+        rows.append(_ImportRow(row=row_number, user=user, id=uuid4()))
+
+    if not rows:
+        return UserImportReport(created=0, failed=len(errors), errors=errors)
+
+    try:
+        # Set-based checks: one query for existing emails, one for referenced branches.
+        # These also open the transaction on the connection the COPYs below reuse.
+        existing_emails = set((await session.execute(
+            select(User.email).where(User.email == any_(bindparam("emails", type_=ARRAY(String)))),
+            {"emails": list(seen_emails)},
+        )).scalars())
+        requested_branches = {branch_id for r in rows for branch_id in (r.user.branch_ids or [])}
+        known_branches = set()
+        if requested_branches:
+            known_branches = set((await session.execute(
+                select(Branch.id).where(Branch.id == any_(bindparam("ids", type_=ARRAY(PG_UUID(as_uuid=True))))),
+                {"ids": list(requested_branches)},
+            )).scalars())
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail="Database error during user import") from e
+
+    valid_rows: List[_ImportRow] = []
+    for r in rows:
+        if r.user.email in existing_emails:
+            errors.append(UserImportError(row=r.row, email=r.user.email, detail="Email already registered"))
+            continue
+        unknown = set(r.user.branch_ids or []) - known_branches
+        if unknown:
+            errors.append(UserImportError(
+                row=r.row, email=r.user.email,
+                detail=f"Unknown branch ids: {', '.join(sorted(map(str, unknown)))}",
+            ))
+            continue
+        valid_rows.append(r)
+
+    if valid_rows:
+        hashed = await hash_passwords([r.user.password for r in valid_rows])
+        now = datetime.now(timezone.utc)
+        user_records = [
+            (r.id, r.user.email, hashed_password, r.user.full_name, r.user.role.value,
+             r.user.is_active, False, now, now, current_user.id)
+            for r, hashed_password in zip(valid_rows, hashed)
+        ]
+        link_records = [
+            (r.id, branch_id)
+            for r in valid_rows
+            for branch_id in dict.fromkeys(r.user.branch_ids or [])
+        ]
+        try:
+            conn = await session.connection()
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.copy_records_to_table(User.__tablename__, records=user_records, columns=USER_COPY_COLUMNS)
+            if link_records:
+                await raw.copy_records_to_table(
+                    UserBranchLink.__tablename__, records=link_records, columns=["user_id", "branch_id"]
+                )
+        except IntegrityConstraintViolationError as e:
+            # A concurrent write claimed one of the emails between the check and the COPY
+            raise HTTPException(status_code=409, detail="Import failed due to a constraint violation.") from e
+        except (PostgresError, SQLAlchemyError) as e:
+            raise HTTPException(status_code=500, detail="Database error during user import") from e
+
+    errors.sort(key=lambda error: error.row)
+    return UserImportReport(created=len(valid_rows), failed=len(errors), errors=errors)
@@ -1,21 +1,63 @@
 # app/main.py
+import time
+_import_started = time.perf_counter()
+
+import asyncio
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
-from app.core.database import init_db
+from contextlib import asynccontextmanager, contextmanager
+from app.core.config import get_settings
+from app.core.database import init_db, check_schema_head, warm_pool
+from app.core.security import shutdown_hash_pool
 from app.routes.api import api_router
+from app.services import metrics
+from app.services.audit import audit_writer
+from app.services.last_login import last_login_buffer
+from app.services.branch_cache import start_branch_cache, stop_branch_cache
 from app.tasks.scheduler import start_scheduler, shutdown_scheduler
 
+settings = get_settings()
+_import_seconds = time.perf_counter() - _import_started
+
+
+@contextmanager
+def startup_phase(timings: dict, name: str):
+    started = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - started
+    metrics.set_gauge(f"startup.{name}_seconds", timings[name])
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # ✅ Startup logic
-    await init_db()
-    start_scheduler()
+    timings = {"imports": _import_seconds}
+    with startup_phase(timings, "schema"):
+        if settings.FAST_STARTUP:
+            await check_schema_head()  # Alembic owns the schema; just refuse to run against the wrong one
+        else:
+            await init_db()
+    with startup_phase(timings, "pool"):
+        await warm_pool(settings.DB_POOL_WARM_CONNECTIONS)
+    with startup_phase(timings, "background"):
+        audit_writer.start()
+        last_login_buffer.start()
+        await start_branch_cache()
+    with startup_phase(timings, "scheduler"):
+        if settings.FAST_STARTUP:
+            asyncio.get_running_loop().call_soon(start_scheduler)  # APScheduler import off the startup path
+        else:
+            start_scheduler()
+    print("[Startup] " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+          + f", total {sum(timings.values()) * 1000:.0f}ms")
 
     yield  # 👈 Only one yield allowed!
 
     # ✅ Shutdown logic
-    shutdown_scheduler()
+    await shutdown_scheduler()
+    await stop_branch_cache()
+    await audit_writer.stop()
+    await last_login_buffer.stop()
+    shutdown_hash_pool()
 app = FastAPI(title="CMS Backend", lifespan=lifespan)
 # Routers
 app.include_router(api_router)  # just include the master router here
@@ -26,3 +68,8 @@ async def root():
     return {"message": "CMS is running"}
 
 
+@app.get("/metrics")
+async def read_metrics():
+    return metrics.snapshot()
+
+
@@ -0,0 +1,30 @@
+# app/models/audit_log.py
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import BigInteger, DateTime, Identity, Index, String
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class AuditLog(Base):
+    """Administrative actions, appended in batches by app/services/audit.py. Ids are plain columns, not
+    foreign keys, so entries outlive the users and branches they mention."""
+    __tablename__ = "audit_log"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    occurred_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    actor_id: Mapped[Optional[UUID]] = mapped_column(PG_UUID(as_uuid=True), nullable=True)
+    action: Mapped[str] = mapped_column(String, nullable=False)
+    target_id: Mapped[Optional[UUID]] = mapped_column(PG_UUID(as_uuid=True), nullable=True)
+    details: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False, default=dict)
+
+
+# "What happened to this user" and "what did this admin do", newest first
+Index("ix_audit_log_target_id_occurred_at", AuditLog.target_id, AuditLog.occurred_at.desc())
+Index("ix_audit_log_actor_id_occurred_at", AuditLog.actor_id, AuditLog.occurred_at.desc())
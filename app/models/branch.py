@@ -4,7 +4,7 @@ from datetime import datetime, timezone
 from typing import Optional, TYPE_CHECKING, List
 from uuid import UUID, uuid4
 
-from sqlalchemy import  DateTime, ForeignKey, String
+from sqlalchemy import  DateTime, ForeignKey, String, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, Relationship
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 
@@ -16,22 +16,34 @@ if TYPE_CHECKING:
 
 class Branch(Base):
     __tablename__ = "branch"
+    __table_args__ = (
+        # Lets name-prefix LIKE filters use an index regardless of the database collation
+        Index("ix_branch_name_pattern", "name", postgresql_ops={"name": "text_pattern_ops"}),
+    )
 
     id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True),
         primary_key=True,
         default=uuid4,
-        unique=True,
         nullable=False,
     )
     name: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), index=True
+    )
+    # Row version for ETags; the server default covers COPY and raw SQL inserts
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        index=True,
     )
 
     created_by_id: Mapped[Optional[UUID]] = mapped_column(
-        PG_UUID(as_uuid=True), ForeignKey("user.id", ondelete="SET NULL"), nullable=True
+        PG_UUID(as_uuid=True), ForeignKey("user.id", ondelete="SET NULL"), nullable=True, index=True
     )
 
     # Relationships
@@ -55,3 +67,11 @@ class Branch(Base):
         overlaps="users,branch,user"
     )
 
+
+# Trigram index behind /branch/search (app/services/search.py)
+Index(
+    "ix_branch_name_trgm",
+    func.lower(Branch.name).label("name_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"name_lower": "gin_trgm_ops"},
+)
@@ -0,0 +1,47 @@
+# app/models/job.py
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import DateTime, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+JOB_PENDING = "pending"  # waiting to run, or claimed by a worker until run_at (the visibility timeout)
+JOB_DEAD = "dead"        # out of attempts or failed permanently; kept for inspection
+
+
+class Job(Base):
+    """Background job. Successful jobs are deleted, so the table only holds outstanding and dead work."""
+    __tablename__ = "job"
+
+    id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid4,
+        nullable=False,
+    )
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False, default=dict)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # higher runs first
+    status: Mapped[str] = mapped_column(String, nullable=False, default=JOB_PENDING)
+    run_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    locked_by: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+
+# Claim query: pending jobs due now, highest priority first
+Index("ix_job_claim", Job.priority.desc(), Job.run_at, postgresql_where=Job.status == JOB_PENDING)
+# At most one outstanding job per dedupe key
+Index("ux_job_dedupe_key", Job.dedupe_key, unique=True, postgresql_where=Job.status == JOB_PENDING)
@@ -28,10 +28,13 @@ class PasswordResetToken(Base):
         PG_UUID(as_uuid=True),
         ForeignKey("user.id"),
         nullable=False,
+        index=True,
     )
-    token: Mapped[str] = mapped_column(String, index=True, unique=True, nullable=False)
-    expires_at: Mapped[Optional[datetime]] = mapped_column(
-        DateTime(timezone=True), index=True, nullable=True
+    # Not unique and part of the primary key: the table may be partitioned by expires_at
+    # (app/tasks/maintenance.py), and Postgres wants the partition key in every unique index
+    token: Mapped[str] = mapped_column(String, index=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, index=True, nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
@@ -0,0 +1,20 @@
+# app/models/scheduler_job_run.py
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class SchedulerJobRun(Base):
+    """Last execution of each scheduled job, written by whichever process held leadership"""
+    __tablename__ = "scheduler_job_run"
+
+    job_id: Mapped[str] = mapped_column(String, primary_key=True)
+    last_run_by: Mapped[str] = mapped_column(String, nullable=False)
+    last_started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_status: Mapped[str] = mapped_column(String, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(nullable=True)
@@ -3,7 +3,7 @@ from uuid import UUID, uuid4
 
 from sqlalchemy.orm import validates, Mapped, mapped_column, Relationship, relationship
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlalchemy import String, DateTime, ForeignKey
+from sqlalchemy import String, DateTime, ForeignKey, Index, func
 from datetime import datetime, timezone
 
 from app.models.password_reset_token import PasswordResetToken
@@ -24,8 +24,6 @@ class User(Base):
         PG_UUID(as_uuid=True),
         primary_key=True,
         default=uuid4,
-        index=True,
-        unique=True,
         nullable=False,
     )
     email: Mapped[str] = mapped_column(
@@ -57,6 +55,7 @@ class User(Base):
         PG_UUID(as_uuid=True),
         ForeignKey("user.id", ondelete="SET NULL"),
         nullable=True,
+        index=True,
     )
     # Relationships
     created_by: Mapped[Optional["User"]] = Relationship(
@@ -93,4 +92,14 @@ class User(Base):
 
     @property
     def branch_ids(self) -> List[UUID]:
-        return [link.branch_id for link in self.user_branch_links]
\ No newline at end of file
+        return [link.branch_id for link in self.user_branch_links]
+
+
+# Trigram indexes behind /user/search (app/services/search.py); emails are stored lower-cased
+Index("ix_user_email_trgm", User.email, postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"})
+Index(
+    "ix_user_full_name_trgm",
+    func.lower(User.full_name).label("full_name_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"full_name_lower": "gin_trgm_ops"},
+)
@@ -21,7 +21,8 @@ class UserBranchLink(Base):
         PG_UUID(as_uuid=True), ForeignKey("user.id"), primary_key=True
     )
     branch_id: Mapped[UUID] = mapped_column(
-        PG_UUID(as_uuid=True), ForeignKey("branch.id"), primary_key=True
+        PG_UUID(as_uuid=True), ForeignKey("branch.id"), primary_key=True,
+        index=True,  # the primary key (user_id, branch_id) cannot serve branch_id lookups
     )
 
     # Relationships
@@ -3,24 +3,19 @@
 
 from uuid import UUID
 from fastapi import APIRouter, Depends
-from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import AsyncGenerator
-from app.core.dependencies import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.dependencies import get_current_user, get_session
 from app.crud.auth import send_reset_password_token, authenticate_user, reset_user_password, \
     perform_admin_password_reset, change_password_after_reset
 from app.models.user import User
 from app.schemas.user import UserLogin
 from app.schemas.password import PasswordResetRequest, PasswordResetConfirm
-from app.core.database import async_session
+from app.services import audit
 from app.services.permissions import require_admin_or_senior_editor
 
 router = APIRouter()
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
-        yield session
-
 @router.post("/login" ,name="Login")
 async def login(user_login: UserLogin, session: AsyncSession = Depends(get_session)):
     return await authenticate_user(user_login.email, user_login.password, session)
@@ -36,7 +31,9 @@ async def confirm_reset(data: PasswordResetConfirm, session: AsyncSession = Depe
 @router.post("/admin-reset-user-password/{user_id}", name="Admin Reset User Password")
 async def reset_user_password_by_admin(user_id: UUID, session: AsyncSession = Depends(get_session) ,
     current_user: User = Depends(require_admin_or_senior_editor)):
-    return await perform_admin_password_reset(user_id,current_user, session)
+    result = await perform_admin_password_reset(user_id,current_user, session)
+    audit.record(session, current_user, audit.USER_PASSWORD_RESET, user_id)
+    return result
 
 @router.post("/change-password", name="Change Password After Admin Reset")
 async def change_password(data: PasswordResetConfirm, session: AsyncSession = Depends(get_session),current_user: User = Depends(get_current_user)):
@@ -1,32 +1,121 @@
 # app/routes/branch.py
+from typing import List, Optional, Union
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Body, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_session
 from app.models.user import User
-from app.schemas.branch import BranchCreate, BranchRead, BranchUpdate
+from app.schemas.branch import BranchCreate, BranchRead, BranchUpdate, BranchSummary, BranchSort, \
+    BranchBulkUpdate, BranchBulkDelete, BranchBulkCreateResult, BranchBulkUpdateResult, BranchBulkDeleteResult
 from app.crud.branch import (
-    create_branch, get_branch_by_id, get_all_branches,
+    create_branch, get_branch_by_id, get_branches_page,
     update_branch, delete_branch,
+    create_branches, update_branches, delete_branches,
+    get_branches_version, get_branches_page_json, search_branches,
 )
+from app.services.branch_cache import branch_cache
+from app.services.etag import weak_etag, check_not_modified
+from app.services.list_render import render_model_list, render_db_mode, json_response
+from app.services.pagination import NEXT_CURSOR_HEADER
 from app.services.permissions import require_admin_or_senior_editor
+from app.services.search import SEARCH_MIN_LENGTH, SEARCH_MAX_LENGTH
 
 router = APIRouter()
 
+# The item model follows ?summary, so list routes render with it themselves; this only documents them
+BRANCH_LIST_RESPONSES = {
+    200: {"model": Union[List[BranchRead], List[BranchSummary]], "description": "BranchSummary items with summary=true"},
+}
+
 @router.post("/", response_model=BranchRead, name="Create Branch")
 async def create(branch_in: BranchCreate,session: AsyncSession = Depends(get_session),current_user: User = Depends(require_admin_or_senior_editor)):
     return await create_branch(session, branch_in, current_user)
 
-@router.get("/", response_model=list[BranchRead], name="List Branches")
-async def list_branches(session: AsyncSession = Depends(get_session),_current_user: User = Depends(require_admin_or_senior_editor)):
-    return await get_all_branches(session)
+@router.get("/", response_model=None, responses=BRANCH_LIST_RESPONSES, name="List Branches")
+async def list_branches(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    created_by_id: Optional[UUID] = None,
+    sort: BranchSort = BranchSort.name,
+    summary: bool = False,
+    session: AsyncSession = Depends(get_session),
+    _current_user: User = Depends(require_admin_or_senior_editor),
+):
+    # Probe count and latest change of the filtered set before fetching the page
+    count, last_updated = await get_branches_version(session, name_prefix=name_prefix, created_by_id=created_by_id)
+    etag = weak_etag("branches", count, last_updated, limit, cursor, name_prefix, created_by_id, sort.value, summary)
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    # The cursor for the next page travels in a header so the body stays a plain list
+    if render_db_mode():
+        body, next_cursor = await get_branches_page_json(
+            session,
+            limit=limit,
+            cursor=cursor,
+            name_prefix=name_prefix,
+            created_by_id=created_by_id,
+            sort=sort,
+            summary=summary,
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return json_response(body, response)
+    branches, next_cursor = await get_branches_page(
+        session,
+        limit=limit,
+        cursor=cursor,
+        name_prefix=name_prefix,
+        created_by_id=created_by_id,
+        sort=sort,
+        summary=summary,
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return render_model_list(branches, BranchSummary if summary else BranchRead, response)
+
+@router.get("/search", response_model=None, responses=BRANCH_LIST_RESPONSES, name="Search Branches")
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=SEARCH_MIN_LENGTH, max_length=SEARCH_MAX_LENGTH),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    session: AsyncSession = Depends(get_session),
+    _current_user: User = Depends(require_admin_or_senior_editor),
+):
+    branches, next_cursor = await search_branches(session, q, limit=limit, cursor=cursor, summary=summary)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return render_model_list(branches, BranchSummary if summary else BranchRead, response)
+
+# Bulk routes are declared before /{branch_id} so "bulk" is not parsed as an id
+@router.post("/bulk", response_model=BranchBulkCreateResult, name="Bulk Create Branches")
+async def bulk_create(branches_in: List[BranchCreate] = Body(..., max_length=1000), session: AsyncSession = Depends(get_session),current_user: User = Depends(require_admin_or_senior_editor)):
+    return await create_branches(session, branches_in, current_user)
+
+@router.patch("/bulk", response_model=BranchBulkUpdateResult, name="Bulk Update Branches")
+async def bulk_update(updates: List[BranchBulkUpdate] = Body(..., max_length=1000), session: AsyncSession = Depends(get_session),_current_user: User = Depends(require_admin_or_senior_editor)):
+    return await update_branches(session, updates)
+
+@router.post("/bulk/delete", response_model=BranchBulkDeleteResult, name="Bulk Delete Branches")
+async def bulk_delete(request: BranchBulkDelete, session: AsyncSession = Depends(get_session),_current_user: User = Depends(require_admin_or_senior_editor)):
+    return await delete_branches(session, request.ids, request.mode)
 
 @router.get("/{branch_id}", response_model=BranchRead, name="Get Branch")
-async def get_branch(branch_id: UUID, session: AsyncSession = Depends(get_session),_current_user: User = Depends(require_admin_or_senior_editor)):
-    branch = await get_branch_by_id(session, branch_id)
+async def get_branch(branch_id: UUID, request: Request, response: Response, session: AsyncSession = Depends(get_session),_current_user: User = Depends(require_admin_or_senior_editor)):
+    # Served from the per-worker branch cache; falls back to the database on a miss
+    branch = await branch_cache.get(session, branch_id)
     if not branch:
         raise HTTPException(status_code=404, detail="Branch not found")
+    not_modified = check_not_modified(request, response, weak_etag("branch", branch_id, branch.updated_at))
+    if not_modified:
+        return not_modified
     return branch
 
 @router.patch("/{branch_id}", response_model=BranchRead, name="Update Branch")
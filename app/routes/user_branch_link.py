@@ -1,7 +1,7 @@
 # app/routes/user_branch_link.py
 from typing import List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_session
@@ -11,13 +11,20 @@ from app.schemas.branch import BranchRead
 from app.crud.user_branch_link import (
     add_user_to_branch,
     remove_user_from_branch,
-    get_branches_for_user,
+    get_branch_ids_for_user,
     get_users_in_branch,
-    is_user_in_branch,
     remove_all_branches_for_user,
+    sync_branches_for_users,
+    build_links_export_query,
 )
-from app.schemas.user_branch_link import UserBranchLinkRead
-from app.services.permissions import require_admin_or_senior_editor
+from app.crud.user import get_users_in_branch_json
+from app.schemas.common import ExportFormat
+from app.schemas.user_branch_link import UserBranchLinkRead, UserBranchSync
+from app.services.branch_cache import branch_cache
+from app.services.list_render import render_list, render_db_mode, json_response
+from app.services.export import export_response
+from app.services import audit
+from app.services.permissions import require_admin_or_senior_editor, get_user_visibility_condition
 
 router = APIRouter()
 
@@ -34,14 +41,14 @@ async def add_link(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin_or_senior_editor),
 ):
-    existing = await is_user_in_branch(session, user_id, branch_id)
-    if existing:
+    created = await add_user_to_branch(session, user_id, branch_id)
+    if not created:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already linked to this branch"
         )
-    link = await add_user_to_branch(session, user_id, branch_id)
-    return UserBranchLinkRead(user_id=link.user_id, branch_id=link.branch_id)
+    audit.record(session, current_user, audit.LINK_ADD, user_id, {"branch_id": str(branch_id)})
+    return UserBranchLinkRead(user_id=user_id, branch_id=branch_id)
 
 
 @router.delete(
@@ -55,16 +62,28 @@ async def remove_link(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin_or_senior_editor),
 ):
-    existing = await is_user_in_branch(session, user_id, branch_id)
-    if not existing:
+    removed = await remove_user_from_branch(session, user_id, branch_id)
+    if not removed:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User is not linked to this branch"
         )
-    await remove_user_from_branch(session, user_id, branch_id)
+    audit.record(session, current_user, audit.LINK_REMOVE, user_id, {"branch_id": str(branch_id)})
     return UserBranchLinkRead(user_id=user_id, branch_id=branch_id)
 
 
+@router.get(
+    "/export",
+    name="Export User Branch Links"
+)
+async def export_links(
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: User = Depends(require_admin_or_senior_editor),
+):
+    stmt = build_links_export_query(get_user_visibility_condition(current_user))
+    return export_response(stmt, format, "user_branch_links")
+
+
 @router.get(
     "/branches/{user_id}",
     response_model=List[BranchRead],
@@ -75,8 +94,9 @@ async def list_branches_for_user(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin_or_senior_editor),
 ):
-    branches = await get_branches_for_user(session, user_id)
-    return branches
+    # Only the link rows come from the database; the branches themselves from the branch cache
+    branch_ids = await get_branch_ids_for_user(session, user_id)
+    return await branch_cache.get_many(session, branch_ids)
 
 
 @router.get(
@@ -86,11 +106,14 @@ async def list_branches_for_user(
 )
 async def list_users_in_branch(
     branch_id: UUID,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin_or_senior_editor),
 ):
+    if render_db_mode():
+        return json_response(await get_users_in_branch_json(session, branch_id), response)
     users = await get_users_in_branch(session, branch_id)
-    return users
+    return render_list(users, UserRead, response)
 
 
 @router.delete(
@@ -104,4 +127,23 @@ async def remove_all_branches(
     current_user: User = Depends(require_admin_or_senior_editor),
 ):
     await remove_all_branches_for_user(session, user_id)
+    audit.record(session, current_user, audit.LINK_REMOVE_ALL, user_id)
     return {"detail": f"All branches removed for user {user_id}"}
+
+
+@router.put(
+    "/sync",
+    response_model=dict,
+    name="Sync Branches for Users"
+)
+async def sync_branches(
+    memberships: List[UserBranchSync] = Body(..., max_length=1000),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_admin_or_senior_editor),
+):
+    # Each listed user ends up in exactly the given branches; later entries win for repeated users
+    memberships_by_user = {m.user_id: m.branch_ids for m in memberships}
+    await sync_branches_for_users(session, memberships_by_user)
+    for user_id, branch_ids in memberships_by_user.items():
+        audit.record(session, current_user, audit.LINK_SYNC, user_id, {"branch_ids": [str(b) for b in branch_ids]})
+    return {"detail": f"Branch memberships synced for {len(memberships)} users"}
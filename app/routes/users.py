@@ -1,16 +1,28 @@
 # app/routes/users.py
-from fastapi import APIRouter, Depends, Query, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, Query, status, UploadFile, File, Form, Response, Request
 from typing import List, Optional
 
 from pydantic import EmailStr, constr
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from app.crud.user import create_user, delete_user_by_id, get_users, update_user_by_id, \
-    deactivate_user_by_id, reactivate_user_by_id, get_user_by_id, update_user
+    deactivate_user_by_id, reactivate_user_by_id, get_user_by_id, update_user, count_users, \
+    build_users_export_query, get_users_version, get_user_version, get_users_page_json, get_users_by_ids, \
+    search_users
+from app.crud.user_import import import_users
 from app.models.user import User
-from app.schemas.user import UserRead, UserUpdate, UserCreate, UserUpdateOwn
+from app.schemas.user import UserRead, UserUpdate, UserCreate, UserUpdateOwn, UserImportReport, \
+    UserBatchRequest, UserBatchRead
 from app.core.dependencies import get_current_user, get_session
 from app.models.user_role import UserRole
+from app.schemas.common import CountMode, ExportFormat
+from app.services import audit
+from app.services.etag import weak_etag, check_not_modified
+from app.services.export import export_response
+from app.services.list_render import render_list, render_db_mode, json_response
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.row_count import TOTAL_COUNT_HEADER
+from app.services.search import SEARCH_MIN_LENGTH, SEARCH_MAX_LENGTH
 from app.services.image_service import  process_user_profile_image_upload
 from app.services.permissions import validate_user_creation_permissions, \
     validate_user_update_permissions, validate_user_deactivate_reactivate, \
@@ -20,12 +32,19 @@ from app.services.permissions import validate_user_creation_permissions, \
 router = APIRouter()
 
 
+def user_etag(user) -> str:
+    # last_login is part of UserRead but does not bump updated_at
+    return weak_etag("user", user.id, user.updated_at, user.last_login)
+
+
 @router.post("/first_admin", response_model=UserRead, name="Create First Admin")
 async def create_first_admin(
         user_create: UserCreate,
         session: AsyncSession = Depends(get_session),
 ):
-    return await create_user(session, user_create)
+    user = await create_user(session, user_create)
+    audit.record(session, None, audit.USER_CREATE, user.id, {"role": user.role.value, "first_admin": True})
+    return user
 
 @router.post("/create", response_model=UserRead,name="Create User")
 async def add_user(
@@ -34,12 +53,31 @@ async def add_user(
         current_user: User = Depends(require_admin_or_senior_editor_or_editor),
 ):
     validate_user_creation_permissions(current_user, user_create)
-    return await create_user(session, user_create , created_by_id=current_user.id)
+    user = await create_user(session, user_create , created_by_id=current_user.id)
+    audit.record(session, current_user, audit.USER_CREATE, user.id, {"role": user.role.value})
+    return user
+
+@router.post("/import", response_model=UserImportReport, name="Bulk Import Users")
+async def bulk_import_users(
+        request: Request,
+        session: AsyncSession = Depends(get_session),
+        current_user: User = Depends(require_admin_or_senior_editor_or_editor),
+):
+    # Body is streamed CSV (header row + one user per line) or NDJSON (one UserCreate object per line)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    report = await import_users(session, request.stream(), content_type, current_user)
+    audit.record(session, current_user, audit.USER_IMPORT, None, {"created": report.created, "failed": report.failed})
+    return report
 
 @router.get("/me", response_model=UserRead ,name="Profile")
 async def read_own_profile(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
 ):
+    not_modified = check_not_modified(request, response, user_etag(current_user))
+    if not_modified:
+        return not_modified
     return current_user
 
 @router.patch("/me/update", response_model=UserRead, name="Update My Profile")
@@ -55,24 +93,46 @@ async def update_own_profile(
     user_update = UserUpdateOwn(email=email, full_name=full_name, password=password)
     return await update_user(session, current_user, user_update, file)
 
-@router.post("/me/upload-pic", response_model=UserRead, name="upload profile picture")
+@router.post("/me/upload-pic", response_model=UserRead, status_code=status.HTTP_202_ACCEPTED, name="upload profile picture")
 async def upload_user_pic(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
+    # Resized and applied by a background job; user_pic changes once it has run
     await process_user_profile_image_upload(file, current_user, session)
     return current_user
 
 @router.get("/all", response_model=List[UserRead], name="Users List")
 async def list_users(
+    request: Request,
+    response: Response,
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     role: Optional[UserRole] = None,
     is_active: Optional[bool] = None,
+    count: CountMode = CountMode.none,
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin_or_senior_editor_or_editor_or_category_editor),
 ):
+    # Probe count and latest changes of the visible set before fetching the page
+    version = await get_users_version(session, current_user, role=role, is_active=is_active)
+    etag = weak_etag(
+        "users", current_user.id, current_user.role, current_user.created_by_id,
+        *version, offset, limit, role, is_active, count.value,
+    )
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    # The ETag probe has to count the visible set anyway (deletes move no timestamp), so exact totals cost nothing more
+    total = version[0] if count == CountMode.exact else await count_users(session, current_user, count, role=role, is_active=is_active)
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+
+    if render_db_mode():
+        body = await get_users_page_json(session, current_user, offset=offset, limit=limit, role=role, is_active=is_active)
+        return json_response(body, response)
     users= await get_users(  # Directly return filtered/paginated results
         session=session,
         current_user=current_user,
@@ -81,14 +141,60 @@ async def list_users(
         role=role,
         is_active=is_active
     )
-    return  users
+    return render_list(users, UserRead, response)
+
+@router.get("/search", response_model=List[UserRead], name="Search Users")
+async def search_users_route(
+    response: Response,
+    q: str = Query(..., min_length=SEARCH_MIN_LENGTH, max_length=SEARCH_MAX_LENGTH),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_admin_or_senior_editor_or_editor_or_category_editor),
+):
+    # Prefix matches first, then by similarity; the next page's cursor travels in a header
+    users, next_cursor = await search_users(session, current_user, q, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return render_list(users, UserRead, response)
+
+@router.get("/batch", response_model=UserBatchRead, name="Users by IDs")
+async def fetch_users_batch(
+    ids: List[UUID] = Query(...),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_admin_or_senior_editor_or_editor_or_category_editor),
+):
+    # ?ids=...&ids=... ; one query for all of them instead of one request per id
+    users, forbidden, missing = await get_users_by_ids(session, current_user, ids)
+    return UserBatchRead(users=users, forbidden=forbidden, missing=missing)
+
+@router.post("/batch", response_model=UserBatchRead, name="Users by IDs (body)")
+async def fetch_users_batch_body(
+    batch: UserBatchRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_admin_or_senior_editor_or_editor_or_category_editor),
+):
+    users, forbidden, missing = await get_users_by_ids(session, current_user, batch.ids)
+    return UserBatchRead(users=users, forbidden=forbidden, missing=missing)
+
+@router.get("/export", name="Export Users")
+async def export_users(
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: User = Depends(require_admin_or_senior_editor_or_editor_or_category_editor),
+):
+    return export_response(build_users_export_query(current_user), format, "users")
 
 @router.get("/{user_id}", response_model=UserRead, name="Users by ID")
 async def fetch_user_by_id(
     user_id: UUID,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin_or_senior_editor_or_editor_or_category_editor),
 ):
+    not_modified = check_not_modified(request, response, user_etag(await get_user_version(session, current_user, user_id)))
+    if not_modified:
+        return not_modified
     user = await get_user_by_id(session,current_user, user_id)
     return user
 
@@ -100,6 +206,7 @@ async def delete_user(
 ):
     prevent_self_action_on_user(current_user, user_id)
     await delete_user_by_id(session,current_user, user_id)
+    audit.record(session, current_user, audit.USER_DELETE, user_id)
 
 @router.patch("/{user_id}", response_model=UserRead , name="Update User by ID")
 async def update_user_admin(
@@ -110,7 +217,13 @@ async def update_user_admin(
 ):
     target_user = await get_user_by_id(session,current_user, user_id)
     validate_user_update_permissions(current_user, target_user)
-    return await update_user_by_id(session, user_id, user_update)
+    previous_role = target_user.role
+    user = await update_user_by_id(session, user_id, user_update)
+    details = {"fields": sorted(user_update.model_dump(exclude_unset=True))}
+    if user.role != previous_role:
+        details["role"] = {"from": previous_role.value, "to": user.role.value}
+    audit.record(session, current_user, audit.USER_UPDATE, user_id, details)
+    return user
 
 @router.post("/deactivate/{user_id}", response_model=UserRead,name="Deactivate User")
 async def deactivate_user(
@@ -124,7 +237,9 @@ async def deactivate_user(
     target_user = await get_user_by_id(session, current_user,user_id)
     validate_user_deactivate_reactivate(current_user, target_user)
     # Deactivate
-    return await deactivate_user_by_id(session, user_id)
+    user = await deactivate_user_by_id(session, user_id)
+    audit.record(session, current_user, audit.USER_DEACTIVATE, user_id)
+    return user
 
 @router.post("/reactivate/{user_id}", response_model=UserRead,name="Reactivate User")
 async def reactivate_user(
@@ -137,4 +252,6 @@ async def reactivate_user(
     # Fetch user to reactivate
     target_user = await get_user_by_id(session,current_user, user_id)
     validate_user_deactivate_reactivate(current_user, target_user)
-    return await reactivate_user_by_id(session, user_id)
\ No newline at end of file
+    user = await reactivate_user_by_id(session, user_id)
+    audit.record(session, current_user, audit.USER_REACTIVATE, user_id)
+    return user
\ No newline at end of file
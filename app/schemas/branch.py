@@ -1,7 +1,8 @@
 # app/schemas/branch.py
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import Optional, List
 from pydantic import BaseModel
 
 
@@ -17,6 +18,7 @@ class BranchCreate(BranchBase):
 class BranchRead(BranchBase):
     id: UUID
     created_at: datetime
+    updated_at: datetime
     created_by_id: Optional[UUID] = None  # NEW
     model_config = {
         "from_attributes": True
@@ -25,4 +27,50 @@ class BranchRead(BranchBase):
 
 class BranchUpdate(BranchBase):
     name: Optional[str] = None
-    description: Optional[str] = None
\ No newline at end of file
+    description: Optional[str] = None
+
+
+# Lightweight projection used by list endpoints that only need identity and label
+class BranchSummary(BaseModel):
+    id: UUID
+    name: str
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class BranchSort(str, Enum):
+    name = "name"
+    name_desc = "-name"
+    created_at = "created_at"
+    created_at_desc = "-created_at"
+
+
+class BranchBulkUpdate(BranchUpdate):
+    id: UUID
+
+
+class BulkMode(str, Enum):
+    atomic = "atomic"  # apply everything or nothing
+    best_effort = "best_effort"  # apply what can be applied and report the rest
+
+
+class BranchBulkDelete(BaseModel):
+    ids: List[UUID]
+    mode: BulkMode = BulkMode.atomic
+
+
+class BranchBulkCreateResult(BaseModel):
+    created: List[BranchRead]
+    conflicts: List[str]  # names that already exist (or repeat within the request)
+
+
+class BranchBulkUpdateResult(BaseModel):
+    updated: List[BranchRead]
+    not_found: List[UUID]
+
+
+class BranchBulkDeleteResult(BaseModel):
+    deleted: List[UUID]
+    not_found: List[UUID]
+    linked: List[UUID]  # branches skipped because users are still linked to them
@@ -1,4 +1,6 @@
 #app/schemas/common.py
+from enum import Enum
+
 from pydantic import StringConstraints, Field
 from typing_extensions import Annotated
 
@@ -11,4 +13,15 @@ PasswordType = Annotated[
     Field(
         description="Password must be at least 8 characters long, contain at least one uppercase letter, one lowercase letter, one digit, and one special character.",
     )
-]
\ No newline at end of file
+]
+
+
+class CountMode(str, Enum):
+    exact = "exact"  # count(*) over the filtered query; the user list takes it from its ETag probe
+    estimated = "estimated"  # Postgres planner row estimate, no table scan
+    none = "none"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
@@ -67,4 +67,24 @@ class UserLogin(BaseModel):
     password: str
     model_config = {
         "from_attributes": True
-    }
\ No newline at end of file
+    }
+
+# Returned by the bulk import endpoint; row numbers are 1-based data rows
+class UserImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    detail: str
+
+class UserImportReport(BaseModel):
+    created: int
+    failed: int
+    errors: List[UserImportError]
+
+# Batch fetch: ids in the request order, hidden and unknown ids reported apart (like 403 vs 404 on /user/{id})
+class UserBatchRequest(BaseModel):
+    ids: List[UUID]
+
+class UserBatchRead(BaseModel):
+    users: List[UserRead]
+    forbidden: List[UUID]
+    missing: List[UUID]
@@ -1,5 +1,6 @@
 # app/schemas/user_branch_link.py
 
+from typing import List
 from uuid import UUID
 from pydantic import BaseModel
 
@@ -11,4 +12,8 @@ class UserBranchLinkCreate(UserBranchLinkBase):
     pass
 
 class UserBranchLinkRead(UserBranchLinkBase):
-    pass
\ No newline at end of file
+    pass
+
+class UserBranchSync(BaseModel):
+    user_id: UUID
+    branch_ids: List[UUID]
@@ -0,0 +1,187 @@
+# app/services/audit.py
+"""
+Audit trail of administrative actions, written off the request path.
+
+Routes call record() with their session. Events ride on the session until it
+commits, so rolled-back actions are never logged, and are then handed to a
+bounded in-memory queue. A background writer drains it in multi-row INSERTs of
+up to AUDIT_BATCH_SIZE rows, or whatever arrived within
+AUDIT_FLUSH_INTERVAL_SECONDS. When the queue is full AUDIT_OVERFLOW_POLICY drops
+the newest or the oldest event, so a slow database costs audit entries, never
+request latency. A batch that keeps failing on connection errors is dropped after
+AUDIT_WRITE_MAX_ATTEMPTS; one the database rejects is split until the bad rows
+are found, and only those are dropped. On shutdown the queue is drained for up
+to AUDIT_DRAIN_TIMEOUT_SECONDS. Counts are in /metrics under audit.*.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import async_session
+from app.models.audit_log import AuditLog
+from app.services import metrics
+
+settings = get_settings()
+
+# Actions
+USER_CREATE = "user.create"
+USER_IMPORT = "user.import"
+USER_UPDATE = "user.update"
+USER_DELETE = "user.delete"
+USER_DEACTIVATE = "user.deactivate"
+USER_REACTIVATE = "user.reactivate"
+USER_PASSWORD_RESET = "user.password_reset"
+LINK_ADD = "branch_link.add"
+LINK_REMOVE = "branch_link.remove"
+LINK_REMOVE_ALL = "branch_link.remove_all"
+LINK_SYNC = "branch_link.sync"
+
+_PENDING_KEY = "audit_events"
+
+
+def record(
+    session: AsyncSession,
+    actor: Any,
+    action: str,
+    target_id: Optional[UUID] = None,
+    details: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Queues an event to be written if, and once, the session's transaction commits"""
+    session.info.setdefault(_PENDING_KEY, []).append({
+        "occurred_at": datetime.now(timezone.utc),
+        "actor_id": actor.id if actor is not None else None,
+        "action": action,
+        "target_id": target_id,
+        "details": details or {},
+    })
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        audit_writer.push(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class AuditWriter:
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.AUDIT_QUEUE_SIZE)
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight = 0
+
+    def push(self, events: List[Dict[str, Any]]) -> None:
+        for audit_event in events:
+            if self._queue.full():
+                metrics.increment("audit.dropped")
+                if settings.AUDIT_OVERFLOW_POLICY == "drop_newest":
+                    continue
+                self._queue.get_nowait()
+            self._queue.put_nowait(audit_event)
+        metrics.set_gauge("audit.queue_depth", self._queue.qsize())
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        """Up to one batch: returns when it is full, the flush interval ran out, or on shutdown"""
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + settings.AUDIT_FLUSH_INTERVAL_SECONDS
+        while len(batch) < settings.AUDIT_BATCH_SIZE:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if self._stop.is_set() or remaining <= 0:
+                break
+            getter = asyncio.ensure_future(self._queue.get())
+            stopper = asyncio.ensure_future(self._stop.wait())
+            done, _ = await asyncio.wait({getter, stopper}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            stopper.cancel()
+            if getter in done:
+                batch.append(getter.result())
+            else:
+                getter.cancel()
+        return batch
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                async with async_session.begin() as session:
+                    # executemany of one INSERT; SQLAlchemy sends it as multi-row VALUES batches
+                    await session.execute(insert(AuditLog), batch)
+            except Exception as e:
+                attempt += 1
+                metrics.increment("audit.write_errors")
+                if not _transient(e):
+                    await self._split(batch, e)
+                    return
+                if attempt >= settings.AUDIT_WRITE_MAX_ATTEMPTS:
+                    metrics.increment("audit.dropped", len(batch))
+                    print(f"[Audit] Writing {len(batch)} events failed {attempt} times, dropping them: {e!r}")
+                    return
+                print(f"[Audit] Writing {len(batch)} events failed (attempt {attempt}): {e!r}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+            metrics.observe("audit.flush", time.perf_counter() - started)
+            metrics.increment("audit.written", len(batch))
+            return
+
+    async def _split(self, batch: List[Dict[str, Any]], error: Exception) -> None:
+        """Retrying cannot help: halves the batch until the rows the database rejects are alone, and drops those"""
+        if len(batch) == 1:
+            metrics.increment("audit.dropped")
+            print(f"[Audit] Dropping {batch[0]['action']} event the database rejects: {error!r}")
+            return
+        middle = len(batch) // 2
+        await self._write(batch[:middle])
+        await self._write(batch[middle:])
+
+    async def _run(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                self._in_flight = len(batch)
+                await self._write(batch)
+                self._in_flight = 0
+                metrics.set_gauge("audit.queue_depth", self._queue.qsize())
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Drains the queue within AUDIT_DRAIN_TIMEOUT_SECONDS; what is left is reported as lost"""
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=settings.AUDIT_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            lost = self._queue.qsize() + self._in_flight
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            print(f"[Audit] Shutdown drain timed out, {lost} events not written")
+        self._task = None
+
+
+def _transient(error: Exception) -> bool:
+    # Connection trouble and timeouts; anything else (bad data, constraint violations) fails the same way again
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError))
+
+
+audit_writer = AuditWriter()
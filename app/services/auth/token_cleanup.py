@@ -1,17 +1,164 @@
 # app/services/token_cleanup.py
-from typing import  Callable
-from sqlalchemy import delete, func
-from sqlalchemy.ext.asyncio import AsyncSession
+import re
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
 from app.models.password_reset_token import PasswordResetToken
+from app.services import metrics
+
+TOKEN_TABLE = PasswordResetToken.__tablename__
+PARTITION_PREFIX = f"{TOKEN_TABLE}_p"
+DEFAULT_PARTITION = f"{TOKEN_TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{8}})$")
+
+
+async def delete_expired_tokens(session: AsyncSession, batch_size: int = 1000, table: str = TOKEN_TABLE) -> int:
+    """Deletes at most batch_size expired tokens, skipping rows other transactions hold"""
+    # ctid lookups turn the DELETE into a TID scan over exactly the rows picked by the LIMIT.
+    # Only valid on a plain table (or a single partition): ctids repeat across partitions.
+    stmt = text(f"""
+        DELETE FROM "{table}"
+        WHERE ctid = ANY(ARRAY(
+            SELECT ctid FROM "{table}"
+            WHERE expires_at < now()
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        ))
+    """)
+    result = await session.execute(stmt, {"batch_size": batch_size})
+    return result.rowcount
+
+
+async def purge_expired_tokens(
+    session_factory: async_sessionmaker,
+    batch_size: int,
+    time_budget_seconds: float,
+    table: str = TOKEN_TABLE,
+) -> int:
+    """
+    Deletes expired tokens in bounded batches, one short transaction each, until a
+    batch comes back short or the time budget is spent. Whatever is left is picked
+    up by the next run, so a spike never turns into one long lock-holding DELETE.
+    """
+    started = time.monotonic()
+    deadline = started + time_budget_seconds
+    total = 0
+    while True:
+        async with session_factory.begin() as session:
+            deleted = await delete_expired_tokens(session, batch_size, table)
+        total += deleted
+        metrics.increment("reset_tokens.purge_batches")
+        if deleted < batch_size:
+            break
+        if time.monotonic() >= deadline:
+            metrics.increment("reset_tokens.purge_budget_exhausted")
+            break
+
+    elapsed = time.monotonic() - started
+    metrics.increment("reset_tokens.purged_rows", total)
+    metrics.observe("reset_tokens.purge_run", elapsed)
+    metrics.set_gauge("reset_tokens.last_purge_rows", total)
+    return total
+
+
+# --- partitioned mode: one range partition per UTC day of expires_at ----------
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+async def ensure_token_partitions(session: AsyncSession, days_ahead: int, parent: str = TOKEN_TABLE) -> None:
+    """Creates the daily partitions from today through today + days_ahead"""
+    today = datetime.now(timezone.utc).date()
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        name = partition_name(day)
+        if (await session.execute(text("SELECT to_regclass(:name)"), {"name": f'"{name}"'})).scalar() is not None:
+            continue
+        bounds = {"lower": datetime.combine(day, dt_time.min, timezone.utc)}
+        bounds["upper"] = bounds["lower"] + timedelta(days=1)
+        # Postgres refuses a new partition while the default one holds rows in its range
+        # (tokens written when the job had not run for a while), so those move over with it
+        moved = 0
+        if await _default_partition_of(session, parent):
+            in_range = f'FROM "{DEFAULT_PARTITION}" WHERE expires_at >= :lower AND expires_at < :upper'
+            await session.execute(text(f'CREATE TEMP TABLE "{name}_moved" ON COMMIT DROP AS SELECT * {in_range}'), bounds)
+            moved = (await session.execute(text(f"DELETE {in_range}"), bounds)).rowcount
+        await session.execute(text(
+            f'CREATE TABLE "{name}" PARTITION OF "{parent}" '
+            f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') TO ('{(day + timedelta(days=1)).isoformat()} 00:00:00+00')"
+        ))
+        if moved:
+            await session.execute(text(f'INSERT INTO "{parent}" SELECT * FROM "{name}_moved"'))
+            metrics.increment("reset_tokens.default_rows_moved", moved)
+            print(f"[TokenCleanup] Moved {moved} tokens from {DEFAULT_PARTITION} into {name}")
+
 
-async def delete_expired_tokens(session: AsyncSession) -> Callable[[], int]:
-    stmt = delete(PasswordResetToken).where(
-        PasswordResetToken.expires_at < func.now()
-    )
-    result = await session.execute(stmt)
-    await session.commit()
+async def _default_partition_of(session: AsyncSession, parent: str) -> bool:
+    result = await session.execute(text("""
+        SELECT 1
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:parent) AND c.relname = :name
+    """), {"parent": f'"{parent}"', "name": DEFAULT_PARTITION})
+    return result.first() is not None
 
-    return result.rowcount  # ✅ This is an intis is an int
 
+async def drop_expired_token_partitions(session: AsyncSession) -> List[str]:
+    """Detaches and drops daily partitions whose whole range lies in the past"""
+    result = await session.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:parent)
+    """), {"parent": TOKEN_TABLE})
+    today = datetime.now(timezone.utc).date()
+    dropped = []
+    for name in result.scalars():
+        match = _PARTITION_NAME.match(name)
+        if not match or datetime.strptime(match.group(1), "%Y%m%d").date() >= today:
+            continue
+        await session.execute(text(f'ALTER TABLE "{TOKEN_TABLE}" DETACH PARTITION "{name}"'))
+        await session.execute(text(f'DROP TABLE "{name}"'))
+        dropped.append(name)
+    metrics.increment("reset_tokens.partitions_dropped", len(dropped))
+    return dropped
 
 
+async def partition_token_table(session: AsyncSession, days_ahead: int) -> None:
+    """
+    One-off conversion of password_reset_token into a table range-partitioned by
+    expires_at. Expired rows are not carried over. Keys, indexes and their names stay
+    as migration 948c8ceeae66 left them, so the model describes either table.
+    """
+    new_table = f"{TOKEN_TABLE}_partitioned"
+    await session.execute(text(f'LOCK TABLE "{TOKEN_TABLE}" IN ACCESS EXCLUSIVE MODE'))
+    await session.execute(text(f"""
+        CREATE TABLE "{new_table}" (
+            id UUID NOT NULL,
+            user_id UUID NOT NULL,
+            token VARCHAR NOT NULL,
+            expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT "{new_table}_pkey" PRIMARY KEY (id, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+    """))
+    await session.execute(text(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{new_table}" DEFAULT'))
+    await ensure_token_partitions(session, days_ahead, parent=new_table)
+    await session.execute(text(f"""
+        INSERT INTO "{new_table}" (id, user_id, token, expires_at, created_at)
+        SELECT id, user_id, token, expires_at, created_at FROM "{TOKEN_TABLE}"
+        WHERE expires_at > now()
+    """))
+    await session.execute(text(f'DROP TABLE "{TOKEN_TABLE}"'))
+    await session.execute(text(f'ALTER TABLE "{new_table}" RENAME TO "{TOKEN_TABLE}"'))
+    await session.execute(text(f'ALTER TABLE "{TOKEN_TABLE}" RENAME CONSTRAINT "{new_table}_pkey" TO "{TOKEN_TABLE}_pkey"'))
+    await session.execute(text(
+        f'ALTER TABLE "{TOKEN_TABLE}" ADD CONSTRAINT "{TOKEN_TABLE}_user_id_fkey" FOREIGN KEY (user_id) REFERENCES "user" (id)'
+    ))
+    for column in ("token", "expires_at", "user_id"):
+        await session.execute(text(f'CREATE INDEX "ix_{TOKEN_TABLE}_{column}" ON "{TOKEN_TABLE}" ({column})'))
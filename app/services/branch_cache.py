@@ -0,0 +1,231 @@
+# app/services/branch_cache.py
+"""
+Per-process copy of the branch table for read paths.
+
+Fully loaded at startup, then kept current by LISTEN on BRANCH_CHANNEL: every
+branch write publishes the changed ids (see app/crud/branch.py) and each worker
+re-reads just those rows. Full reloads go through the same queue as those
+deltas, so one consumer applies both in order and a reload never overwrites a
+newer delta with its older snapshot. While the listener connection is down the
+cache reloads everything every BRANCH_CACHE_TTL_SECONDS, and entries older than
+that are not served at all, so a lost connection costs freshness up to the TTL,
+never more.
+Write paths keep reading the database.
+"""
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, any_, bindparam
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import async_session, engine
+from app.crud.branch import BRANCH_CHANNEL, BRANCH_RELOAD_ALL, BRANCH_READ_COLUMNS
+from app.crud.user_branch_link import UUID_ARRAY
+from app.models.branch import Branch
+from app.schemas.branch import BranchRead
+from app.services import metrics
+
+settings = get_settings()
+
+
+class BranchCache:
+    def __init__(self):
+        self._branches: Dict[UUID, BranchRead] = {}
+        self._loaded_at: Optional[float] = None  # monotonic time of the last full load
+        self._listening = False  # LISTEN is up and a full load since it began has landed
+        self._subscription: Optional[int] = None  # number of the live LISTEN connection, None while down
+        self._subscriptions = 0
+        self._changes: asyncio.Queue = asyncio.Queue()
+        self._stop = asyncio.Event()
+        self._ready = asyncio.Event()  # set by the first full load
+        self._tasks: List[asyncio.Task] = []
+        self._hits = 0
+        self._misses = 0
+
+    # --- reads -----------------------------------------------------------------
+
+    @property
+    def usable(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self._listening or time.monotonic() - self._loaded_at < settings.BRANCH_CACHE_TTL_SECONDS
+
+    def _record(self, hits: int = 0, misses: int = 0) -> None:
+        self._hits += hits
+        self._misses += misses
+        metrics.increment("branch_cache.hits", hits)
+        metrics.increment("branch_cache.misses", misses)
+        if self._hits + self._misses:
+            metrics.set_gauge("branch_cache.hit_rate", self._hits / (self._hits + self._misses))
+
+    async def get(self, session: AsyncSession, branch_id: UUID) -> Optional[BranchRead]:
+        """Cached branch, or a database read when the cache cannot vouch for it"""
+        if self.usable:
+            branch = self._branches.get(branch_id)
+            if branch is not None:
+                self._record(hits=1)
+                return branch
+            # Not cached: missing, or created a moment ago and not announced yet
+        self._record(misses=1)
+        rows = await _fetch(session, [branch_id])
+        return rows[0] if rows else None
+
+    async def get_many(self, session: AsyncSession, branch_ids: Iterable[UUID]) -> List[BranchRead]:
+        """Branches for the given ids in the given order; unknown ids are skipped"""
+        branch_ids = list(branch_ids)
+        found: Dict[UUID, BranchRead] = {}
+        if self.usable:
+            found = {branch_id: self._branches[branch_id] for branch_id in branch_ids if branch_id in self._branches}
+        missing = [branch_id for branch_id in branch_ids if branch_id not in found]
+        self._record(hits=len(found), misses=len(missing))
+        if missing:
+            found.update((branch.id, branch) for branch in await _fetch(session, missing))
+        return [found[branch_id] for branch_id in branch_ids if branch_id in found]
+
+    async def all(self, session: AsyncSession) -> List[BranchRead]:
+        if self.usable:
+            self._record(hits=1)
+            return list(self._branches.values())
+        self._record(misses=1)
+        return await _fetch(session)
+
+    # --- maintenance -----------------------------------------------------------
+
+    async def _reload(self) -> None:
+        subscription = self._subscription
+        async with async_session() as session:
+            branches = await _fetch(session)
+        self._branches = {branch.id: branch for branch in branches}
+        self._loaded_at = time.monotonic()
+        self._ready.set()
+        # Only a load read after this LISTEN began can have missed nothing it will not hear about
+        if subscription is not None and subscription == self._subscription:
+            self._listening = True
+            metrics.set_gauge("branch_cache.listening", 1)
+        metrics.increment("branch_cache.reloads")
+        metrics.set_gauge("branch_cache.size", len(self._branches))
+
+    async def _apply(self, payload: str) -> None:
+        if payload == BRANCH_RELOAD_ALL:
+            await self._reload()
+            return
+        ids = [UUID(value) for value in payload.split(",") if value]
+        async with async_session() as session:
+            fresh = {branch.id: branch for branch in await _fetch(session, ids)}
+        for branch_id in ids:
+            if branch_id in fresh:
+                self._branches[branch_id] = fresh[branch_id]
+            else:
+                self._branches.pop(branch_id, None)
+        metrics.increment("branch_cache.deltas")
+        metrics.set_gauge("branch_cache.size", len(self._branches))
+
+    async def _apply_changes(self) -> None:
+        # The only writer of _branches, so reloads and deltas apply in the order they were queued
+        while True:
+            payload = await self._changes.get()
+            try:
+                await self._apply(payload)
+            except Exception as e:
+                print(f"[BranchCache] Failed to apply change {payload[:80]!r}: {e!r}")
+                # Stop serving until a full load succeeds
+                self._loaded_at = None
+                await asyncio.sleep(settings.BRANCH_CACHE_KEEPALIVE_SECONDS)
+                self._changes.put_nowait(BRANCH_RELOAD_ALL)
+
+    def _on_notify(self, _connection, _pid, _channel, payload: str) -> None:
+        self._changes.put_nowait(payload)
+
+    async def _listen_once(self) -> None:
+        conn = await engine.connect()
+        lost = asyncio.Event()
+        try:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            raw = (await conn.get_raw_connection()).driver_connection
+            raw.add_termination_listener(lambda _connection: lost.set())
+            await raw.add_listener(BRANCH_CHANNEL, self._on_notify)
+            # Load only after LISTEN is in place so no change can fall between the two;
+            # the consumer marks the cache listening once that load has landed
+            self._subscriptions += 1
+            self._subscription = self._subscriptions
+            self._changes.put_nowait(BRANCH_RELOAD_ALL)
+            print("[BranchCache] Listening for branch changes")
+            while not self._stop.is_set() and not lost.is_set():
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=settings.BRANCH_CACHE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Half-open connections never fire the termination listener
+                    await asyncio.wait_for(raw.execute("SELECT 1"), timeout=settings.BRANCH_CACHE_KEEPALIVE_SECONDS)
+        finally:
+            self._subscription = None
+            self._listening = False
+            metrics.set_gauge("branch_cache.listening", 0)
+            if self._stop.is_set():
+                await conn.close()
+            else:
+                await conn.invalidate()
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await self._listen_once()
+            except Exception as e:
+                print(f"[BranchCache] Listener down, falling back to TTL reloads: {e!r}")
+            if self._stop.is_set():
+                break
+            self._changes.put_nowait(BRANCH_RELOAD_ALL)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=settings.BRANCH_CACHE_TTL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self, load_timeout: float) -> None:
+        """Starts listening and waits (bounded) for the first full load; until then reads go to the database"""
+        self._stop.clear()
+        self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._apply_changes())]
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=load_timeout)
+        except asyncio.TimeoutError:
+            print("[BranchCache] Initial load still running, serving from the database meanwhile")
+
+    async def stop(self) -> None:
+        if not self._tasks:
+            return
+        self._stop.set()
+        # The listener loop notices the stop event; the change consumer only waits on its queue
+        self._tasks[1].cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def _fetch(session: AsyncSession, branch_ids: Optional[List[UUID]] = None) -> List[BranchRead]:
+    stmt = select(*BRANCH_READ_COLUMNS)
+    if branch_ids is not None:
+        stmt = stmt.where(Branch.id == any_(bindparam("branch_ids", value=branch_ids, type_=UUID_ARRAY)))
+    try:
+        rows = (await session.execute(stmt)).all()
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during branch retrieval"
+        ) from e
+    return [BranchRead.model_validate(row) for row in rows]
+
+
+branch_cache = BranchCache()
+
+
+async def start_branch_cache() -> None:
+    if settings.BRANCH_CACHE_ENABLED:
+        # A fast start serves from the database until the load lands
+        await branch_cache.start(load_timeout=0 if settings.FAST_STARTUP else settings.BRANCH_CACHE_KEEPALIVE_SECONDS)
+
+
+async def stop_branch_cache() -> None:
+    if settings.BRANCH_CACHE_ENABLED:
+        await branch_cache.stop()
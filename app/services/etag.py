@@ -0,0 +1,36 @@
+# app/services/etag.py
+# Weak ETags and If-None-Match handling for conditional GETs
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+ETAG_HEADER = "ETag"
+# Bodies depend on the viewer, so only the client may keep them and it must revalidate
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts: Any) -> str:
+    """W/"<digest>" over the parts that determine a representation (ids, versions, query params)"""
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/ prefixes are ignored on both sides
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def check_not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Returns a 304 when the client already has this version, otherwise tags the response and returns None"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL})
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
@@ -1,20 +1,28 @@
 # app/services/file_service.py
+import asyncio
+from datetime import datetime, timezone
 from io import BytesIO
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, TYPE_CHECKING
 
-from PIL import Image
-from uuid import uuid4
+from uuid import UUID, uuid4
 from fastapi import HTTPException, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.models.user import User
+from app.services.job_queue import enqueue, JOB_RESIZE_PROFILE_IMAGE, PRIORITY_HIGH
+
+if TYPE_CHECKING:
+    from PIL import Image  # imported where used: only uploads and the resize job need Pillow
 
 settings = get_settings()
+STAGING_SUBDIR = "incoming"  # raw uploads waiting for the resize job
 
 def validate_image_file(contents: bytes,max_size_mb: int,resize_size: Tuple[int, int] = (400, 400),  # default resize size
-) -> Image.Image:
+) -> "Image.Image":
+    from PIL import Image
+
     if len(contents) > max_size_mb * 1024 * 1024:
         raise HTTPException(status_code=400, detail="File too large")
     try:
@@ -28,7 +36,7 @@ def validate_image_file(contents: bytes,max_size_mb: int,resize_size: Tuple[int,
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid image format")
 
-def save_image(image: Image.Image, subfolder: str) -> str:
+def save_image(image: "Image.Image", subfolder: str) -> str:
     folder = Path(settings.IMAGE_UPLOAD_DIR) / subfolder
     folder.mkdir(parents=True, exist_ok=True)
     filename = f"{uuid4().hex}.jpg"
@@ -72,14 +80,63 @@ async def process_user_profile_image_upload(
     resize_size: Tuple[int, int] = (300, 300),
     subdir: str = "users"
 ) -> str:
-    filename = await process_image_upload(
-        file=file,
-        max_size_mb=max_size_mb,
-        resize_size=resize_size,
-        subdir=subdir,
-        old_filename=current_user.user_pic
+    """
+    Stages the raw upload and enqueues the resize in the request transaction; the
+    worker decodes, resizes and swaps user_pic. Returns the staged path.
+    """
+    if file.content_type not in ("image/jpeg", "image/png", "image/webp"):
+        raise HTTPException(status_code=400, detail="Invalid content type")
+    contents = await file.read()
+    if len(contents) > max_size_mb * 1024 * 1024:
+        raise HTTPException(status_code=400, detail="File too large")
+
+    staged = stage_upload(contents)
+    await enqueue(
+        session,
+        JOB_RESIZE_PROFILE_IMAGE,
+        {"user_id": str(current_user.id), "staged": staged, "resize_size": list(resize_size), "subdir": subdir},
+        priority=PRIORITY_HIGH,
     )
-    current_user.user_pic = filename
-    session.add(current_user)
-    await session.commit()
-    return filename
\ No newline at end of file
+    return staged
+
+
+def stage_upload(contents: bytes) -> str:
+    folder = Path(settings.IMAGE_UPLOAD_DIR) / STAGING_SUBDIR
+    folder.mkdir(parents=True, exist_ok=True)
+    filename = f"{uuid4().hex}.upload"
+    try:
+        (folder / filename).write_bytes(contents)
+    except OSError as e:
+        raise HTTPException(status_code=500, detail="Failed to save image") from e
+    return f"{STAGING_SUBDIR}/{filename}"
+
+
+async def apply_staged_profile_image(
+    session: AsyncSession,
+    user_id: UUID,
+    staged: str,
+    resize_size: Tuple[int, int],
+    subdir: str,
+) -> Optional[str]:
+    """
+    Job side of a profile picture upload: resizes the staged file and points the user
+    at it. Returns the old picture, which the caller deletes once this commits.
+    Safe to rerun: a missing staged file means an earlier attempt already finished.
+    """
+    staged_path = Path(settings.IMAGE_UPLOAD_DIR) / staged
+    if not staged_path.exists():
+        return None
+    contents = staged_path.read_bytes()
+    # Decoding and resizing are CPU-bound; keep them off the worker's event loop
+    image = await asyncio.to_thread(validate_image_file, contents, settings.MAX_FILE_SIZE_MB, resize_size)
+    filename = await asyncio.to_thread(save_image, image, subdir)
+
+    user = await session.get(User, user_id)
+    if user is None:
+        delete_image(filename)
+        return None
+    old_filename = user.user_pic
+    user.user_pic = filename
+    user.updated_at = datetime.now(timezone.utc)
+    await session.flush()
+    return old_filename
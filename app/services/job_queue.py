@@ -0,0 +1,163 @@
+# app/services/job_queue.py
+"""
+Durable background jobs on a Postgres table.
+
+Producers call enqueue() with the request session, so a job exists exactly when
+the transaction that asked for it commits. Workers (`python -m app.tasks.worker`)
+claim batches with FOR UPDATE SKIP LOCKED, which lets any number of worker
+processes share the table without blocking each other.
+
+A claim pushes run_at forward by the visibility timeout: if the worker dies, the
+job simply becomes due again and another worker picks it up. Delivery is
+therefore at-least-once and handlers must be idempotent.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.job import Job, JOB_PENDING, JOB_DEAD
+
+settings = get_settings()
+
+# Job kinds, mapped to handlers in app/tasks/job_handlers.py
+JOB_SEND_EMAIL = "send_email"
+JOB_SEND_RESET_EMAIL = "send_reset_email"  # payload names the token; the link is built by the handler
+JOB_SEND_ADMIN_RESET_EMAIL = "send_admin_reset_email"  # payload names the user; the handler adds the one-time password
+JOB_RESIZE_PROFILE_IMAGE = "resize_profile_image"
+JOB_PURGE_RESET_TOKENS = "purge_reset_tokens"
+
+PRIORITY_LOW = -10
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job goes straight to dead"""
+
+
+@dataclass
+class ClaimedJob:
+    id: UUID
+    kind: str
+    payload: Dict[str, Any]
+    priority: int
+    attempts: int
+    max_attempts: int
+    lease_expires_at: datetime
+
+
+async def enqueue(
+    session: AsyncSession,
+    kind: str,
+    payload: Dict[str, Any],
+    priority: int = PRIORITY_NORMAL,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+    dedupe_key: Optional[str] = None,
+) -> Optional[UUID]:
+    """
+    Adds a job in the caller's transaction. With a dedupe_key, nothing is added while
+    a pending job with the same key exists and None is returned.
+    """
+    stmt = pg_insert(Job).values(
+        kind=kind,
+        payload=payload,
+        priority=priority,
+        status=JOB_PENDING,
+        run_at=run_at or func.now(),
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        dedupe_key=dedupe_key,
+    )
+    if dedupe_key is not None:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[Job.dedupe_key],
+            index_where=Job.status == JOB_PENDING,
+        )
+    return (await session.execute(stmt.returning(Job.id))).scalar_one_or_none()
+
+
+async def claim_jobs(session: AsyncSession, worker_id: str, limit: int, visibility_timeout: int) -> List[ClaimedJob]:
+    """Leases up to `limit` due jobs to worker_id; commit right away so the leases are visible"""
+    lease = timedelta(seconds=visibility_timeout)
+    due = (
+        select(Job.id)
+        .where(Job.status == JOB_PENDING, Job.run_at <= func.now())
+        .order_by(Job.priority.desc(), Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(Job)
+        .where(Job.id.in_(due))
+        .values(
+            run_at=func.now() + lease,
+            attempts=Job.attempts + 1,
+            locked_by=worker_id,
+            locked_at=func.now(),
+        )
+        .returning(Job.id, Job.kind, Job.payload, Job.priority, Job.attempts, Job.max_attempts, Job.run_at)
+    )
+    rows = (await session.execute(stmt)).all()
+    jobs = [ClaimedJob(*row) for row in rows]
+    jobs.sort(key=lambda job: -job.priority)  # RETURNING order is unspecified
+    return jobs
+
+
+def _owned(job: ClaimedJob, worker_id: str):
+    # A job whose lease ran out may have been claimed again; only the current holder may settle it
+    return (Job.id == job.id) & (Job.locked_by == worker_id) & (Job.attempts == job.attempts)
+
+
+async def renew_lease(session: AsyncSession, job: ClaimedJob, worker_id: str, visibility_timeout: int) -> bool:
+    """Restarts the job's lease from now, so a job waiting in a batch still gets the full timeout; False if it was lost"""
+    lease = timedelta(seconds=visibility_timeout)
+    result = await session.execute(
+        update(Job)
+        .where(_owned(job, worker_id), Job.status == JOB_PENDING)
+        .values(run_at=func.now() + lease, locked_at=func.now())
+        .returning(Job.run_at)
+    )
+    lease_expires_at = result.scalar_one_or_none()
+    if lease_expires_at is None:
+        return False
+    job.lease_expires_at = lease_expires_at
+    return True
+
+
+async def complete_job(session: AsyncSession, job: ClaimedJob, worker_id: str) -> bool:
+    result = await session.execute(delete(Job).where(_owned(job, worker_id)))
+    return result.rowcount == 1
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff: base, 2*base, 4*base, ... capped"""
+    return min(
+        settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.JOB_RETRY_BACKOFF_MAX_SECONDS,
+    )
+
+
+async def fail_job(
+    session: AsyncSession, job: ClaimedJob, worker_id: str, error: str, permanent: bool = False
+) -> Optional[str]:
+    """Schedules a retry with backoff, or marks the job dead; returns the new status (None if the lease was lost)"""
+    dead = permanent or job.attempts >= job.max_attempts
+    new_status = JOB_DEAD if dead else JOB_PENDING
+    values: Dict[str, Any] = {
+        "status": new_status,
+        "last_error": error[:2000],
+        "locked_by": None,
+        "locked_at": None,
+    }
+    if not dead:
+        values["run_at"] = datetime.now(timezone.utc) + timedelta(seconds=retry_delay(job.attempts))
+    result = await session.execute(update(Job).where(_owned(job, worker_id)).values(**values))
+    return new_status if result.rowcount == 1 else None
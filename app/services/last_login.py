@@ -0,0 +1,96 @@
+# app/services/last_login.py
+"""
+Write-behind for User.last_login.
+
+Logins only note the time here; every LAST_LOGIN_FLUSH_SECONDS the buffered
+times (the latest per user) are written by one UPDATE ... FROM (VALUES ...).
+The UPDATE never moves last_login backwards, so several workers flushing the
+same user in any order end with the latest login. last_login therefore lags
+by up to one flush interval, and is lost for the interval a worker crashes in.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime, column, or_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.core.config import get_settings
+from app.core.database import async_session
+from app.models.user import User
+from app.services import metrics
+
+settings = get_settings()
+
+FLUSH_CHUNK = 5000  # rows per statement; two bind parameters each, well under the protocol limit
+
+
+class LastLoginBuffer:
+    def __init__(self):
+        self._pending: Dict[UUID, datetime] = {}
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def note(self, user_id: UUID, at: datetime) -> None:
+        current = self._pending.get(user_id)
+        if current is None or at > current:
+            self._pending[user_id] = at
+        metrics.set_gauge("last_login.pending", len(self._pending))
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        items = list(pending.items())
+        started = time.perf_counter()
+        try:
+            async with async_session.begin() as session:
+                for start in range(0, len(items), FLUSH_CHUNK):
+                    logins = values(
+                        column("id", PG_UUID(as_uuid=True)),
+                        column("last_login", DateTime(timezone=True)),
+                        name="logins",
+                    ).data(items[start:start + FLUSH_CHUNK])
+                    await session.execute(
+                        update(User)
+                        .where(User.id == logins.c.id)
+                        .where(or_(User.last_login.is_(None), User.last_login < logins.c.last_login))
+                        .values(last_login=logins.c.last_login)
+                    )
+        except Exception:
+            # Put them back for the next round, keeping anything newer noted meanwhile
+            for user_id, at in items:
+                self.note(user_id, at)
+            metrics.increment("last_login.flush_errors")
+            raise
+        metrics.observe("last_login.flush", time.perf_counter() - started)
+        metrics.increment("last_login.written", len(items))
+        metrics.set_gauge("last_login.pending", len(self._pending))
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=settings.LAST_LOGIN_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[LastLogin] Flush failed, retrying next interval: {e!r}")
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the timer; its loop flushes once more on the way out"""
+        if self._task is None:
+            return
+        self._stop.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+last_login_buffer = LastLoginBuffer()
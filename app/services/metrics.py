@@ -0,0 +1,34 @@
+# app/services/metrics.py
+# Minimal in-process metrics registry (per worker), exposed as JSON at /metrics
+import time
+from collections import defaultdict
+from typing import Dict
+
+_counters: Dict[str, float] = defaultdict(float)
+_gauges: Dict[str, float] = {}
+_timings: Dict[str, Dict[str, float]] = {}
+
+
+def increment(name: str, value: float = 1) -> None:
+    _counters[name] += value
+
+
+def set_gauge(name: str, value: float) -> None:
+    _gauges[name] = value
+
+
+def observe(name: str, seconds: float) -> None:
+    """Records a duration as count/sum/max, enough for rate and mean latency"""
+    timing = _timings.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+    timing["count"] += 1
+    timing["sum"] += seconds
+    timing["max"] = max(timing["max"], seconds)
+
+
+def snapshot() -> dict:
+    return {
+        "timestamp": time.time(),
+        "counters": dict(_counters),
+        "gauges": dict(_gauges),
+        "timings": {name: dict(values) for name, values in _timings.items()},
+    }
@@ -0,0 +1,39 @@
+# app/services/pagination.py
+import base64
+import json
+from typing import Any, List, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_, ColumnElement
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encodes the sort key of the last row of a page into an opaque cursor"""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decodes a cursor produced by encode_cursor, expecting `size` key values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def keyset_condition(columns: Sequence[Any], values: Sequence[Any], descending: bool = False) -> ColumnElement[bool]:
+    """Returns the row-value comparison selecting rows after the cursor position"""
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def escape_like(value: str) -> str:
+    """Escapes LIKE wildcards so user input is matched literally (use with escape='\\')"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -3,13 +3,14 @@ from typing import List
 from uuid import UUID
 
 from fastapi import HTTPException, status, Depends
-from sqlalchemy import case, and_, true, ColumnElement
+from sqlalchemy import case, ColumnElement
 from sqlalchemy.sql.elements import Case
 
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.models.user_role import UserRole
 from app.schemas.user import UserCreate
+from app.services import policy
 
 
 def get_role_order() -> Case:
@@ -25,39 +26,13 @@ def get_role_order() -> Case:
     )
 
 def validate_user_creation_permissions(current_user: User, new_user: UserCreate):
-    if current_user.role == UserRole.senior_editor:
-        if new_user.role not in {UserRole.senior_editor, UserRole.editor}:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Senior editors can only create senior editor or editor users"
-            )
-    elif current_user.role == UserRole.editor:
-        if new_user.role not in {UserRole.category_editor}:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Editors can only create category_editor users"
-            )
-    elif current_user.role == UserRole.category_editor:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Category editors cannot create users"
-        )
+    policy.authorize(current_user, policy.CREATE, new_user)
 
 def validate_user_update_permissions(current_user: User, target_user: User):
-    if current_user.role == UserRole.senior_editor :
-        if target_user.role not in {UserRole.editor, UserRole.category_editor}:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Senior editors can only update editor or category_editor users"
-            )
+    policy.authorize(current_user, policy.UPDATE, target_user)
 
 def validate_user_deactivate_reactivate(current_user: User, target_user: User):
-    if current_user.role == UserRole.senior_editor:
-        if target_user.role not in {UserRole.editor, UserRole.category_editor}:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Senior editors can only manage editor or category_editor users"
-            )
+    policy.authorize(current_user, policy.MANAGE, target_user)
 
 def require_admin(user: User = Depends(get_current_user)) -> User:
     if user.role != UserRole.admin:  # Use enum comparison
@@ -88,55 +63,11 @@ def prevent_self_action_on_user(current_user: User, target_user_id: UUID):
 
 def get_user_visibility_condition(current_user: User) -> ColumnElement[bool]:
     """Returns SQLAlchemy condition for user visibility based on role"""
-    if current_user.role == UserRole.admin:
-        return true()  # SQLAlchemy "true" condition
-
-    elif current_user.role == UserRole.senior_editor:
-        return User.role.in_([# type: ignore
-            UserRole.senior_editor,
-            UserRole.editor,
-            UserRole.category_editor
-        ])
-
-    elif current_user.role == UserRole.editor:
-        return and_(
-            User.role == UserRole.category_editor,
-            User.created_by_id == current_user.id
-        )
-
-    else:  # This handles UserRole.category_editor and any unknown roles
-        return and_(
-             current_user.role == UserRole.category_editor,
-             User.role == UserRole.category_editor,
-            User.created_by_id == current_user.created_by_id
-        )
+    return policy.sql_condition(current_user, policy.VIEW)
 
 def user_has_permission(current_user: User, target_user: User) -> bool:
     """Checks if current user can view target user"""
-    if current_user.role == UserRole.admin:
-        return True
-
-    elif current_user.role == UserRole.senior_editor:
-        return target_user.role in [
-            UserRole.senior_editor,
-            UserRole.editor,
-            UserRole.category_editor
-        ]
-
-    elif current_user.role == UserRole.editor:
-        return (
-                target_user.role == UserRole.category_editor and
-                target_user.created_by_id == current_user.id
-        )
-    else:  # This handles UserRole.category_editor and any unknown roles
-        return (
-            current_user.role == UserRole.category_editor and
-            target_user.role == UserRole.category_editor and
-            target_user.created_by_id == current_user.created_by_id
-        )
+    return policy.allows(current_user, policy.VIEW, target_user)
 
 def filter_users_by_role_viewer(viewer: User, users: List[User]) -> List[User]:
-    if viewer.role == UserRole.senior_editor:
-        allowed_roles = {UserRole.senior_editor,UserRole.editor, UserRole.category_editor}
-        return [u for u in users if u.role in allowed_roles]
-    return users  # admin sees all
\ No newline at end of file
+    return [u for u in users if policy.allows(viewer, policy.VIEW, u)]
@@ -0,0 +1,159 @@
+# app/services/policy.py
+"""
+Who may do what to which users, as one table.
+
+POLICY maps a viewer's role and an action to a Grant: the target roles it covers
+and a scope (any such user, users the viewer created, or users created by the
+viewer's own creator). Each (role, action) compiles once into a SQLAlchemy
+condition on User and a Python check for loaded rows, so list queries, single
+fetches and permission checks all apply the same rules. Scoped conditions bind the
+viewer-specific value as :policy_anchor, which keeps the compiled SQL shared
+between viewers of the same role.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, bindparam, false, true, ColumnElement
+
+from app.models.user import User
+from app.models.user_role import UserRole
+
+# Actions
+VIEW = "view"
+CREATE = "create"  # checks the requested role only; the user does not exist yet
+UPDATE = "update"
+MANAGE = "manage"  # deactivate / reactivate
+
+# Scopes
+ANY = "any"
+OWN = "own"  # created by the viewer
+SIBLING = "sibling"  # created by the viewer's creator
+
+ALL_ROLES = frozenset(UserRole)
+ANCHOR = "policy_anchor"
+
+
+@dataclass(frozen=True)
+class Grant:
+    roles: FrozenSet[UserRole]
+    scope: str = ANY
+    detail: str = "Unauthorized access"  # 403 detail when a target is not covered
+
+
+NOTHING = frozenset()
+EDITING = frozenset({UserRole.editor, UserRole.category_editor})
+CATEGORY = frozenset({UserRole.category_editor})
+
+POLICY: Dict[UserRole, Dict[str, Grant]] = {
+    UserRole.admin: {
+        VIEW: Grant(ALL_ROLES),
+        CREATE: Grant(ALL_ROLES),
+        UPDATE: Grant(ALL_ROLES),
+        MANAGE: Grant(ALL_ROLES),
+    },
+    UserRole.senior_editor: {
+        VIEW: Grant(ALL_ROLES - {UserRole.admin}),
+        CREATE: Grant(frozenset({UserRole.senior_editor, UserRole.editor}),
+                      detail="Senior editors can only create senior editor or editor users"),
+        UPDATE: Grant(EDITING, detail="Senior editors can only update editor or category_editor users"),
+        MANAGE: Grant(EDITING, detail="Senior editors can only manage editor or category_editor users"),
+    },
+    UserRole.editor: {
+        VIEW: Grant(CATEGORY, OWN),
+        CREATE: Grant(CATEGORY, detail="Editors can only create category_editor users"),
+        UPDATE: Grant(CATEGORY, OWN),
+        MANAGE: Grant(CATEGORY, OWN),
+    },
+    UserRole.category_editor: {
+        VIEW: Grant(CATEGORY, SIBLING),
+        CREATE: Grant(NOTHING, detail="Category editors cannot create users"),
+        UPDATE: Grant(CATEGORY, SIBLING),
+        MANAGE: Grant(CATEGORY, SIBLING),
+    },
+}
+
+
+@dataclass(frozen=True)
+class CompiledGrant:
+    condition: ColumnElement[bool]  # on User; scoped grants reference :policy_anchor
+    check: Callable[[Any, Optional[UUID]], bool]  # (target with .role/.created_by_id, anchor)
+    scope: str
+    detail: str
+
+
+def grant_for(role: UserRole, action: str) -> Grant:
+    return POLICY.get(role, {}).get(action) or Grant(NOTHING)
+
+
+@lru_cache(maxsize=None)
+def compile_grant(role: UserRole, action: str, anchor_is_null: bool = False) -> CompiledGrant:
+    """anchor_is_null picks IS NULL for scoped grants of viewers without a creator (Python None == None)"""
+    grant = grant_for(role, action)
+    roles = grant.roles
+
+    if not roles:
+        condition, check = false(), (lambda target, anchor: False)
+    elif grant.scope == ANY and roles >= ALL_ROLES:
+        condition, check = true(), (lambda target, anchor: True)
+    else:
+        condition = User.role.in_(sorted(roles))
+        if grant.scope == ANY:
+            check = lambda target, anchor: target.role in roles
+        else:
+            anchor_column = User.created_by_id.is_(None) if anchor_is_null else User.created_by_id == bindparam(ANCHOR)
+            condition = condition & anchor_column
+            check = lambda target, anchor: target.role in roles and target.created_by_id == anchor
+    return CompiledGrant(condition, check, grant.scope, grant.detail)
+
+
+def _anchor(viewer: User, scope: str) -> Optional[UUID]:
+    if scope == OWN:
+        return viewer.id
+    if scope == SIBLING:
+        return viewer.created_by_id
+    return None
+
+
+def resolve(viewer: User, action: str) -> Tuple[CompiledGrant, Dict[str, Any]]:
+    """The viewer's compiled grant and the bind values its condition needs"""
+    scope = grant_for(viewer.role, action).scope
+    anchor = _anchor(viewer, scope)
+    compiled = compile_grant(viewer.role, action, scope != ANY and anchor is None)
+    params = {ANCHOR: anchor} if scope != ANY and anchor is not None else {}
+    return compiled, params
+
+
+def sql_condition(viewer: User, action: str = VIEW) -> ColumnElement[bool]:
+    """Self-contained SQL condition (anchor value bound in) for ad-hoc statements"""
+    compiled, params = resolve(viewer, action)
+    return compiled.condition.params(params) if params else compiled.condition
+
+
+def allows(viewer: User, action: str, target: Any) -> bool:
+    compiled, _ = resolve(viewer, action)
+    return compiled.check(target, _anchor(viewer, compiled.scope))
+
+
+def authorize(viewer: User, action: str, target: Any) -> None:
+    compiled, _ = resolve(viewer, action)
+    if not compiled.check(target, _anchor(viewer, compiled.scope)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=compiled.detail)
+
+
+@lru_cache(maxsize=256)
+def _restricted(stmt: Select, role: UserRole, action: str, anchor_is_null: bool) -> Select:
+    return stmt.where(compile_grant(role, action, anchor_is_null).condition)
+
+
+def restrict(stmt: Select, viewer: User, action: str = VIEW) -> Tuple[Select, Dict[str, Any]]:
+    """
+    A prebuilt statement (app/crud/statements.py) narrowed to what the viewer may act on,
+    plus the bind values to execute it with. Memoized per statement object, so only pass
+    module-level statements.
+    """
+    compiled, params = resolve(viewer, action)
+    anchor_is_null = compiled.scope != ANY and not params
+    return _restricted(stmt, viewer.role, action, anchor_is_null), params
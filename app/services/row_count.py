@@ -0,0 +1,65 @@
+# app/services/row_count.py
+import json
+from typing import Optional
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.common import CountMode
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+async def exact_count(session: AsyncSession, stmt: Select) -> int:
+    """Counts the rows of stmt"""
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    return (await session.execute(count_stmt)).scalar_one()
+
+
+async def table_row_estimate(session: AsyncSession, table_name: str) -> Optional[int]:
+    """Returns pg_class.reltuples for the table, or None if it was never analyzed"""
+    result = await session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": f'"{table_name}"'},
+    )
+    estimate = result.scalar_one_or_none()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def planner_row_estimate(session: AsyncSession, stmt: Select) -> int:
+    """Returns the planner's row estimate for stmt without executing it"""
+    compiled = stmt.order_by(None).compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True},
+    )
+    conn = await session.connection()
+    # exec_driver_sql keeps the literal SQL intact (no bind parsing of '::' casts)
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(
+    session: AsyncSession,
+    stmt: Select,
+    mode: CountMode,
+    unfiltered_table: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Returns the total for stmt according to mode. When the statement has no
+    filters, pass unfiltered_table so the estimate comes straight from pg_class.
+    """
+    if mode == CountMode.none:
+        return None
+    if mode == CountMode.exact:
+        return await exact_count(session, stmt)
+    if unfiltered_table:
+        estimate = await table_row_estimate(session, unfiltered_table)
+        if estimate is not None:
+            return estimate
+    return await planner_row_estimate(session, stmt)
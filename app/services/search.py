@@ -0,0 +1,76 @@
+# app/services/search.py
+"""
+Autocomplete-style text search on pg_trgm GIN indexes.
+
+Rows match when a column starts with the query or contains it fuzzily
+(word_similarity above pg_trgm.word_similarity_threshold); both predicates are
+answered by the gin_trgm_ops indexes. Results rank prefix matches first, then by
+similarity, then by id, and page with a keyset cursor over that same key.
+Columns passed in must be the indexed expressions (already lower-cased), the
+first of them NOT NULL.
+"""
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, String, false, func, literal, or_, ColumnElement
+
+from app.services.pagination import decode_cursor, encode_cursor, keyset_condition, escape_like
+
+SEARCH_MIN_LENGTH = 2  # one character matches too much of the table to rank quickly
+SEARCH_MAX_LENGTH = 100
+
+
+def normalize_query(q: str) -> str:
+    q = " ".join(q.split()).lower()
+    if len(q) < SEARCH_MIN_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Search needs at least {SEARCH_MIN_LENGTH} characters"
+        )
+    return q
+
+
+def text_match(q: str, columns: Sequence[Any]) -> Tuple[ColumnElement[bool], ColumnElement[bool], ColumnElement[float]]:
+    """(WHERE condition, is-prefix rank, similarity rank) for a normalized query over the columns"""
+    term = literal(q, String)
+    pattern = escape_like(q) + "%"
+    prefixes = [column.like(pattern, escape="\\") for column in columns]
+    fuzzy = [term.op("<%", is_comparison=True)(column) for column in columns]
+    # NULL columns (e.g. no full_name) must not make the rank NULL, or the keyset breaks
+    is_prefix = func.coalesce(or_(*prefixes), false()).label("is_prefix")
+    # GREATEST skips NULLs; the first column is NOT NULL, so this never is
+    similarity = func.greatest(*[func.word_similarity(term, column) for column in columns]).label("similarity")
+    return or_(*prefixes, *fuzzy), is_prefix, similarity
+
+
+def search_page_query(
+    stmt: Select,
+    q: str,
+    columns: Sequence[Any],
+    id_column: Any,
+    limit: int,
+    cursor: Optional[str],
+) -> Select:
+    """Adds the match, ranking, cursor and limit + 1 to a select of the result columns"""
+    condition, is_prefix, similarity = text_match(q, columns)
+    stmt = stmt.add_columns(is_prefix, similarity).where(condition)
+    if cursor:
+        last_prefix, last_similarity, last_id = decode_cursor(cursor, 3)
+        try:
+            if not isinstance(last_prefix, bool):
+                raise TypeError
+            position = (last_prefix, float(last_similarity), UUID(last_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        stmt = stmt.where(keyset_condition((is_prefix, similarity, id_column), position, descending=True))
+    return stmt.order_by(is_prefix.desc(), similarity.desc(), id_column.desc()).limit(limit + 1)
+
+
+def split_page(rows: List[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trims the extra row and returns (rows, next_cursor)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.is_prefix, last.similarity, last.id)
@@ -0,0 +1,122 @@
+# app/tasks/job_handlers.py
+# Job kind -> coroutine taking the job payload. Handlers open their own sessions and must be idempotent.
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.database import async_session
+from app.core.email_utils import send_email
+from app.models.password_reset_token import PasswordResetToken
+from app.models.user import User
+from app.services.auth.token_cleanup import purge_expired_tokens, ensure_token_partitions, \
+    drop_expired_token_partitions, DEFAULT_PARTITION, TOKEN_TABLE
+from app.services.image_service import apply_staged_profile_image, delete_image
+from app.services.job_queue import PermanentJobError, JOB_SEND_EMAIL, JOB_SEND_RESET_EMAIL, \
+    JOB_SEND_ADMIN_RESET_EMAIL, JOB_RESIZE_PROFILE_IMAGE, JOB_PURGE_RESET_TOKENS
+
+settings = get_settings()
+
+
+async def send_email_job(payload: Dict[str, Any]) -> None:
+    await send_email(subject=payload["subject"], to_email=payload["to_email"], body=payload["body"])
+
+
+# The two reset emails carry secrets, so their payloads hold ids only and the body is built here
+async def send_reset_email_job(payload: Dict[str, Any]) -> None:
+    async with async_session() as session:
+        row = (await session.execute(
+            select(PasswordResetToken.token, User.email, User.full_name)
+            .join(User, User.id == PasswordResetToken.user_id)
+            .where(
+                PasswordResetToken.id == UUID(payload["token_id"]),
+                PasswordResetToken.expires_at > datetime.now(timezone.utc),
+            )
+        )).first()
+    if row is None:
+        # Used, expired or purged: the link would not work any more
+        print(f"[Jobs] Reset token {payload['token_id']} is gone, not sending its email")
+        return
+    reset_url = f"{settings.RESET_LINK_BASE}{row.token}"
+    body = (
+        f"Hello {row.full_name},\n\n"
+        f"To reset your password, Click the link below to reset your password: (valid for {settings.RESET_TOKEN_LIFETIME_MINUTES} minutes):\n\n"
+        f"{reset_url}\n\n"
+        "If you didn’t request this, you can ignore this email.\n\n"
+        "Best regards,\nYour Support Team"
+    )
+    await send_email(subject="Password Reset Request", to_email=row.email, body=body)
+
+
+async def send_admin_reset_email_job(payload: Dict[str, Any]) -> None:
+    async with async_session() as session:
+        row = (await session.execute(
+            select(User.email, User.full_name).where(
+                User.id == UUID(payload["user_id"]),
+                User.must_change_password.is_(True),
+            )
+        )).first()
+    if row is None:
+        # Deleted, or the one-time password was already replaced
+        print(f"[Jobs] User {payload['user_id']} no longer has a one-time password, not sending its email")
+        return
+    body = (
+        f"Hello {row.full_name},\n\n"
+        "Your account password has been reset by an administrator.\n"
+        f"Your new one-time password is: {settings.ONE_TIME_PASSWORD}\n\n"
+        "You must change your password after logging in.\n\n"
+        "Best regards,\n"
+        "Your CMS Team"
+    )
+    await send_email(subject="Your password was reset by an admin", to_email=str(row.email), body=body)
+
+
+async def resize_profile_image_job(payload: Dict[str, Any]) -> None:
+    try:
+        async with async_session.begin() as session:
+            old_filename = await apply_staged_profile_image(
+                session,
+                UUID(payload["user_id"]),
+                payload["staged"],
+                tuple(payload["resize_size"]),
+                payload["subdir"],
+            )
+    except HTTPException as e:
+        if e.status_code == 400:  # not a decodable image, retrying will not change that
+            delete_image(payload["staged"])
+            raise PermanentJobError(e.detail) from e
+        raise
+    # Only after the new picture is committed
+    if old_filename:
+        delete_image(old_filename)
+    delete_image(payload["staged"])
+
+
+async def purge_reset_tokens_job(payload: Dict[str, Any]) -> None:
+    table = TOKEN_TABLE
+    if settings.RESET_TOKEN_PARTITIONED:
+        async with async_session.begin() as session:
+            await ensure_token_partitions(session, settings.RESET_TOKEN_PARTITION_DAYS_AHEAD)
+            dropped = await drop_expired_token_partitions(session)
+        print(f"[Jobs] Dropped {len(dropped)} expired password reset token partitions")
+        # Rows that landed in the default partition are still purged row by row
+        table = DEFAULT_PARTITION
+    count = await purge_expired_tokens(
+        async_session,
+        batch_size=settings.RESET_TOKEN_PURGE_BATCH_SIZE,
+        time_budget_seconds=settings.RESET_TOKEN_PURGE_TIME_BUDGET_SECONDS,
+        table=table,
+    )
+    print(f"[Jobs] Deleted {count} expired password reset tokens")
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+    JOB_SEND_EMAIL: send_email_job,
+    JOB_SEND_RESET_EMAIL: send_reset_email_job,
+    JOB_SEND_ADMIN_RESET_EMAIL: send_admin_reset_email_job,
+    JOB_RESIZE_PROFILE_IMAGE: resize_profile_image_job,
+    JOB_PURGE_RESET_TOKENS: purge_reset_tokens_job,
+}
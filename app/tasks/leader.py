@@ -0,0 +1,120 @@
+#app/tasks/leader.py
+import asyncio
+import hashlib
+import os
+import socket
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.database import engine, async_session
+from app.models.scheduler_job_run import SchedulerJobRun
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def advisory_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock derived from a name"""
+    return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+
+
+class LeaderElector:
+    """
+    Leader election on a Postgres session-level advisory lock.
+
+    The lock lives on a dedicated autocommit connection, so it is released as soon
+    as the holder's connection goes away (process exit, crash, network loss) and
+    another process picks it up on its next renew(). renew() runs every few
+    seconds: followers retry pg_try_advisory_lock, the leader checks its
+    connection is still alive and steps down if it is not.
+    Requires a direct connection; a transaction-pooling proxy would break it.
+    """
+
+    def __init__(self, name: str, renew_timeout: float = 5.0):
+        self.name = name
+        self.key = advisory_key(name)
+        self.renew_timeout = renew_timeout
+        self.is_leader = False
+        self._conn: Optional[AsyncConnection] = None
+
+    async def renew(self) -> bool:
+        try:
+            await asyncio.wait_for(self._renew(), timeout=self.renew_timeout)
+        except Exception as e:
+            if self.is_leader:
+                print(f"[Leader] {WORKER_ID} lost leadership of {self.name}: {e!r}")
+            await self._drop_connection()
+        return self.is_leader
+
+    async def _renew(self) -> None:
+        if self._conn is None:
+            self._conn = await engine.connect()
+            await self._conn.execution_options(isolation_level="AUTOCOMMIT")
+        if self.is_leader:
+            await self._conn.execute(text("SELECT 1"))  # lease check: the lock is held while this connection lives
+            return
+        acquired = (await self._conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+        )).scalar()
+        if acquired:
+            self.is_leader = True
+            print(f"[Leader] {WORKER_ID} is now leader for {self.name}")
+
+    async def _drop_connection(self) -> None:
+        self.is_leader = False
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                await conn.invalidate()
+            except Exception:
+                pass
+
+    async def release(self) -> None:
+        if self._conn is not None and self.is_leader:
+            try:
+                await self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            except Exception:
+                pass
+        conn, self._conn = self._conn, None
+        self.is_leader = False
+        if conn is not None:
+            await conn.close()
+
+
+async def record_job_run(job_id: str, started_at: datetime, status: str, error: Optional[str] = None) -> None:
+    values = {
+        "job_id": job_id,
+        "last_run_by": WORKER_ID,
+        "last_started_at": started_at,
+        "last_finished_at": datetime.now(timezone.utc),
+        "last_status": status,
+        "last_error": error,
+    }
+    stmt = pg_insert(SchedulerJobRun).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SchedulerJobRun.job_id],
+        set_={key: stmt.excluded[key] for key in values if key != "job_id"},
+    )
+    async with async_session.begin() as session:
+        await session.execute(stmt)
+
+
+def leader_only(elector: LeaderElector, job_id: str, job: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+    """Wraps a scheduled job so only the current leader runs it, and records the run"""
+    @wraps(job)
+    async def run() -> None:
+        if not elector.is_leader:
+            return
+        started_at = datetime.now(timezone.utc)
+        try:
+            await job()
+        except Exception as e:
+            print(f"[Scheduler] Job {job_id} failed: {e!r}")
+            await record_job_run(job_id, started_at, "failed", repr(e)[:1000])
+            return
+        await record_job_run(job_id, started_at, "succeeded")
+    return run
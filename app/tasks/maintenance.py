@@ -0,0 +1,35 @@
+# app/tasks/maintenance.py
+"""
+One-off maintenance commands.
+
+    python -m app.tasks.maintenance partition-reset-tokens
+
+After converting, set RESET_TOKEN_PARTITIONED=true so the cleanup job creates and
+drops daily partitions instead of deleting rows.
+"""
+import argparse
+import asyncio
+
+from app.core.config import get_settings
+from app.core.database import async_session
+from app.services.auth.token_cleanup import partition_token_table
+
+settings = get_settings()
+
+
+async def partition_reset_tokens() -> None:
+    async with async_session.begin() as session:
+        await partition_token_table(session, settings.RESET_TOKEN_PARTITION_DAYS_AHEAD)
+    print("[Maintenance] password_reset_token is now partitioned by expires_at")
+
+
+COMMANDS = {
+    "partition-reset-tokens": partition_reset_tokens,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CMS maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command]())
@@ -1,26 +1,53 @@
 #app/tasks/scheduler.py
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from app.services.auth.token_cleanup import delete_expired_tokens
+from datetime import datetime, timezone
+from typing import Optional, TYPE_CHECKING
+
+from app.core.config import get_settings
+from app.services.job_queue import enqueue, JOB_PURGE_RESET_TOKENS, PRIORITY_LOW
 from app.core.database import async_session
+from app.tasks.leader import LeaderElector, leader_only
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-scheduler = AsyncIOScheduler()
+settings = get_settings()
+
+scheduler: Optional["AsyncIOScheduler"] = None  # created by start_scheduler, so APScheduler loads only then
+# Every worker runs the scheduler, but only the advisory-lock holder runs the jobs
+elector = LeaderElector("cms-scheduler", renew_timeout=settings.SCHEDULER_LEASE_RENEW_SECONDS)
 
 def start_scheduler():
+    global scheduler
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    scheduler = AsyncIOScheduler()
     scheduler.start()
     scheduler.add_job(
-        clean_expired_tokens_job,
+        elector.renew,
+        trigger=IntervalTrigger(seconds=settings.SCHEDULER_LEASE_RENEW_SECONDS),
+        id="leader_election",
+        next_run_time=datetime.now(timezone.utc),
+        coalesce=True,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        leader_only(elector, "cleanup_expired_tokens", clean_expired_tokens_job),
         trigger=IntervalTrigger(minutes=10),
         id="cleanup_expired_tokens",
         replace_existing=True,
     )
     print("[Scheduler] APScheduler started")
 
-def shutdown_scheduler():
+async def shutdown_scheduler():
+    if scheduler is None:
+        return
     scheduler.shutdown(wait=False)
+    await elector.release()
     print("[Scheduler] APScheduler shutdown")
 
 async def clean_expired_tokens_job():
-    async with async_session() as session:
-        count = await delete_expired_tokens(session)
-        print(f"[Scheduler] Deleted {count} expired password reset tokens")
\ No newline at end of file
+    # The purge itself runs on a job worker; the dedupe key keeps at most one queued
+    async with async_session.begin() as session:
+        job_id = await enqueue(session, JOB_PURGE_RESET_TOKENS, {}, priority=PRIORITY_LOW, dedupe_key=JOB_PURGE_RESET_TOKENS)
+    print(f"[Scheduler] Expired token purge {'queued' if job_id else 'already queued'}")
@@ -0,0 +1,114 @@
+# app/tasks/worker.py
+"""
+Background job worker.
+
+    python -m app.tasks.worker [--concurrency 4] [--batch-size 10]
+
+Runs --concurrency claim loops, each leasing up to --batch-size due jobs at a time
+with FOR UPDATE SKIP LOCKED and running them in turn; a job's lease is renewed
+right before it runs, so slow jobs early in a batch never eat into later ones. Scale throughput by starting more processes, on any
+machine that reaches the database (and, for image jobs, the shared IMAGE_UPLOAD_DIR).
+SIGINT/SIGTERM stop claiming and let the jobs in hand finish.
+"""
+import argparse
+import asyncio
+import signal
+import time
+import traceback
+from datetime import datetime, timezone
+
+from app.core.config import get_settings
+from app.core.database import async_session, engine
+from app.services.job_queue import ClaimedJob, PermanentJobError, claim_jobs, complete_job, fail_job, renew_lease
+from app.tasks.job_handlers import JOB_HANDLERS
+from app.tasks.leader import WORKER_ID
+
+settings = get_settings()
+
+
+async def run_job(job: ClaimedJob, worker_id: str) -> None:
+    handler = JOB_HANDLERS.get(job.kind)
+    started = time.monotonic()
+    error, permanent = None, False
+    if handler is None:
+        error, permanent = f"No handler for job kind {job.kind!r}", True
+    else:
+        # Never run past the lease: after that another worker may already have the job
+        remaining = (job.lease_expires_at - datetime.now(timezone.utc)).total_seconds()
+        try:
+            await asyncio.wait_for(handler(job.payload), timeout=max(remaining, 0.001))
+        except PermanentJobError as e:
+            error, permanent = str(e) or repr(e), True
+        except Exception as e:
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+
+    async with async_session.begin() as session:
+        if error is None:
+            settled = await complete_job(session, job, worker_id)
+            outcome = "done"
+        else:
+            outcome = await fail_job(session, job, worker_id, error, permanent)
+            settled = outcome is not None
+    if not settled:
+        print(f"[Worker] {worker_id} lost the lease on job {job.id} ({job.kind}) before settling it")
+        return
+    took = time.monotonic() - started
+    if error is None:
+        print(f"[Worker] {job.kind} {job.id} done in {took:.2f}s")
+    else:
+        print(f"[Worker] {job.kind} {job.id} attempt {job.attempts}/{job.max_attempts} failed -> {outcome}: {error}")
+
+
+async def claim_loop(worker_id: str, batch_size: int, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            async with async_session.begin() as session:
+                jobs = await claim_jobs(session, worker_id, batch_size, settings.JOB_VISIBILITY_TIMEOUT_SECONDS)
+        except Exception as e:
+            print(f"[Worker] {worker_id} claim failed: {e!r}")
+            jobs = []
+        if not jobs:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        for index, job in enumerate(jobs):
+            # Jobs left unrun after a stop become due again when their lease runs out
+            if stop.is_set():
+                break
+            # The batch shares one claim time; each later job gets its own full lease before it runs
+            if index > 0:
+                try:
+                    async with async_session.begin() as session:
+                        renewed = await renew_lease(session, job, worker_id, settings.JOB_VISIBILITY_TIMEOUT_SECONDS)
+                except Exception as e:
+                    print(f"[Worker] {worker_id} could not renew the lease on job {job.id}: {e!r}")
+                    continue
+                if not renewed:
+                    print(f"[Worker] {worker_id} lost the lease on job {job.id} ({job.kind}) before running it")
+                    continue
+            await run_job(job, worker_id)
+
+
+async def run_worker(concurrency: int, batch_size: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    print(f"[Worker] {WORKER_ID} started with {concurrency} loops, batch size {batch_size}")
+    try:
+        await asyncio.gather(*(
+            claim_loop(f"{WORKER_ID}/{i}", batch_size, stop) for i in range(concurrency)
+        ))
+    finally:
+        await engine.dispose()
+    print(f"[Worker] {WORKER_ID} stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the background job worker")
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=settings.JOB_CLAIM_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.concurrency, args.batch_size))
@@ -0,0 +1,64 @@
+# benchmarks/link_concurrency.py
+"""
+Hammers one (user, branch) pair with concurrent add/remove calls against a local
+Postgres and checks that exactly one call per round wins.
+
+    python -m benchmarks.link_concurrency --rounds 50 --concurrency 32
+"""
+import argparse
+import asyncio
+import secrets
+from uuid import uuid4
+
+from sqlalchemy import delete
+
+from app.core.database import async_session
+from app.crud.user_branch_link import add_user_to_branch, remove_user_from_branch
+from app.models.branch import Branch
+from app.models.user import User
+from app.models.user_branch_link import UserBranchLink
+
+
+async def _add(user_id, branch_id) -> bool:
+    async with async_session.begin() as session:
+        return await add_user_to_branch(session, user_id, branch_id)
+
+
+async def _remove(user_id, branch_id) -> bool:
+    async with async_session.begin() as session:
+        return await remove_user_from_branch(session, user_id, branch_id)
+
+
+async def run(rounds: int, concurrency: int) -> None:
+    user = User(email=f"link-hammer-{secrets.token_hex(6)}@example.com", hashed_password="x")
+    branch = Branch(name=f"link-hammer-{uuid4().hex}")
+    async with async_session() as session:
+        session.add_all([user, branch])
+        await session.commit()
+
+    failures = 0
+    try:
+        for round_number in range(rounds):
+            added = await asyncio.gather(*(_add(user.id, branch.id) for _ in range(concurrency)))
+            removed = await asyncio.gather(*(_remove(user.id, branch.id) for _ in range(concurrency)))
+            if sum(added) != 1 or sum(removed) != 1:
+                failures += 1
+                print(f"round {round_number}: {sum(added)} adds and {sum(removed)} removes won (expected 1 each)")
+    finally:
+        async with async_session() as session:
+            await session.execute(delete(UserBranchLink).where(UserBranchLink.user_id == user.id))
+            await session.delete(await session.get(Branch, branch.id))
+            await session.delete(await session.get(User, user.id))
+            await session.commit()
+
+    print(f"{rounds} rounds x {concurrency} concurrent calls: {failures} failing rounds")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(run(args.rounds, args.concurrency))
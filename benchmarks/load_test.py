@@ -0,0 +1,329 @@
+# benchmarks/load_test.py
+"""
+HTTP load test against a running API, using the logins and ids of a seeded database.
+
+    python -m benchmarks.seed --users 100000 --branches 5000 --manifest seed_manifest.json
+    DB_ECHO=false uvicorn app.main:app --workers 4   # in another shell; statement logging would skew latency
+    python -m benchmarks.load_test --manifest seed_manifest.json --duration 60 --concurrency 50 --output run.json
+    python -m benchmarks.load_test --manifest seed_manifest.json --output run2.json --compare run.json
+
+Each virtual user loops over scenarios picked by weight (--weights me=30,login=5,...).
+Latency is measured client-side per HTTP request, and requests started during
+--warmup are not counted. The report gives requests/s, error count and
+p50/p95/p99/max per route, and --output saves it as JSON with the run settings
+for later --compare. Scenarios write (memberships, uploads, audit rows), so run
+against a disposable database.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import struct
+import subprocess
+import time
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+DEFAULT_WEIGHTS = {
+    "login": 5,
+    "me": 30,
+    "users_page": 20,
+    "branch_list": 20,
+    "membership_edit": 10,
+    "upload_pic": 5,
+    "search": 10,
+}
+PRIVILEGED_ROLES = ("admin", "senior_editor")
+
+
+def tiny_png(size: int = 64) -> bytes:
+    """A valid RGB gradient PNG, built without Pillow"""
+    rows = b"".join(
+        b"\x00" + b"".join(bytes((x * 4 % 256, y * 4 % 256, 128)) for x in range(size)) for y in range(size)
+    )
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+@dataclass
+class Recorder:
+    measure_from: float
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def add(self, route: str, started: float, elapsed: float, status: str, ok: bool) -> None:
+        if started < self.measure_from:
+            return
+        self.latencies[route].append(elapsed)
+        self.statuses[route][status] += 1
+        if not ok:
+            self.errors[route] += 1
+
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    recorder: Recorder
+    manifest: dict
+    password: str
+    session_tokens: List[str]
+    privileged_tokens: List[str]
+    image: bytes
+
+    async def call(self, route: str, method: str, url: str, ok: Sequence[int] = (200,), token: Optional[str] = None,
+                   **kwargs) -> Optional[httpx.Response]:
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.add(route, started, time.perf_counter() - started, type(e).__name__, False)
+            return None
+        self.recorder.add(route, started, time.perf_counter() - started, str(response.status_code),
+                          response.status_code in ok)
+        return response
+
+
+# --- scenarios -----------------------------------------------------------------
+
+def _all_logins(manifest: dict) -> List[str]:
+    return [email for emails in manifest["logins"].values() for email in emails]
+
+
+async def login(ctx: Context, rng: random.Random) -> None:
+    email = rng.choice(_all_logins(ctx.manifest))
+    await ctx.call("POST /auth/login", "POST", "/auth/login", json={"email": email, "password": ctx.password})
+
+
+async def me(ctx: Context, rng: random.Random) -> None:
+    await ctx.call("GET /user/me", "GET", "/user/me", token=rng.choice(ctx.session_tokens))
+
+
+async def users_page(ctx: Context, rng: random.Random) -> None:
+    # Mostly first pages, as people rarely page deep; 404 is an empty page
+    page = min(int(rng.expovariate(0.5)), 50)
+    await ctx.call("GET /user/all", "GET", "/user/all", ok=(200, 404), token=rng.choice(ctx.session_tokens),
+                   params={"offset": page * 20, "limit": 20})
+
+
+async def branch_list(ctx: Context, rng: random.Random) -> None:
+    token = rng.choice(ctx.privileged_tokens)
+    params = {"limit": 50}
+    for _ in range(1 + rng.randint(0, 3)):
+        response = await ctx.call("GET /branch/", "GET", "/branch/", token=token, params=params)
+        cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+        if not cursor:
+            return
+        params = {"limit": 50, "cursor": cursor}
+
+
+async def membership_edit(ctx: Context, rng: random.Random) -> None:
+    token = rng.choice(ctx.privileged_tokens)
+    candidates = ctx.manifest["user_ids"]["editor"] + ctx.manifest["user_ids"]["category_editor"]
+    params = {"user_id": rng.choice(candidates), "branch_id": rng.choice(ctx.manifest["branch_ids"])}
+    # 400: already linked, 404: was not linked
+    await ctx.call("POST /user-branch-link/add", "POST", "/user-branch-link/add", ok=(201, 400), token=token, params=params)
+    await ctx.call("DELETE /user-branch-link/remove", "DELETE", "/user-branch-link/remove", ok=(200, 404), token=token,
+                   params=params)
+
+
+async def upload_pic(ctx: Context, rng: random.Random) -> None:
+    await ctx.call("POST /user/me/upload-pic", "POST", "/user/me/upload-pic", ok=(202,),
+                   token=rng.choice(ctx.session_tokens), files={"file": ("avatar.png", ctx.image, "image/png")})
+
+
+async def search(ctx: Context, rng: random.Random) -> None:
+    # Prefixes of seeded emails, from broad to nearly unique
+    q = f"{ctx.manifest['prefix']}-{rng.randint(1, 9999)}"[:rng.randint(6, 12)]
+    await ctx.call("GET /user/search", "GET", "/user/search", token=rng.choice(ctx.session_tokens),
+                   params={"q": q, "limit": 10})
+
+
+SCENARIOS: Dict[str, Callable[[Context, random.Random], Awaitable[None]]] = {
+    "login": login,
+    "me": me,
+    "users_page": users_page,
+    "branch_list": branch_list,
+    "membership_edit": membership_edit,
+    "upload_pic": upload_pic,
+    "search": search,
+}
+
+
+# --- driver --------------------------------------------------------------------
+
+async def log_in(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    if response.status_code != 200:
+        raise SystemExit(f"Login as {email} failed with {response.status_code}: {response.text[:200]}")
+    return response.json()["access_token"]
+
+
+async def open_sessions(client: httpx.AsyncClient, manifest: dict, password: str, count: int, rng: random.Random):
+    """(tokens of `count` users across all roles, tokens of admins and senior editors)"""
+    logins = manifest["logins"]
+    privileged = [email for role in PRIVILEGED_ROLES for email in logins[role][:2]]
+    everyone = _all_logins(manifest)
+    sampled = rng.sample(everyone, min(count, len(everyone)))
+    tokens = await asyncio.gather(*(log_in(client, email, password) for email in privileged + sampled))
+    return list(tokens[len(privileged):]), list(tokens[:len(privileged)])
+
+
+async def virtual_user(ctx: Context, names: List[str], weights: List[float], seed: int, deadline: float) -> None:
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        await SCENARIOS[rng.choices(names, weights=weights)[0]](ctx, rng)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(recorder: Recorder, measured_seconds: float) -> Dict[str, dict]:
+    routes = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        ordered = sorted(latencies)
+        routes[route] = {
+            "requests": len(ordered),
+            "errors": recorder.errors.get(route, 0),
+            "rps": len(ordered) / measured_seconds,
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "max_ms": ordered[-1] * 1000,
+            "statuses": dict(recorder.statuses[route]),
+        }
+    every = sorted(value for latencies in recorder.latencies.values() for value in latencies)
+    if every:
+        routes["TOTAL"] = {
+            "requests": len(every),
+            "errors": sum(recorder.errors.values()),
+            "rps": len(every) / measured_seconds,
+            "mean_ms": sum(every) / len(every) * 1000,
+            "p50_ms": percentile(every, 50) * 1000,
+            "p95_ms": percentile(every, 95) * 1000,
+            "p99_ms": percentile(every, 99) * 1000,
+            "max_ms": every[-1] * 1000,
+        }
+    return routes
+
+
+def print_report(routes: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> None:
+    print(f"{'route':<34} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for route, stats in routes.items():
+        print(f"{route:<34} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f}"
+              f" {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+    if baseline is None:
+        return
+    print(f"\n{'vs baseline':<34} {'rps':>16} {'p95 ms':>20} {'p99 ms':>20}")
+    for route, stats in routes.items():
+        before = baseline.get(route)
+        if before is None:
+            continue
+
+        def delta(key: str) -> str:
+            change = (stats[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            return f"{before[key]:.1f} -> {stats[key]:.1f} ({change:+.0f}%)"
+        print(f"{route:<34} {delta('rps'):>16} {delta('p95_ms'):>20} {delta('p99_ms'):>20}")
+
+
+def parse_weights(text: Optional[str]) -> Dict[str, float]:
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in filter(None, (text or "").split(",")):
+        name, _, value = item.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(value)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    password = args.password or manifest["password"]
+    weights = parse_weights(args.weights)
+    rng = random.Random(args.seed)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        session_tokens, privileged_tokens = await open_sessions(client, manifest, password, args.sessions, rng)
+        started = time.perf_counter()
+        recorder = Recorder(measure_from=started + args.warmup)
+        ctx = Context(client, recorder, manifest, password, session_tokens, privileged_tokens, tiny_png())
+        deadline = started + args.warmup + args.duration
+        names = list(weights)
+        await asyncio.gather(*(
+            virtual_user(ctx, names, [weights[name] for name in names], args.seed + i, deadline)
+            for i in range(args.concurrency)
+        ))
+        # Requests still in flight at the deadline finish late; count the time they actually took
+        measured = max(time.perf_counter() - recorder.measure_from, 1e-9)
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "base_url": args.base_url,
+            "duration_seconds": args.duration,
+            "measured_seconds": measured,
+            "warmup_seconds": args.warmup,
+            "concurrency": args.concurrency,
+            "sessions": len(session_tokens),
+            "weights": weights,
+            "seed": args.seed,
+            "dataset": {key: manifest.get(key) for key in ("users", "branches", "links", "fan_out", "seed")},
+        },
+        "routes": summarize(recorder, measured),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay weighted API scenarios and report latency percentiles")
+    parser.add_argument("--manifest", required=True, help="JSON written by benchmarks.seed --manifest")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds run before measuring")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--sessions", type=int, default=50, help="distinct logged-in users shared by the virtual users")
+    parser.add_argument("--weights", help="overrides, e.g. me=50,upload_pic=0")
+    parser.add_argument("--password", help="defaults to the manifest's")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["routes"]
+    print_report(results["routes"], baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
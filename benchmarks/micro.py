@@ -0,0 +1,346 @@
+# benchmarks/micro.py
+"""
+Time and memory of the per-request primitives, with baselines to catch regressions.
+
+    python -m benchmarks.micro                                   # run everything, print a table
+    python -m benchmarks.micro -k token -k permissions           # only cases whose name contains one of these
+    python -m benchmarks.micro --save micro_baseline.json        # record a baseline on this machine
+    python -m benchmarks.micro --compare micro_baseline.json     # exit 1 if a case got slower / bigger
+
+Time is timeit over an auto-ranged number of calls (at least --min-time seconds per
+repeat); min and median per-call times over --repeat repeats are reported, and
+--compare judges the median. Memory is tracemalloc during a separate run: the
+peak above the starting point and what stays allocated per call. tracemalloc only
+sees Python's allocator, so argon2's memory-hard buffer and Pillow's pixel data do
+not show up. Baselines hold machine-specific numbers; compare only against a
+baseline recorded on the same machine and Python.
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple, Type
+from uuid import uuid4
+
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.config import get_settings
+from app.core.security import (
+    create_access_token, decode_access_token, hash_password, validate_password_strength, verify_password
+)
+from app.models.user import User
+from app.models.user_role import UserRole
+from app.schemas.common import PasswordType
+from app.schemas.user import UserCreate, UserRead
+from app.services import permissions
+from app.services.image_service import validate_image_file
+
+settings = get_settings()
+
+GOOD_PASSWORD = "Bench@pass1!"  # passes both PasswordType and validate_password_strength
+IMAGE_SIZES = (256, 1024, 3000)
+IMAGE_FORMATS = ("PNG", "JPEG", "WEBP")
+PROFILE_RESIZE = (300, 300)
+PAGE_SIZE = 50
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], object]
+    expect: Optional[Type[BaseException]] = None  # the call is supposed to raise this
+    note: str = ""
+
+
+def _swallowing(fn: Callable[[], object], expect: Type[BaseException]) -> Callable[[], None]:
+    def call():
+        try:
+            fn()
+        except expect:
+            pass
+    return call
+
+
+# --- cases ---------------------------------------------------------------------
+
+def security_cases() -> List[Case]:
+    hashed = hash_password(GOOD_PASSWORD)
+    token = create_access_token({"sub": str(uuid4()), "role": UserRole.editor})
+    return [
+        Case("hash_password", lambda: hash_password(GOOD_PASSWORD)),
+        Case("verify_password[match]", lambda: verify_password(GOOD_PASSWORD, hashed)),
+        Case("verify_password[mismatch]", lambda: verify_password("Wrong-pass1!", hashed)),
+        Case("create_access_token", lambda: create_access_token({"sub": str(uuid4()), "role": UserRole.editor})),
+        Case("decode_access_token[valid]", lambda: decode_access_token(token)),
+        Case("decode_access_token[tampered]", lambda: decode_access_token(token[:-2] + "xx"), HTTPException),
+    ]
+
+
+def password_rule_cases() -> List[Case]:
+    adapter = TypeAdapter(PasswordType)
+    # Long inputs that fail late are where a backtracking pattern would blow up
+    long_missing_special = "Aa1" + "b" * 200
+    return [
+        Case("validate_password_strength[valid]", lambda: validate_password_strength(GOOD_PASSWORD)),
+        Case("validate_password_strength[no special]", lambda: validate_password_strength("Benchpass1"), HTTPException),
+        Case("PasswordType[valid]", lambda: adapter.validate_python(GOOD_PASSWORD)),
+        Case("PasswordType[no digit]", lambda: adapter.validate_python("Bench@pass!"), ValidationError),
+        Case("PasswordType[203 chars, no special]", lambda: adapter.validate_python(long_missing_special),
+             ValidationError),
+    ]
+
+
+def _encode_image(fmt: str, side: int) -> Optional[bytes]:
+    from PIL import Image, features
+
+    if fmt == "WEBP" and not features.check("webp"):
+        return None
+    # Gradients plus mild noise: compresses like a photo rather than like flat colour or static
+    channels = (
+        Image.linear_gradient("L").resize((side, side)),
+        Image.radial_gradient("L").resize((side, side)),
+        Image.effect_noise((side, side), 8),
+    )
+    buffer = BytesIO()
+    Image.merge("RGB", channels).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def image_cases() -> List[Case]:
+    cases = []
+    for fmt in IMAGE_FORMATS:
+        for side in IMAGE_SIZES:
+            contents = _encode_image(fmt, side)
+            if contents is None:
+                print(f"[Micro] Skipping {fmt}: this Pillow build cannot write it")
+                break
+            # Big lossless encodes can pass MAX_FILE_SIZE_MB; those time the rejection instead
+            too_large = len(contents) > settings.MAX_FILE_SIZE_MB * 1024 * 1024
+            cases.append(Case(
+                f"validate_image_file[{fmt} {side}x{side}]",
+                lambda contents=contents: validate_image_file(contents, settings.MAX_FILE_SIZE_MB, PROFILE_RESIZE),
+                HTTPException if too_large else None,
+                note=f"{len(contents) // 1024} KiB" + (", over MAX_FILE_SIZE_MB" if too_large else ""),
+            ))
+    garbage = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 64
+    cases.append(Case("validate_image_file[corrupt PNG]",
+                      lambda: validate_image_file(garbage, settings.MAX_FILE_SIZE_MB, PROFILE_RESIZE), HTTPException))
+    return cases
+
+
+def _user(role: UserRole, created_by_id=None) -> User:
+    now = datetime.now(timezone.utc)
+    return User(
+        id=uuid4(), email=f"bench-{uuid4().hex[:8]}@example.com", hashed_password="x", full_name="Bench User",
+        role=role, is_active=True, must_change_password=False, created_by_id=created_by_id,
+        last_login=now, created_at=now, updated_at=now, user_pic=None,
+    )
+
+
+def permission_cases() -> List[Case]:
+    admin = _user(UserRole.admin)
+    senior = _user(UserRole.senior_editor, admin.id)
+    editor = _user(UserRole.editor, senior.id)
+    category = _user(UserRole.category_editor, editor.id)
+    own_category = _user(UserRole.category_editor, editor.id)
+    # A page as list endpoints see it: mostly category editors, a fifth of them the viewer's siblings
+    roles = [UserRole.admin, UserRole.senior_editor, UserRole.editor] + [UserRole.category_editor] * 7
+    page = [_user(roles[i % len(roles)], editor.id if i % 5 == 0 else senior.id) for i in range(PAGE_SIZE)]
+    new_category = UserCreate(email="new@example.com", password=GOOD_PASSWORD, role=UserRole.category_editor)
+    new_admin = UserCreate(email="new@example.com", password=GOOD_PASSWORD, role=UserRole.admin)
+    return [
+        Case("user_has_permission[admin]", lambda: permissions.user_has_permission(admin, category)),
+        Case("user_has_permission[editor, own]", lambda: permissions.user_has_permission(editor, own_category)),
+        Case("user_has_permission[category_editor, sibling]",
+             lambda: permissions.user_has_permission(category, own_category)),
+        Case("validate_user_update_permissions[senior_editor]",
+             lambda: permissions.validate_user_update_permissions(senior, editor)),
+        Case("validate_user_update_permissions[editor, denied]",
+             lambda: permissions.validate_user_update_permissions(editor, senior), HTTPException),
+        Case("validate_user_creation_permissions[editor]",
+             lambda: permissions.validate_user_creation_permissions(editor, new_category)),
+        Case("validate_user_creation_permissions[editor, denied]",
+             lambda: permissions.validate_user_creation_permissions(editor, new_admin), HTTPException),
+        Case("validate_user_deactivate_reactivate[editor]",
+             lambda: permissions.validate_user_deactivate_reactivate(editor, own_category)),
+        Case(f"filter_users_by_role_viewer[category_editor, {PAGE_SIZE}]",
+             lambda: permissions.filter_users_by_role_viewer(category, page)),
+        Case("get_user_visibility_condition[editor]", lambda: permissions.get_user_visibility_condition(editor)),
+    ]
+
+
+def serialization_cases() -> List[Case]:
+    import random
+
+    from benchmarks.serialization import make_users
+
+    users = make_users(PAGE_SIZE, random.Random(1))
+    one = users[0]
+    page_adapter = TypeAdapter(List[UserRead])
+    return [
+        Case("UserRead[one]", lambda: UserRead.model_validate(one).model_dump(mode="json")),
+        Case(f"UserRead[page of {PAGE_SIZE}]",
+             lambda: page_adapter.dump_python(page_adapter.validate_python(users, from_attributes=True), mode="json")),
+        Case(f"UserRead[page of {PAGE_SIZE}] to JSON",
+             lambda: page_adapter.dump_json(page_adapter.validate_python(users, from_attributes=True))),
+    ]
+
+
+CASE_GROUPS: Tuple[Callable[[], List[Case]], ...] = (
+    security_cases, password_rule_cases, image_cases, permission_cases, serialization_cases,
+)
+
+
+# --- measuring -----------------------------------------------------------------
+
+def check(case: Case) -> Optional[str]:
+    """Runs the case once; a description of what went wrong, if it did not behave as declared"""
+    try:
+        case.fn()
+    except Exception as e:
+        if case.expect is not None and isinstance(e, case.expect):
+            return None
+        return f"raised {e!r}"
+    if case.expect is not None:
+        return f"did not raise {case.expect.__name__}"
+    return None
+
+
+def measure_time(fn: Callable[[], object], repeat: int, min_time: float) -> dict:
+    timer = timeit.Timer(fn)
+    number, taken = timer.autorange()  # enough calls for >= 0.2s
+    number = max(number, int(number * min_time / max(taken, 1e-9)))
+    per_call = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "calls_per_repeat": number,
+        "min_us": min(per_call) * 1e6,
+        "median_us": statistics.median(per_call) * 1e6,
+    }
+
+
+def measure_memory(fn: Callable[[], object], calls: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()  # first-call caches (compiled grants, schema validators) are not what we are looking for
+        gc.collect()
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(calls):
+            fn()
+        end, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kib": (peak - start) / 1024,
+        "retained_bytes_per_call": (end - start) / calls,
+    }
+
+
+def run(cases: List[Case], repeat: int, min_time: float) -> Dict[str, dict]:
+    results = {}
+    for case in cases:
+        problem = check(case)
+        if problem:
+            print(f"[Micro] {case.name} {problem}; skipped")
+            continue
+        fn = _swallowing(case.fn, case.expect) if case.expect else case.fn
+        timing = measure_time(fn, repeat, min_time)
+        memory = measure_memory(fn, min(timing["calls_per_repeat"], 200))
+        results[case.name] = {**timing, **memory, "note": case.note}
+        print(f"{case.name:<58} {timing['median_us']:>12.2f} us  {memory['peak_kib']:>9.1f} KiB peak"
+              f"  {memory['retained_bytes_per_call']:>9.1f} B/call kept  {case.note}")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Prints the deltas; returns the names of cases that regressed by more than threshold percent"""
+    regressed = []
+    print(f"\n{'vs baseline':<58} {'median us':>28} {'peak KiB':>24}")
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<58} {'(new)':>28}")
+            continue
+        time_change = (now["median_us"] - before["median_us"]) / before["median_us"] * 100
+        # Sub-KiB peaks move with interpreter noise, so memory must also grow by a whole KiB to count
+        memory_grew = now["peak_kib"] - before["peak_kib"] > max(1.0, before["peak_kib"] * threshold / 100)
+        flag = ""
+        if time_change > threshold or memory_grew:
+            regressed.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:<58} {before['median_us']:>10.2f} -> {now['median_us']:>10.2f} ({time_change:+4.0f}%)"
+              f" {before['peak_kib']:>9.1f} -> {now['peak_kib']:>9.1f}{flag}")
+    for name in sorted(set(baseline) - set(results)):
+        print(f"{name:<58} {'(not run)':>28}")
+    return regressed
+
+
+def environment() -> dict:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    from importlib.metadata import PackageNotFoundError, version
+
+    packages = {}
+    for package in ("pydantic", "pydantic-core", "passlib", "argon2-cffi", "python-jose", "Pillow", "SQLAlchemy"):
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+    return {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": revision,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "packages": packages,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the per-request primitives")
+    parser.add_argument("-k", dest="keywords", action="append", help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat, at least")
+    parser.add_argument("--save", help="write the results as a baseline JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=25.0, help="percent slower / bigger counted as a regression")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    cases = [case for group in CASE_GROUPS for case in group()]
+    if args.keywords:
+        cases = [case for case in cases if any(keyword in case.name for keyword in args.keywords)]
+    results = run(cases, args.repeat, args.min_time)
+    print(f"[Micro] {len(results)} cases in {time.perf_counter() - started:.1f}s")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["environment"]["python"] != sys.version.split()[0]:
+            print(f"[Micro] Baseline was recorded on Python {baseline['environment']['python']}; deltas include that")
+        regressed = compare(results, baseline["results"], args.threshold)
+        if regressed:
+            print(f"[Micro] {len(regressed)} regressed beyond {args.threshold:.0f}%: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
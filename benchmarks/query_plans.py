@@ -0,0 +1,456 @@
+# benchmarks/query_plans.py
+"""
+Query-plan regression check for every statement issued by app.crud and the
+visibility rules in app.services.permissions.
+
+Each scenario calls the real CRUD functions inside a rolled-back savepoint while a
+cursor hook records the SQL they send. Every recorded statement is then run
+through EXPLAIN (FORMAT JSON) and checked against query_plan_baselines.json:
+no sequential scans on the relations listed for the scenario, and a total cost
+at or below the recorded ceiling. Redundant indexes are reported at the end.
+
+Seed first (python -m benchmarks.seed), then:
+
+    python -m benchmarks.query_plans                    # check, exit 1 on regression
+    python -m benchmarks.query_plans --update-baselines # record current cost ceilings
+
+Costs depend on the data. The committed ceilings were recorded on PostgreSQL 18 after
+`python -m benchmarks.seed --users 200000 --branches 50000` (default seed and fan-out);
+re-record them when checking against a differently seeded database.
+"""
+import argparse
+import asyncio
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.database import engine
+from app.crud import auth as auth_crud
+from app.crud import branch as branch_crud
+from app.crud import user as user_crud
+from app.crud import user_branch_link as link_crud
+from app.models.branch import Branch
+from app.models.user import User
+from app.models.user_branch_link import UserBranchLink
+from app.models.user_role import UserRole
+from app.schemas.branch import BranchCreate, BranchUpdate, BranchSort, BranchBulkUpdate, BulkMode
+from app.schemas.common import CountMode
+from app.schemas.user import UserCreate, UserUpdate
+from app.services.permissions import get_user_visibility_condition
+
+BASELINES_PATH = Path(__file__).with_name("query_plan_baselines.json")
+COST_HEADROOM = 1.25  # ceiling recorded by --update-baselines, relative to the measured cost
+IGNORED_PREFIXES = ("SAVEPOINT", "RELEASE", "ROLLBACK", "EXPLAIN")
+
+REDUNDANT_INDEXES_SQL = """
+SELECT t.relname AS table_name, ci.relname AS index_name, cr.relname AS covered_by
+FROM pg_index i
+JOIN pg_index r ON r.indrelid = i.indrelid AND r.indexrelid <> i.indexrelid
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_class ci ON ci.oid = i.indexrelid
+JOIN pg_class cr ON cr.oid = r.indexrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+WHERE n.nspname = current_schema()
+  AND i.indpred IS NULL AND r.indpred IS NULL
+  AND i.indexprs IS NULL AND r.indexprs IS NULL
+  AND NOT i.indisprimary
+  -- i's key columns and operator classes are a leading prefix of r's
+  AND (r.indkey::text || ' ') LIKE (i.indkey::text || ' %')
+  AND (r.indclass::text || ' ') LIKE (i.indclass::text || ' %')
+  -- a unique index is only redundant next to another unique index on exactly the same columns
+  AND (NOT i.indisunique OR (r.indisunique AND i.indkey::text = r.indkey::text))
+  -- report only one side of exact duplicates
+  AND NOT (i.indkey::text = r.indkey::text AND i.indisunique = r.indisunique
+           AND NOT r.indisprimary AND i.indexrelid < r.indexrelid)
+ORDER BY 1, 2
+"""
+
+
+@dataclass
+class Fixtures:
+    viewers: Dict[UserRole, User]
+    user: User
+    branch: Branch
+    linked_branch_id: Any
+
+
+@dataclass
+class Captured:
+    scenario: str
+    statement: str
+    parameters: Any
+    plans: List[dict] = field(default_factory=list)
+
+
+Scenario = Callable[[AsyncSession, Fixtures], Awaitable[Any]]
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str):
+    def register(fn: Scenario) -> Scenario:
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+# --- users -------------------------------------------------------------------
+for _role in UserRole:
+    def _make(role: UserRole):
+        async def run(session, fx):
+            return await user_crud.get_users(session, fx.viewers[role], offset=0, limit=20)
+        return run
+    scenario(f"get_users[{_role.value}]")(_make(_role))
+
+    def _make_json(role: UserRole):
+        async def run(session, fx):
+            try:
+                return await user_crud.get_users_page_json(session, fx.viewers[role], offset=0, limit=20)
+            except HTTPException:
+                pass  # empty page
+        return run
+    scenario(f"get_users_page_json[{_role.value}]")(_make_json(_role))
+
+    def _make_count(role: UserRole):
+        async def run(session, fx):
+            await user_crud.count_users(session, fx.viewers[role], CountMode.exact)
+            await user_crud.count_users(session, fx.viewers[role], CountMode.estimated, is_active=True)
+        return run
+    scenario(f"count_users[{_role.value}]")(_make_count(_role))
+
+
+@scenario("get_user_by_id")
+async def _(session, fx):
+    return await user_crud.get_user_by_id(session, fx.viewers[UserRole.admin], fx.user.id)
+
+
+@scenario("get_user_by_id[editor]")
+async def _(session, fx):
+    # Scoped viewer: visibility in the WHERE clause, plus the existence probe when it misses
+    try:
+        return await user_crud.get_user_by_id(session, fx.viewers[UserRole.editor], fx.user.id)
+    except HTTPException:
+        pass
+
+
+@scenario("get_users_by_ids")
+async def _(session, fx):
+    return await user_crud.get_users_by_ids(session, fx.viewers[UserRole.editor], [fx.user.id, fx.viewers[UserRole.admin].id])
+
+
+@scenario("search_users")
+async def _(session, fx):
+    # Seeded emails all start with "seed-"; search as selectively as a typed-in address would
+    return await user_crud.search_users(session, fx.viewers[UserRole.senior_editor], fx.user.email.split("@")[0], limit=10)
+
+
+@scenario("get_user_by_email")
+async def _(session, fx):
+    return await user_crud.get_user_by_email(session, fx.user.email)
+
+
+@scenario("create_user")
+async def _(session, fx):
+    user_create = UserCreate(email="plan-check@example.com", password="Plan-check1!", branch_ids=[fx.branch.id])
+    return await user_crud.create_user(session, user_create, created_by_id=fx.viewers[UserRole.admin].id)
+
+
+@scenario("update_user")
+async def _(session, fx):
+    user_update = UserUpdate(full_name="Plan Check", branch_ids=[fx.branch.id])
+    return await user_crud.update_user_by_id(session, fx.user.id, user_update)
+
+
+@scenario("set_user_active_status")
+async def _(session, fx):
+    return await user_crud.set_user_active_status(session, fx.user.id, False)
+
+
+@scenario("delete_user_by_id")
+async def _(session, fx):
+    return await user_crud.delete_user_by_id(session, fx.viewers[UserRole.admin], fx.user.id)
+
+
+@scenario("authenticate_user")
+async def _(session, fx):
+    return await auth_crud.authenticate_user(fx.user.email, "wrong-password", session)
+
+
+@scenario("get_user_by_reset_token")
+async def _(session, fx):
+    return await auth_crud.get_user_by_reset_token("no-such-token", session)
+
+
+# --- branches ----------------------------------------------------------------
+@scenario("get_branch_by_id")
+async def _(session, fx):
+    return await branch_crud.get_branch_by_id(session, fx.branch.id)
+
+
+@scenario("get_branches_page[name]")
+async def _(session, fx):
+    rows, cursor = await branch_crud.get_branches_page(session, limit=50)
+    if cursor:
+        await branch_crud.get_branches_page(session, limit=50, cursor=cursor)
+
+
+@scenario("get_branches_page[-created_at,summary]")
+async def _(session, fx):
+    return await branch_crud.get_branches_page(session, limit=50, sort=BranchSort.created_at_desc, summary=True)
+
+
+@scenario("get_branches_page[name_prefix]")
+async def _(session, fx):
+    return await branch_crud.get_branches_page(session, limit=50, name_prefix=fx.branch.name.split()[0])
+
+
+@scenario("get_branches_page[created_by_id]")
+async def _(session, fx):
+    return await branch_crud.get_branches_page(session, limit=50, created_by_id=fx.branch.created_by_id)
+
+
+@scenario("search_branches")
+async def _(session, fx):
+    return await branch_crud.search_branches(session, fx.branch.name.split()[0], limit=10)
+
+
+@scenario("etag_probes[single]")
+async def _(session, fx):
+    return await user_crud.get_user_version(session, fx.viewers[UserRole.admin], fx.user.id)
+
+
+@scenario("etag_probes[branches_name_prefix]")
+async def _(session, fx):
+    return await branch_crud.get_branches_version(session, name_prefix=fx.branch.name.split()[0])
+
+
+@scenario("create_branch")
+async def _(session, fx):
+    return await branch_crud.create_branch(session, BranchCreate(name="plan-check-branch"), fx.viewers[UserRole.admin])
+
+
+@scenario("update_branch")
+async def _(session, fx):
+    return await branch_crud.update_branch(session, fx.branch.id, BranchUpdate(description="plan check"))
+
+
+@scenario("delete_branch")
+async def _(session, fx):
+    return await branch_crud.delete_branch(session, fx.linked_branch_id)
+
+
+@scenario("bulk_branches")
+async def _(session, fx):
+    await branch_crud.create_branches(session, [BranchCreate(name=f"plan-check-{i}") for i in range(3)], fx.viewers[UserRole.admin])
+    await branch_crud.update_branches(session, [BranchBulkUpdate(id=fx.branch.id, description="plan check")])
+    await branch_crud.delete_branches(session, [fx.branch.id, fx.linked_branch_id], BulkMode.best_effort)
+
+
+# --- user/branch links -------------------------------------------------------
+@scenario("add_remove_link")
+async def _(session, fx):
+    await link_crud.add_user_to_branch(session, fx.user.id, fx.branch.id)
+    await link_crud.remove_user_from_branch(session, fx.user.id, fx.branch.id)
+
+
+@scenario("get_branches_for_user")
+async def _(session, fx):
+    return await link_crud.get_branches_for_user(session, fx.user.id)
+
+
+@scenario("get_users_in_branch")
+async def _(session, fx):
+    return await link_crud.get_users_in_branch(session, fx.linked_branch_id)
+
+
+@scenario("get_users_in_branch_json")
+async def _(session, fx):
+    return await user_crud.get_users_in_branch_json(session, fx.linked_branch_id)
+
+
+@scenario("get_branches_page_json[name_prefix]")
+async def _(session, fx):
+    return await branch_crud.get_branches_page_json(session, limit=50, name_prefix=fx.branch.name.split()[0])
+
+
+@scenario("is_user_in_branch")
+async def _(session, fx):
+    return await link_crud.is_user_in_branch(session, fx.user.id, fx.branch.id)
+
+
+@scenario("remove_all_branches_for_user")
+async def _(session, fx):
+    return await link_crud.remove_all_branches_for_user(session, fx.user.id)
+
+
+@scenario("sync_branches")
+async def _(session, fx):
+    await link_crud.sync_user_branches(session, fx.user.id, [fx.branch.id])
+    await link_crud.sync_branches_for_users(session, {fx.user.id: [fx.branch.id, fx.linked_branch_id]})
+
+
+# --- exports (the streamed statements, executed here with LIMIT 1) -----------
+for _role in UserRole:
+    def _make_export(role: UserRole):
+        async def run(session, fx):
+            viewer = fx.viewers[role]
+            await session.execute(user_crud.build_users_export_query(viewer).limit(1))
+            await session.execute(link_crud.build_links_export_query(get_user_visibility_condition(viewer)).limit(1))
+        return run
+    scenario(f"exports[{_role.value}]")(_make_export(_role))
+
+
+# --- harness -----------------------------------------------------------------
+async def load_fixtures(conn: AsyncConnection) -> Fixtures:
+    async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False) as session:
+        viewers = {}
+        for role in UserRole:
+            viewer = (await session.execute(select(User).where(User.role == role).limit(1))).scalars().first()
+            if viewer is None:
+                raise SystemExit(f"No {role.value} user found; seed the database first (python -m benchmarks.seed)")
+            viewers[role] = viewer
+        # A category editor in a typical branch of a few members; the most popular hold a quarter of all users
+        linked_branch_id = (await session.execute(
+            select(UserBranchLink.branch_id)
+            .join(User, User.id == UserBranchLink.user_id)
+            .group_by(UserBranchLink.branch_id)
+            .having(func.count().between(2, 20), func.bool_or(User.role == UserRole.category_editor))
+            .order_by(UserBranchLink.branch_id)
+            .limit(1)
+        )).scalar_one()
+        user = (await session.execute(
+            select(User).join(UserBranchLink)
+            .where(UserBranchLink.branch_id == linked_branch_id, User.role == UserRole.category_editor)
+            .limit(1)
+        )).scalars().one()
+        branch = (await session.execute(
+            select(Branch).where(~Branch.user_branch_links.any()).limit(1)
+        )).scalars().first() or await session.get(Branch, linked_branch_id)
+        return Fixtures(viewers=viewers, user=user, branch=branch, linked_branch_id=linked_branch_id)
+
+
+async def capture_statements(conn: AsyncConnection, fx: Fixtures) -> List[Captured]:
+    captured: List[Captured] = []
+    current = {"name": ""}
+
+    def on_execute(_conn, _cursor, statement, parameters, _context, _executemany):
+        if not statement.lstrip().startswith(IGNORED_PREFIXES):
+            captured.append(Captured(current["name"], statement, parameters))
+
+    event.listen(conn.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        for name, run in SCENARIOS.items():
+            current["name"] = name
+            # Closing the session without committing rolls its savepoint back
+            async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False) as session:
+                try:
+                    await run(session, fx)
+                except HTTPException:
+                    pass  # expected outcomes such as 404/400 still issued their statements
+    finally:
+        event.remove(conn.sync_engine, "before_cursor_execute", on_execute)
+    return captured
+
+
+async def explain(conn: AsyncConnection, items: List[Captured]) -> None:
+    for item in items:
+        nested = await conn.begin_nested()
+        try:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {item.statement}", item.parameters)
+            plan = result.scalar_one()
+            item.plans = json.loads(plan) if isinstance(plan, str) else plan
+        finally:
+            await nested.rollback()
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def seq_scanned(item: Captured) -> set:
+    return {
+        node.get("Relation Name")
+        for plan in item.plans
+        for node in walk(plan["Plan"])
+        if node["Node Type"] == "Seq Scan"
+    }
+
+
+def total_cost(item: Captured) -> float:
+    return max((plan["Plan"]["Total Cost"] for plan in item.plans), default=0.0)
+
+
+def check(items: List[Captured], baselines: Dict[str, dict]) -> List[str]:
+    # A scenario that failed before reaching the database (e.g. a 500) would otherwise pass unchecked
+    failures = [f"{name}: issued no statements" for name in SCENARIOS if name not in {i.scenario for i in items}]
+    for item in items:
+        baseline = baselines.get(item.scenario)
+        if baseline is None:
+            failures.append(f"{item.scenario}: no baseline recorded")
+            continue
+        forbidden = seq_scanned(item) & set(baseline.get("forbid_seq_scan", []))
+        if forbidden:
+            failures.append(f"{item.scenario}: sequential scan on {sorted(forbidden)}\n    {item.statement}")
+        ceiling: Optional[float] = baseline.get("max_total_cost")
+        if ceiling is not None and total_cost(item) > ceiling:
+            failures.append(f"{item.scenario}: cost {total_cost(item):.1f} exceeds ceiling {ceiling:.1f}\n    {item.statement}")
+    return failures
+
+
+def update_baselines(items: List[Captured], baselines: Dict[str, dict]) -> Dict[str, dict]:
+    by_scenario: Dict[str, List[Captured]] = {}
+    for item in items:
+        by_scenario.setdefault(item.scenario, []).append(item)
+    for name, scenario_items in by_scenario.items():
+        entry = baselines.setdefault(name, {"forbid_seq_scan": []})
+        entry["max_total_cost"] = round(max(total_cost(i) for i in scenario_items) * COST_HEADROOM, 2)
+    return dict(sorted(baselines.items()))
+
+
+async def report_redundant_indexes(conn: AsyncConnection) -> List[str]:
+    rows = (await conn.execute(text(REDUNDANT_INDEXES_SQL))).all()
+    return [f"{row.table_name}.{row.index_name} is covered by {row.covered_by}" for row in rows]
+
+
+async def run(update: bool) -> int:
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    async with engine.connect() as conn:
+        await conn.begin()
+        try:
+            fx = await load_fixtures(conn)
+            items = await capture_statements(conn, fx)
+            await explain(conn, items)
+            redundant = await report_redundant_indexes(conn)
+        finally:
+            await conn.rollback()
+
+    print(f"Explained {len(items)} statements from {len(SCENARIOS)} scenarios")
+    for line in redundant:
+        print(f"[redundant index] {line}")
+
+    if update:
+        BASELINES_PATH.write_text(json.dumps(update_baselines(items, baselines), indent=2) + "\n")
+        print(f"Baselines written to {BASELINES_PATH}")
+        return 0
+
+    failures = check(items, baselines)
+    for failure in failures:
+        print(f"[plan regression] {failure}")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN every CRUD statement and compare against baselines")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(run(args.update_baselines)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# benchmarks/seed.py
+"""
+Seeds the configured (local!) Postgres with synthetic users, branches and
+user_branch_link rows using COPY.
+
+    python -m benchmarks.seed --users 200000 --branches 50000 --links-per-user 3 --manifest seed_manifest.json
+
+Every seeded user gets the same password (--password) so load tests can log in.
+With --fan-out skewed (the default) branch popularity follows a Zipf curve and
+memberships per user a heavy-tailed Pareto distribution, so a few branches have
+thousands of members and a few users dozens of branches, as in production.
+--manifest writes what benchmarks.load_test needs: logins and ids per role.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.core.security import hash_password
+from app.models.branch import Branch
+from app.models.user import User
+from app.models.user_branch_link import UserBranchLink
+from app.models.user_role import UserRole
+
+DEFAULT_PASSWORD = "Seed-pass1!"
+COPY_CHUNK = 50_000
+ZIPF_EXPONENT = 1.1  # branch popularity: the k-th most popular branch is picked ~1/k^1.1 as often
+PARETO_ALPHA = 1.5  # memberships per user; mean of paretovariate(1.5) is 3
+MANIFEST_SAMPLE = 200  # logins / ids per role written to the manifest
+# Branch names are made of these so trigram search sees varied words, not one shared "branch-000..." stem
+SYLLABLES = ("ka", "lo", "ri", "ten", "mar", "dus", "vel", "no", "sha", "bri", "om", "tal",
+             "per", "gu", "zin", "ar", "fel", "mo", "qui", "sto", "ne", "lam", "ob", "ryn")
+
+# Share of users per role, ordered so every creator tier is inserted before the users it creates
+ROLE_MIX: List[Tuple[UserRole, float]] = [
+    (UserRole.admin, 0.01),
+    (UserRole.senior_editor, 0.09),
+    (UserRole.editor, 0.30),
+    (UserRole.category_editor, 0.60),
+]
+CREATOR_ROLE = {
+    UserRole.senior_editor: UserRole.admin,
+    UserRole.editor: UserRole.senior_editor,
+    UserRole.category_editor: UserRole.editor,
+}
+
+USER_COLUMNS = ["id", "email", "hashed_password", "full_name", "role", "is_active",
+                "must_change_password", "created_at", "updated_at", "created_by_id"]
+BRANCH_COLUMNS = ["id", "name", "description", "created_at", "updated_at", "created_by_id"]
+
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _role_counts(users: int) -> List[Tuple[UserRole, int]]:
+    counts = [(role, max(1, int(users * share))) for role, share in ROLE_MIX]
+    counts[-1] = (counts[-1][0], max(1, users - sum(count for _, count in counts[:-1])))
+    return counts
+
+
+def pick_branches(rng: random.Random, branch_ids: List[UUID], count: int) -> List[UUID]:
+    return rng.sample(branch_ids, min(count, len(branch_ids)))
+
+
+class SkewedFanOut:
+    """Heavy-tailed memberships per user over Zipf-popular branches"""
+
+    def __init__(self, rng: random.Random, branch_ids: List[UUID], links_per_user: int):
+        self.rng = rng
+        self.branch_ids = list(branch_ids)
+        rng.shuffle(self.branch_ids)  # popularity independent of id and name order
+        self.cum_weights = list(itertools.accumulate(1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(branch_ids))))
+        self.scale = links_per_user / 3
+        self.cap = min(len(branch_ids), 50 * max(links_per_user, 1))
+
+    def __call__(self) -> List[UUID]:
+        count = min(int(self.rng.paretovariate(PARETO_ALPHA) * self.scale), self.cap)
+        if count <= 0:
+            return []
+        # Draws with replacement, so popular branches repeat; duplicates are dropped
+        return list(dict.fromkeys(self.rng.choices(self.branch_ids, cum_weights=self.cum_weights, k=count)))
+
+
+async def _copy(raw, table: str, columns: List[str], records: list) -> None:
+    for start in range(0, len(records), COPY_CHUNK):
+        await raw.copy_records_to_table(table, records=records[start:start + COPY_CHUNK], columns=columns)
+
+
+async def seed(
+    users: int,
+    branches: int,
+    links_per_user: int,
+    password: str,
+    prefix: str,
+    seed_value: int,
+    fan_out: str = "skewed",
+) -> Tuple[dict, dict]:
+    """Returns (summary, manifest)"""
+    rng = random.Random(seed_value)
+    hashed = hash_password(password)  # one argon2 hash shared by every seeded user
+    now = datetime.now(timezone.utc)
+
+    ids_by_role = {role: [] for role, _ in ROLE_MIX}
+    user_records = []
+    index = 0
+    for role, count in _role_counts(users):
+        creators = ids_by_role.get(CREATOR_ROLE.get(role)) or [None]
+        for _ in range(count):
+            user_id = _uuid(rng)
+            created_at = now - timedelta(minutes=rng.randrange(0, 525_600))
+            user_records.append((
+                user_id, f"{prefix}-{index}@example.com", hashed, f"Seed User {index}", role.value,
+                rng.random() > 0.05, False, created_at, created_at, rng.choice(creators),
+            ))
+            ids_by_role[role].append(user_id)
+            index += 1
+
+    branch_ids = [_uuid(rng) for _ in range(branches)]
+    branch_records = []
+    for i, branch_id in enumerate(branch_ids):
+        created_at = now - timedelta(minutes=rng.randrange(0, 525_600))
+        branch_records.append((
+            branch_id, f"{_word(rng)} {_word(rng)} {prefix}-{i}", f"Synthetic branch {i}",
+            created_at, created_at, rng.choice(ids_by_role[UserRole.admin]),
+        ))
+
+    link_records = []
+    if branch_ids:
+        skewed = SkewedFanOut(rng, branch_ids, links_per_user) if fan_out == "skewed" else None
+        for record in user_records:
+            if skewed is not None:
+                picked = skewed()
+            else:
+                picked = pick_branches(rng, branch_ids, rng.randint(0, 2 * links_per_user))
+            link_records.extend((record[0], branch_id) for branch_id in picked)
+
+    async with engine.begin() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        await _copy(raw, User.__tablename__, USER_COLUMNS, user_records)
+        await _copy(raw, Branch.__tablename__, BRANCH_COLUMNS, branch_records)
+        await _copy(raw, UserBranchLink.__tablename__, ["user_id", "branch_id"], link_records)
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # VACUUM as well: it merges the GIN pending lists COPY filled (which make trigram scans look
+        # expensive to the planner) and sets the visibility map index-only scans rely on
+        for table in (User.__tablename__, Branch.__tablename__, UserBranchLink.__tablename__):
+            await conn.execute(text(f'VACUUM (ANALYZE) "{table}"'))
+
+    summary = {
+        "users": len(user_records),
+        "branches": len(branch_records),
+        "links": len(link_records),
+        "users_by_role": {role.value: len(ids) for role, ids in ids_by_role.items()},
+        "email_pattern": f"{prefix}-<n>@example.com",
+        "password": password,
+        "fan_out": fan_out,
+    }
+    return summary, build_manifest(rng, summary, user_records, branch_ids, prefix, seed_value)
+
+
+def build_manifest(
+    rng: random.Random, summary: dict, user_records: list, branch_ids: List[UUID], prefix: str, seed_value: int
+) -> dict:
+    # Only active users can log in
+    logins: Dict[str, List[str]] = {role.value: [] for role, _ in ROLE_MIX}
+    user_ids: Dict[str, List[str]] = {role.value: [] for role, _ in ROLE_MIX}
+    for record in user_records:
+        role = record[4]
+        if record[5] and len(logins[role]) < MANIFEST_SAMPLE:
+            logins[role].append(record[1])
+        if len(user_ids[role]) < MANIFEST_SAMPLE:
+            user_ids[role].append(str(record[0]))
+    return {
+        **summary,
+        "prefix": prefix,
+        "seed": seed_value,
+        "logins": logins,
+        "user_ids": user_ids,
+        "branch_ids": [str(branch_id) for branch_id in rng.sample(branch_ids, min(MANIFEST_SAMPLE, len(branch_ids)))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed synthetic users, branches and links with COPY")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--branches", type=int, default=5_000)
+    parser.add_argument("--links-per-user", type=int, default=3, help="mean branch memberships per user")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--prefix", default="seed", help="email/branch name prefix, change it to seed twice")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for reproducible data")
+    parser.add_argument("--fan-out", choices=["skewed", "uniform"], default="skewed", help="membership distribution")
+    parser.add_argument("--manifest", help="write logins and ids for benchmarks.load_test to this JSON file")
+    args = parser.parse_args()
+    summary, manifest = asyncio.run(seed(
+        args.users, args.branches, args.links_per_user, args.password, args.prefix, args.seed, args.fan_out
+    ))
+    if args.manifest:
+        with open(args.manifest, "w") as f:
+            json.dump(manifest, f, indent=2)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
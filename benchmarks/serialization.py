@@ -0,0 +1,108 @@
+# benchmarks/serialization.py
+"""
+Compares the two LIST_RENDER_MODE paths on in-memory pages (no database needed).
+
+    python -m benchmarks.serialization --page-size 100 --seconds 2
+
+"orm" reproduces what FastAPI does with a response_model: validate the rows
+from attributes, serialize them to JSON-compatible Python objects, then
+json.dumps through JSONResponse. "fast" is app.services.list_render.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, List, Type
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from app.models.branch import Branch
+from app.models.user import User
+from app.models.user_branch_link import UserBranchLink
+from app.models.user_role import UserRole
+from app.schemas.branch import BranchRead
+from app.schemas.user import UserRead
+from app.services.list_render import render_json_list
+
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def make_users(count: int, rng: random.Random) -> List[User]:
+    now = datetime.now(timezone.utc)
+    users = []
+    for i in range(count):
+        user_id = _uuid(rng)
+        created_at = now - timedelta(minutes=rng.randrange(0, 525_600))
+        user = User(
+            id=user_id, email=f"bench-{i}@example.com", hashed_password="x", full_name=f"Bench User {i}",
+            role=rng.choice(list(UserRole)), is_active=True, must_change_password=False,
+            last_login=now, created_at=created_at, updated_at=created_at, user_pic=None,
+        )
+        user.user_branch_links = [UserBranchLink(user_id=user_id, branch_id=_uuid(rng)) for _ in range(rng.randint(0, 6))]
+        users.append(user)
+    return users
+
+
+def make_branches(count: int, rng: random.Random) -> List[Branch]:
+    now = datetime.now(timezone.utc)
+    return [
+        Branch(id=_uuid(rng), name=f"bench-branch-{i}", description=f"Branch {i}",
+               created_at=now, updated_at=now, created_by_id=_uuid(rng))
+        for i in range(count)
+    ]
+
+
+def default_path(model: Type[BaseModel]) -> Callable[[List[Any]], bytes]:
+    adapter = TypeAdapter(List[model])  # FastAPI also builds its response field once per route
+
+    def render(rows: List[Any]) -> bytes:
+        value = adapter.validate_python(rows, from_attributes=True)
+        return JSONResponse(adapter.dump_python(value, mode="json")).body
+    return render
+
+
+def fast_path(model: Type[BaseModel]) -> Callable[[List[Any]], bytes]:
+    return lambda rows: render_json_list(rows, model)
+
+
+def measure(render: Callable[[List[Any]], bytes], rows: List[Any], seconds: float) -> float:
+    """Pages rendered per second"""
+    render(rows)  # warm up
+    iterations = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        for _ in range(20):
+            render(rows)
+        iterations += 20
+    return iterations / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization paths")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=2.0, help="time per measurement")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [
+        ("UserRead", UserRead, make_users(args.page_size, rng)),
+        ("BranchRead", BranchRead, make_branches(args.page_size, rng)),
+    ]
+    print(f"{'model':<12} {'orm pages/s':>12} {'fast pages/s':>13} {'speedup':>8}")
+    for name, model, rows in cases:
+        orm, fast = default_path(model), fast_path(model)
+        # Same document either way; only the byte layout (whitespace) differs
+        assert json.loads(orm(rows)) == json.loads(fast(rows)), f"{name}: outputs differ"
+        orm_rate = measure(orm, rows, args.seconds)
+        fast_rate = measure(fast, rows, args.seconds)
+        print(f"{name:<12} {orm_rate:>12.0f} {fast_rate:>13.0f} {fast_rate / orm_rate:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/statements.py
+"""
+Per-call Python overhead of the hot point lookups: statements built on every call
+(as the CRUD helpers used to) versus the prebuilt ones in app.crud.statements.
+
+    python -m benchmarks.statements                # statement build + cache key + compiled-cache lookup
+    python -m benchmarks.statements --db           # additionally time full session.execute() round trips
+
+The default mode needs no database: it repeats the work Session.execute does before
+anything is sent, i.e. building the statement, generating its cache key and looking
+the compiled form up in a compiled cache. --db uses the configured (local!) Postgres
+and an existing user and branch.
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.orm import selectinload
+
+from app.crud import statements
+from app.models.branch import Branch
+from app.models.user import User
+from app.models.user_branch_link import UserBranchLink
+
+
+# The statements as the CRUD helpers built them before, one builder per lookup
+def _user_by_id(user_id):
+    return (
+        select(User)
+        .where(User.id == user_id)
+        .options(selectinload(User.user_branch_links).selectinload(UserBranchLink.branch))
+    )
+
+
+def _user_by_email(email):
+    return select(User).where(User.email == email)
+
+
+def _branch_by_id(branch_id):
+    return select(Branch).where(Branch.id == branch_id)
+
+
+def _user_in_branch(user_id, branch_id):
+    return select(UserBranchLink).where(UserBranchLink.user_id == user_id, UserBranchLink.branch_id == branch_id)
+
+
+def lookups(user_id, email, branch_id) -> List[Tuple[str, Callable[[], Any], Any, Dict[str, Any]]]:
+    """(name, inline builder, prebuilt statement, bind values)"""
+    return [
+        ("user_by_id", lambda: _user_by_id(user_id), statements.USER_BY_ID, {"user_id": user_id}),
+        ("user_by_email", lambda: _user_by_email(email), statements.USER_BY_EMAIL, {"email": email}),
+        ("branch_by_id", lambda: _branch_by_id(branch_id), statements.BRANCH_BY_ID, {"branch_id": branch_id}),
+        ("user_in_branch", lambda: _user_in_branch(user_id, branch_id), statements.USER_IN_BRANCH,
+         {"user_id": user_id, "branch_id": branch_id}),
+    ]
+
+
+def per_call_us(fn: Callable[[], Any], seconds: float) -> float:
+    fn()  # warm up
+    calls = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        for _ in range(100):
+            fn()
+        calls += 100
+    return elapsed / calls * 1e6
+
+
+def python_overhead(seconds: float) -> None:
+    dialect = asyncpg_dialect()
+    compiled_cache: Dict[Any, Any] = {}
+
+    def prepare(stmt) -> None:
+        key = stmt._generate_cache_key()
+        if key not in compiled_cache:
+            compiled_cache[key] = stmt.compile(dialect=dialect)
+
+    print(f"{'lookup':<16} {'inline us/call':>15} {'prebuilt us/call':>17} {'saved':>7}")
+    for name, build, prebuilt, _ in lookups(uuid4(), "bench@example.com", uuid4()):
+        inline = per_call_us(lambda: prepare(build()), seconds)
+        cached = per_call_us(lambda: prepare(prebuilt), seconds)
+        print(f"{name:<16} {inline:>15.1f} {cached:>17.1f} {1 - cached / inline:>6.0%}")
+
+
+async def round_trips(seconds: float) -> None:
+    from app.core.database import async_session
+
+    async with async_session() as session:
+        user = (await session.execute(select(User).limit(1))).scalar_one()
+        branch = (await session.execute(select(Branch).limit(1))).scalar_one()
+        user_id, email, branch_id = user.id, user.email, branch.id
+
+    async def timed(run) -> float:
+        await run()
+        calls = 0
+        started = time.perf_counter()
+        while (elapsed := time.perf_counter() - started) < seconds:
+            await run()
+            calls += 1
+        return elapsed / calls * 1e6
+
+    print(f"\n{'lookup':<16} {'inline us/call':>15} {'prebuilt us/call':>17}  (session.execute round trip)")
+    for name, build, prebuilt, params in lookups(user_id, email, branch_id):
+        async with async_session() as session:
+            async def inline():
+                (await session.execute(build())).all()
+                session.expunge_all()
+
+            async def cached():
+                (await session.execute(prebuilt, params)).all()
+                session.expunge_all()
+
+            print(f"{name:<16} {await timed(inline):>15.1f} {await timed(cached):>17.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark prebuilt vs per-call statements")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per measurement")
+    parser.add_argument("--db", action="store_true", help="also time real round trips")
+    args = parser.parse_args()
+    python_overhead(args.seconds)
+    if args.db:
+        asyncio.run(round_trips(args.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,9 @@ from app.models.user import User
 from app.models.password_reset_token import PasswordResetToken
 from app.models.branch import Branch
 from app.models.user_branch_link import UserBranchLink
+from app.models.scheduler_job_run import SchedulerJobRun
+from app.models.job import Job
+from app.models.audit_log import AuditLog
 
 
 
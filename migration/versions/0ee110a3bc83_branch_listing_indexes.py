@@ -0,0 +1,33 @@
+"""branch listing indexes
+
+Revision ID: 0ee110a3bc83
+Revises: f1044a1a898f
+Create Date: 2026-10-19 09:12:41.203117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0ee110a3bc83'
+down_revision: Union[str, Sequence[str], None] = 'f1044a1a898f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_branch_created_at'), 'branch', ['created_at'], unique=False)
+    op.create_index(op.f('ix_branch_created_by_id'), 'branch', ['created_by_id'], unique=False)
+    op.create_index('ix_branch_name_pattern', 'branch', ['name'], unique=False,
+                    postgresql_ops={'name': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_branch_name_pattern', table_name='branch')
+    op.drop_index(op.f('ix_branch_created_by_id'), table_name='branch')
+    op.drop_index(op.f('ix_branch_created_at'), table_name='branch')
@@ -0,0 +1,39 @@
+"""lookup indexes
+
+Revision ID: 3fa76a8f2fb0
+Revises: 0ee110a3bc83
+Create Date: 2026-10-19 11:40:03.518842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3fa76a8f2fb0'
+down_revision: Union[str, Sequence[str], None] = '0ee110a3bc83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Foreign-key lookups that had no usable index
+    op.create_index(op.f('ix_user_branch_link_branch_id'), 'user_branch_link', ['branch_id'], unique=False)
+    op.create_index(op.f('ix_user_created_by_id'), 'user', ['created_by_id'], unique=False)
+    op.create_index(op.f('ix_password_reset_token_user_id'), 'password_reset_token', ['user_id'], unique=False)
+    # Duplicates of the primary keys
+    op.drop_index(op.f('ix_user_id'), table_name='user')
+    # UniqueConstraint('id') in f1044a1a898f repeats the primary key and is not created everywhere
+    op.execute('ALTER TABLE branch DROP CONSTRAINT IF EXISTS branch_id_key')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # branch_id_key is not restored: it only repeated the primary key, and may never have existed
+    op.create_index(op.f('ix_user_id'), 'user', ['id'], unique=True)
+    op.drop_index(op.f('ix_password_reset_token_user_id'), table_name='password_reset_token')
+    op.drop_index(op.f('ix_user_created_by_id'), table_name='user')
+    op.drop_index(op.f('ix_user_branch_link_branch_id'), table_name='user_branch_link')
@@ -0,0 +1,36 @@
+"""scheduler job run
+
+Revision ID: 511eea5f5de0
+Revises: 3fa76a8f2fb0
+Create Date: 2026-10-19 14:05:27.114960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '511eea5f5de0'
+down_revision: Union[str, Sequence[str], None] = '3fa76a8f2fb0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('scheduler_job_run',
+    sa.Column('job_id', sa.String(), nullable=False),
+    sa.Column('last_run_by', sa.String(), nullable=False),
+    sa.Column('last_started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_status', sa.String(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('scheduler_job_run')
@@ -0,0 +1,41 @@
+"""trigram search indexes
+
+Revision ID: 6f6c5e1dc2eb
+Revises: 876089f51db3
+Create Date: 2026-10-19 18:20:47.103925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f6c5e1dc2eb'
+down_revision: Union[str, Sequence[str], None] = '876089f51db3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Built concurrently so a large user table stays writable; that cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_email_trgm', 'user', ['email'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_user_full_name_trgm', 'user', [sa.text('lower(full_name) gin_trgm_ops')], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_branch_name_trgm', 'branch', [sa.text('lower(name) gin_trgm_ops')], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The pg_trgm extension is left installed; other objects may depend on it
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_branch_name_trgm', table_name='branch', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_user_full_name_trgm', table_name='user', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_user_email_trgm', table_name='user', postgresql_concurrently=True, if_exists=True)
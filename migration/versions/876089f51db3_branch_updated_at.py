@@ -0,0 +1,33 @@
+"""branch updated_at
+
+Revision ID: 876089f51db3
+Revises: d4c918e8976f
+Create Date: 2026-10-19 16:02:11.540318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '876089f51db3'
+down_revision: Union[str, Sequence[str], None] = 'd4c918e8976f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('branch', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    # Existing branches have never changed since creation
+    op.execute('UPDATE branch SET updated_at = created_at')
+    op.alter_column('branch', 'updated_at', nullable=False)
+    op.create_index(op.f('ix_branch_updated_at'), 'branch', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_branch_updated_at'), table_name='branch')
+    op.drop_column('branch', 'updated_at')
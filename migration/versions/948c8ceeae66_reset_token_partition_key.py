@@ -0,0 +1,40 @@
+"""reset token partition key
+
+Revision ID: 948c8ceeae66
+Revises: b5654fccb03d
+Create Date: 2026-10-19 21:12:47.306519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '948c8ceeae66'
+down_revision: Union[str, Sequence[str], None] = 'b5654fccb03d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The keys `python -m app.tasks.maintenance partition-reset-tokens` needs: Postgres wants the
+    # partition key (expires_at) in every unique index, so the table has this shape either way
+    op.execute('DELETE FROM password_reset_token WHERE expires_at IS NULL')
+    op.alter_column('password_reset_token', 'expires_at', existing_type=sa.DateTime(timezone=True), nullable=False)
+    op.drop_constraint('password_reset_token_pkey', 'password_reset_token', type_='primary')
+    op.create_primary_key('password_reset_token_pkey', 'password_reset_token', ['id', 'expires_at'])
+    op.drop_index(op.f('ix_password_reset_token_token'), table_name='password_reset_token')
+    op.create_index(op.f('ix_password_reset_token_token'), 'password_reset_token', ['token'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Only possible on the plain table; a partitioned one cannot drop expires_at from its keys
+    op.drop_index(op.f('ix_password_reset_token_token'), table_name='password_reset_token')
+    op.create_index(op.f('ix_password_reset_token_token'), 'password_reset_token', ['token'], unique=True)
+    op.drop_constraint('password_reset_token_pkey', 'password_reset_token', type_='primary')
+    op.create_primary_key('password_reset_token_pkey', 'password_reset_token', ['id'])
+    op.alter_column('password_reset_token', 'expires_at', existing_type=sa.DateTime(timezone=True), nullable=True)
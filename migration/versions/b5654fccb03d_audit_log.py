@@ -0,0 +1,40 @@
+"""audit log
+
+Revision ID: b5654fccb03d
+Revises: 6f6c5e1dc2eb
+Create Date: 2026-10-19 19:05:32.671240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5654fccb03d'
+down_revision: Union[str, Sequence[str], None] = '6f6c5e1dc2eb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_log',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('actor_id', sa.UUID(), nullable=True),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('target_id', sa.UUID(), nullable=True),
+    sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_audit_log_target_id_occurred_at', 'audit_log', ['target_id', sa.text('occurred_at DESC')], unique=False)
+    op.create_index('ix_audit_log_actor_id_occurred_at', 'audit_log', ['actor_id', sa.text('occurred_at DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_log_actor_id_occurred_at', table_name='audit_log')
+    op.drop_index('ix_audit_log_target_id_occurred_at', table_name='audit_log')
+    op.drop_table('audit_log')
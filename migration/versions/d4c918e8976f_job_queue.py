@@ -0,0 +1,50 @@
+"""job queue
+
+Revision ID: d4c918e8976f
+Revises: 511eea5f5de0
+Create Date: 2026-10-19 15:12:40.318502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4c918e8976f'
+down_revision: Union[str, Sequence[str], None] = '511eea5f5de0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('run_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('dedupe_key', sa.String(), nullable=True),
+    sa.Column('locked_by', sa.String(), nullable=True),
+    sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_claim', 'job', [sa.text('priority DESC'), 'run_at'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"))
+    op.create_index('ux_job_dedupe_key', 'job', ['dedupe_key'], unique=True,
+                    postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_job_dedupe_key', table_name='job', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_index('ix_job_claim', table_name='job', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_table('job')